@@ -0,0 +1,81 @@
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+class ResearchAPIClient:
+    """Thin synchronous client for the research API, used by the Streamlit UI.
+
+    One instance (and its connection pool) can be shared by every UI
+    session. Memory listings are revalidated with ETags, so unchanged pages
+    are not transferred again.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 300.0, api_prefix: str = "/api/v1"):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(base_url=self.base_url + api_prefix, timeout=timeout)
+        self._etag_cache: Dict[str, Tuple[str, Any]] = {}
+        self._etag_lock = threading.Lock()
+
+    def close(self):
+        self._client.close()
+
+    def _get_json(self, path: str, **params) -> Any:
+        response = self._client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_revalidated(self, path: str, **params) -> Any:
+        key = f"{path}?{json.dumps(params, sort_keys=True)}"
+        with self._etag_lock:
+            cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self._client.get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        if response.headers.get("ETag"):
+            with self._etag_lock:
+                self._etag_cache[key] = (response.headers["ETag"], body)
+        return body
+
+    def stream_research(self, query: str, mode: str = "full", debug: bool = False,
+                        namespace: str = "default", filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the /research/stream events: node outputs as they finish, then the result"""
+        payload = {"query": query, "mode": mode, "debug": debug, "namespace": namespace}
+        if filters:
+            payload["filters"] = filters
+        with self._client.stream("POST", "/research/stream", json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    def trace(self, trace_id: str) -> Dict[str, Any]:
+        """Debug trace of a run made with debug=True"""
+        return self._get_json(f"/research/traces/{trace_id}")
+
+    def upload_documents(self, files: List[Tuple[str, bytes]], namespace: str = "default") -> Dict[str, Any]:
+        response = self._client.post(
+            "/documents/upload",
+            files=[("files", (name, content)) for name, content in files],
+            data={"namespace": namespace}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def ingest_urls(self, urls: List[str], namespace: str = "default") -> Dict[str, Any]:
+        response = self._client.post("/documents/ingest-urls", json={"urls": urls, "namespace": namespace})
+        response.raise_for_status()
+        return response.json()
+
+    def vector_store_stats(self, namespace: str = "default") -> Dict[str, Any]:
+        return self._get_json("/documents/stats", namespace=namespace)
+
+    def memory_entries(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        return self._get_revalidated("/memory/entries", limit=limit, offset=offset)["entries"]
+
+    def memory_entry(self, entry_id: str) -> Dict[str, Any]:
+        return self._get_revalidated(f"/memory/entries/{entry_id}")
@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import time
 import sys
 import os
@@ -13,6 +13,7 @@ sys.path.insert(0, src_dir)
 
 from api.routers import research, documents, memory
 from utils.logger import setup_logger
+from utils.metrics import REGISTRY, HTTP_REQUEST_SECONDS
 
 logger = setup_logger("FastAPI")
 
@@ -32,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
@@ -43,6 +45,14 @@ async def add_process_time_header(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    # Label by route template so path parameters don't explode cardinality
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        process_time,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code)
+    )
     return response
 
 # Global exception handler
@@ -68,6 +78,11 @@ async def health_check():
         "timestamp": time.time()
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -1,22 +1,41 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from enum import Enum
+from datetime import datetime
+from rag.namespaces import DEFAULT_NAMESPACE, NAMESPACE_MAX_LENGTH, NAMESPACE_PATTERN
 
 class ResearchMode(str, Enum):
     FULL = "full"
     RAG_ONLY = "rag_only"
 
+class RetrievalFilters(BaseModel):
+    sources: Optional[List[str]] = Field(default=None, description="Only chunks from these sources (file paths or URLs)")
+    file_types: Optional[List[str]] = Field(default=None, description="Only chunks from these file types, e.g. pdf, docx, txt, url")
+    ingested_after: Optional[datetime] = Field(default=None, description="Only chunks ingested at or after this time")
+    ingested_before: Optional[datetime] = Field(default=None, description="Only chunks ingested at or before this time")
+
 class ResearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000, description="Research query")
     mode: ResearchMode = Field(default=ResearchMode.FULL, description="Research mode")
     debug: bool = Field(default=False, description="Enable debug mode")
     max_tokens: Optional[int] = Field(default=4000, description="Maximum tokens for RAG context")
+    namespace: str = Field(default=DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH, description="Document namespace (tenant) to search")
+    filters: Optional[RetrievalFilters] = Field(default=None, description="Restrict RAG retrieval by chunk metadata")
+
+class BatchResearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, description="Research queries")
+    mode: ResearchMode = Field(default=ResearchMode.FULL, description="Research mode")
+    debug: bool = Field(default=False, description="Enable debug mode")
+    max_tokens: Optional[int] = Field(default=4000, description="Maximum tokens for RAG context")
+    namespace: str = Field(default=DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH, description="Document namespace (tenant) to search")
+    filters: Optional[RetrievalFilters] = Field(default=None, description="Restrict RAG retrieval by chunk metadata")
 
 class DocumentUploadRequest(BaseModel):
     files: List[str] = Field(..., description="List of file paths to ingest")
 
 class URLIngestRequest(BaseModel):
     urls: List[str] = Field(..., description="List of URLs to ingest")
+    namespace: str = Field(default=DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH, description="Document namespace (tenant) to ingest into")
     
 class MemoryQueryRequest(BaseModel):
     query: str = Field(..., min_length=1, description="Query to search in memory")
@@ -9,6 +9,8 @@ class ResearchResponse(BaseModel):
     mode: str = Field(..., description="Research mode used")
     execution_time: float = Field(..., description="Execution time in seconds")
     memory_id: Optional[str] = Field(None, description="Memory entry ID")
+    cached: bool = Field(default=False, description="Whether the report was served from the report cache")
+    routing: Optional[Dict[str, Any]] = Field(None, description="Nodes that ran or were skipped and the estimated time saved")
     
     # Optional detailed outputs
     search_output: Optional[str] = Field(None, description="Search agent output")
@@ -19,6 +21,7 @@ class ResearchResponse(BaseModel):
     
     # Debug information
     debug_info: Optional[Dict[str, Any]] = Field(None, description="Debug information")
+    trace_id: Optional[str] = Field(None, description="ID of the stored debug trace (GET /research/traces/{trace_id})")
 
 class DocumentIngestResponse(BaseModel):
     success: bool = Field(..., description="Whether ingestion was successful")
@@ -30,9 +33,12 @@ class DocumentIngestResponse(BaseModel):
 class VectorStoreStatsResponse(BaseModel):
     total_documents: int = Field(..., description="Total documents in vector store")
     collection_name: str = Field(..., description="Collection name")
+    namespace: str = Field(default="default", description="Document namespace (tenant)")
+    shards: int = Field(default=1, description="Number of collection shards")
     embedding_model: str = Field(..., description="Embedding model used")
     persist_directory: str = Field(..., description="Persistence directory")
     sample_sources: List[str] = Field(..., description="Sample sources")
+    storage: Optional[Dict[str, Any]] = Field(default=None, description="Live vs dead index entries and on-disk bytes")
 
 class MemoryEntryResponse(BaseModel):
     id: str = Field(..., description="Memory entry ID")
@@ -40,8 +46,14 @@ class MemoryEntryResponse(BaseModel):
     final_report: str = Field(..., description="Research report")
     timestamp: datetime = Field(..., description="Creation timestamp")
 
+class MemoryEntrySummary(BaseModel):
+    id: str = Field(..., description="Memory entry ID")
+    query: str = Field(..., description="Original query")
+    timestamp: datetime = Field(..., description="Creation timestamp")
+    preview: str = Field(..., description="Start of the research report")
+
 class MemoryListResponse(BaseModel):
-    entries: List[MemoryEntryResponse] = Field(..., description="List of memory entries")
+    entries: List[MemoryEntrySummary] = Field(..., description="List of memory entries")
     total: int = Field(..., description="Total number of entries")
 
 class HealthResponse(BaseModel):
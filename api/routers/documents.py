@@ -1,23 +1,30 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from typing import List
+import asyncio
 import tempfile
 import os
 
 from api.models.requests import URLIngestRequest
 from api.models.responses import DocumentIngestResponse, VectorStoreStatsResponse
-from agent.rag_agent import RAGAgent
+from workflow.research_flow import get_rag_agent
+from rag.namespaces import DEFAULT_NAMESPACE, NAMESPACE_MAX_LENGTH, NAMESPACE_PATTERN, NamespaceNotFound
+from rag.compaction import vacuum_sqlite
 from utils.logger import setup_logger
+from config.config_loader import config
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 logger = setup_logger("DocumentsAPI")
 
 @router.post("/upload", response_model=DocumentIngestResponse)
-async def upload_documents(files: List[UploadFile] = File(...)):
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    namespace: str = Form(DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH)
+):
     """
-    Upload and ingest documents for RAG.
+    Upload and ingest documents for RAG into a namespace.
     """
     try:
-        rag_agent = RAGAgent()
+        rag_agent = get_rag_agent(namespace)
         temp_files = []
         
         # Save uploaded files temporarily
@@ -29,7 +36,8 @@ async def upload_documents(files: List[UploadFile] = File(...)):
                 temp_files.append(tmp_file.name)
         
         # Ingest documents
-        result = rag_agent.ingest_documents(temp_files)
+        # Chunks keep the uploaded file name as their source, not the temp path
+        result = rag_agent.ingest_documents(temp_files, sources=[file.filename for file in files])
         
         # Clean up temp files
         for temp_file in temp_files:
@@ -60,7 +68,7 @@ async def ingest_urls(request: URLIngestRequest):
     Ingest documents from URLs.
     """
     try:
-        rag_agent = RAGAgent()
+        rag_agent = get_rag_agent(request.namespace)
         result = rag_agent.ingest_urls(request.urls)
         
         if result["success"]:
@@ -80,15 +88,17 @@ async def ingest_urls(request: URLIngestRequest):
         )
 
 @router.get("/stats", response_model=VectorStoreStatsResponse)
-async def get_vector_store_stats():
+async def get_vector_store_stats(namespace: str = Query(DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH)):
     """
-    Get vector store statistics.
+    Get vector store statistics for a namespace.
     """
     try:
-        rag_agent = RAGAgent()
+        rag_agent = get_rag_agent(namespace, create=False)
         stats = rag_agent.get_vector_store_stats()
         return VectorStoreStatsResponse(**stats)
         
+    except NamespaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get vector store stats: {str(e)}")
         raise HTTPException(
@@ -96,18 +106,59 @@ async def get_vector_store_stats():
             detail=f"Failed to get vector store stats: {str(e)}"
         )
 
+@router.post("/compact")
+async def compact_vector_store(namespace: str = Query(DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH)):
+    """
+    Rebuild a namespace's collections without deleted entries. Searches keep
+    running during the rebuild; ingestion into the namespace waits for it.
+    """
+    try:
+        rag_agent = get_rag_agent(namespace, create=False)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, rag_agent.compact_vector_store)
+        
+    except NamespaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to compact vector store: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to compact vector store: {str(e)}"
+        )
+
+@router.post("/vacuum")
+async def vacuum_vector_store():
+    """
+    VACUUM the SQLite file all namespaces share, returning freed pages to the
+    disk. Every namespace's reads and writes wait while it runs.
+    """
+    try:
+        persist_directory = config["vector_store"].get("persist_directory", "./data/vector_store")
+        loop = asyncio.get_event_loop()
+        reclaimed = await loop.run_in_executor(None, vacuum_sqlite, persist_directory)
+        return {"reclaimed_bytes": reclaimed}
+        
+    except Exception as e:
+        logger.error(f"Failed to vacuum vector store: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to vacuum vector store: {str(e)}"
+        )
+
 @router.delete("/clear")
-async def clear_vector_store():
+async def clear_vector_store(namespace: str = Query(DEFAULT_NAMESPACE, pattern=NAMESPACE_PATTERN.pattern, max_length=NAMESPACE_MAX_LENGTH)):
     """
-    Clear all documents from vector store.
+    Clear all documents in a namespace; other namespaces are untouched.
     """
     try:
-        rag_agent = RAGAgent()
-        # Add a clear method to your RAGAgent if not exists
-        # rag_agent.clear_vector_store()
+        rag_agent = get_rag_agent(namespace, create=False)
+        if not rag_agent.clear_vector_store():
+            raise RuntimeError("clearing the collection failed")
         
-        return {"message": "Vector store cleared successfully"}
+        return {"message": f"Vector store namespace '{namespace}' cleared successfully"}
         
+    except NamespaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to clear vector store: {str(e)}")
         raise HTTPException(
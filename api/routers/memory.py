@@ -1,39 +1,42 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List
+import hashlib
 
 from api.models.requests import MemoryQueryRequest
-from api.models.responses import MemoryEntryResponse, MemoryListResponse
-from agent.memory_agent import MemoryAgent
+from api.models.responses import MemoryEntryResponse, MemoryEntrySummary, MemoryListResponse
+from workflow.research_flow import get_memory_agent
 from utils.logger import setup_logger
 
 router = APIRouter(prefix="/memory", tags=["memory"])
 logger = setup_logger("MemoryAPI")
 
+def _etag(*parts: str) -> str:
+    return '"%s"' % hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
 @router.get("/entries", response_model=MemoryListResponse)
-async def get_memory_entries(limit: int = 10, offset: int = 0):
+async def get_memory_entries(request: Request, response: Response, limit: int = 10, offset: int = 0):
     """
-    Get memory entries with pagination.
+    Get memory entry summaries with pagination. Full reports come from /entries/{id}.
     """
     try:
-        memory_agent = MemoryAgent()
+        memory_agent = get_memory_agent()
         entries = memory_agent.get_all()
         
         # Apply pagination
         total = len(entries)
         paginated_entries = entries[offset:offset + limit]
-        
-        response_entries = [
-            MemoryEntryResponse(
-                id=entry["id"],
-                query=entry["query"],
-                final_report=entry["final_report"],
-                timestamp=entry["timestamp"]
-            )
-            for entry in paginated_entries
-        ]
+
+        # Entries never change once stored, so their ids identify the page
+        etag = _etag(str(total), *(entry["id"] for entry in paginated_entries))
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         
         return MemoryListResponse(
-            entries=response_entries,
+            entries=[MemoryEntrySummary(**entry) for entry in paginated_entries],
             total=total
         )
         
@@ -45,20 +48,25 @@ async def get_memory_entries(limit: int = 10, offset: int = 0):
         )
 
 @router.get("/entries/{entry_id}", response_model=MemoryEntryResponse)
-async def get_memory_entry(entry_id: str):
+async def get_memory_entry(entry_id: str, request: Request, response: Response):
     """
-    Get a specific memory entry by ID.
+    Get a specific memory entry by ID, including the full report.
     """
     try:
-        memory_agent = MemoryAgent()
-        entry = memory_agent.get_by_id(entry_id)
-        
-        if not entry:
+        memory_agent = get_memory_agent()
+        if entry_id not in memory_agent.memory:
             raise HTTPException(
                 status_code=404,
                 detail=f"Memory entry {entry_id} not found"
             )
-        
+
+        # Checked before decompressing the report
+        etag = _etag(entry_id)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
+        entry = memory_agent.get_by_id(entry_id)
         return MemoryEntryResponse(
             id=entry_id,
             query=entry["query"],
@@ -81,7 +89,7 @@ async def analyze_memory_context(request: MemoryQueryRequest):
     Analyze memory context for a query.
     """
     try:
-        memory_agent = MemoryAgent()
+        memory_agent = get_memory_agent()
         result = memory_agent.analyze_context(request.query, debug=True)
         
         return {
@@ -103,8 +111,8 @@ async def clear_memory():
     Clear all memory entries.
     """
     try:
-        memory_agent = MemoryAgent()
-        memory_agent.memory.clear()
+        memory_agent = get_memory_agent()
+        memory_agent.clear()
         
         return {"message": "Memory cleared successfully"}
         
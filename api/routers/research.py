@@ -1,14 +1,25 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+import json
 import time
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from pydantic import ValidationError
 
-from api.models.requests import ResearchRequest
+from api.models.requests import ResearchRequest, BatchResearchRequest, ResearchMode, RetrievalFilters
+from rag.namespaces import DEFAULT_NAMESPACE, NamespaceNotFound
 from api.models.responses import ResearchResponse
-from workflow.research_flow import research_workflow
-from agent.memory_agent import MemoryAgent
+from workflow.research_flow import stream_research, routing_summary, get_memory_agent, get_rag_agent
+from utils.format_utils import normalize_query
+from rag.filters import filters_key
+from utils.single_flight import SingleFlight
+from utils.batch_scope import BatchScope
+from tools.rate_limiter import Priority, llm_priority
+from config.config_loader import config
+from utils.metrics import CACHE_HITS, CACHE_MISSES, FAILURES
 from utils.logger import setup_logger
+from utils.trace_store import get_trace_store, new_trace_id
 
 router = APIRouter(prefix="/research", tags=["research"])
 logger = setup_logger("ResearchAPI")
@@ -16,87 +27,349 @@ logger = setup_logger("ResearchAPI")
 # Thread pool for running synchronous workflow
 executor = ThreadPoolExecutor(max_workers=4)
 
+batch_config = config.get("batch", {})
+# Batch queries get their own pool so a sweep cannot starve interactive queries
+batch_executor = ThreadPoolExecutor(max_workers=batch_config.get("max_parallel_queries", 8))
+
+tracing_config = config.get("tracing", {})
+
+# Identical concurrent full-mode queries share one workflow execution,
+# whether they are streamed or not
+workflow_flight = SingleFlight()
+
+def _workflow_events(workflow_input: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """stream_research events, shared with an identical in-flight run if there is one"""
+    key = ("full", workflow_input["namespace"], normalize_query(workflow_input["query"]), workflow_input["debug"],
+           filters_key(workflow_input.get("filters")))
+    events, shared = workflow_flight.stream(key, stream_research, workflow_input)
+    if shared:
+        CACHE_HITS.inc(cache="research_single_flight")
+        logger.info(f"Joined in-flight research for query: {workflow_input['query']}")
+    else:
+        CACHE_MISSES.inc(cache="research_single_flight")
+    return events
+
+def _run_workflow(workflow_input: Dict[str, Any]) -> Dict[str, Any]:
+    result = None
+    # Consumed to the end so followers of this run see it finish
+    for event in _workflow_events(workflow_input):
+        if event["event"] == "result":
+            result = event["result"]
+    if result is None:
+        raise RuntimeError("Research workflow finished without a result")
+    return result
+
+def _execute(query: str, mode: ResearchMode, debug: bool, max_tokens: Optional[int],
+             namespace: str = DEFAULT_NAMESPACE, filters: Optional[RetrievalFilters] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Run one research request synchronously, returns (result, memory_id)"""
+    filters = filters.model_dump(exclude_none=True) if filters else None
+    if mode == ResearchMode.FULL:
+        result = _run_workflow({"query": query, "debug": debug, "namespace": namespace, "filters": filters})
+        # Store in memory
+        memory_id = get_memory_agent().store(query, result["final_report"])
+        return result, memory_id
+
+    # RAG-only mode
+    rag_result = get_rag_agent(namespace, create=False).query_with_rag(query, max_tokens=max_tokens, debug=debug, filters=filters)
+    result = {
+        "final_report": rag_result["output"],
+        "rag_output": rag_result["output"],
+        "rag_debug": rag_result.get("debug", {})
+    }
+    return result, None
+
+DEBUG_KEYS = ["search_debug", "memory_debug", "rag_debug", "tool_debug", "analysis_debug", "generation_debug"]
+OUTPUT_KEYS = ["search_output", "memory_output", "rag_output", "tool_output", "analysis_output"]
+
+def _start_trace(debug: bool) -> Optional[str]:
+    """Trace id for a debug run, when traces are stored out of band"""
+    return new_trace_id() if debug and tracing_config.get("enabled", True) else None
+
+def _submit_trace(trace_id: str, query: str, mode: ResearchMode, result: Dict[str, Any], execution_time: float):
+    # Only references are copied here; serialization happens on the writer thread
+    get_trace_store().submit(trace_id, {
+        "trace_id": trace_id,
+        "query": query,
+        "mode": mode.value,
+        "created_at": time.time(),
+        "execution_time": execution_time,
+        "outputs": {key: result.get(key) for key in OUTPUT_KEYS},
+        "debug_info": {key: result[key] for key in DEBUG_KEYS if key in result},
+        "routing": routing_summary(result) if "route" in result else None
+    })
+
+def _build_response(query: str, mode: ResearchMode, debug: bool, result: Dict[str, Any],
+                    memory_id: Optional[str], execution_time: float, trace_id: Optional[str] = None) -> ResearchResponse:
+    response = ResearchResponse(
+        success=True,
+        query=query,
+        final_report=result["final_report"],
+        mode=mode.value,
+        execution_time=execution_time,
+        memory_id=memory_id,
+        cached=result.get("cache_hit", False),
+        routing=routing_summary(result) if "route" in result else None
+    )
+
+    # Debug runs are traced out of band when tracing is enabled
+    if debug and trace_id:
+        _submit_trace(trace_id, query, mode, result, execution_time)
+        response.trace_id = trace_id
+    elif debug:
+        response.search_output = result.get("search_output")
+        response.memory_output = result.get("memory_output")
+        response.rag_output = result.get("rag_output")
+        response.tool_output = result.get("tool_output")
+        response.analysis_output = result.get("analysis_output")
+
+        # Combine debug info
+        debug_info = {}
+        for key in DEBUG_KEYS:
+            if key in result:
+                debug_info[key] = result[key]
+        response.debug_info = debug_info
+    return response
+
 @router.post("/query", response_model=ResearchResponse)
-async def research_query(request: ResearchRequest):
+async def research_query(request: ResearchRequest, http_response: Response):
     """
     Execute a research query using the multi-agent system.
+
+    Debug runs return an X-Trace-Id header; fetch the per-agent prompts and
+    outputs from /research/traces/{trace_id}.
     """
     start_time = time.time()
+    trace_id = _start_trace(request.debug)
+    if trace_id:
+        http_response.headers["X-Trace-Id"] = trace_id
     
     try:
         logger.info(f"Starting research for query: {request.query}")
         
-        # Prepare workflow input
-        workflow_input = {
-            "query": request.query,
-            "debug": request.debug
-        }
-        
         # Run workflow in thread pool to avoid blocking
-        if request.mode == "full":
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                executor, 
-                research_workflow.invoke, 
-                workflow_input
-            )
-            
-            # Store in memory
-            memory_agent = MemoryAgent()
-            memory_id = memory_agent.store(request.query, result["final_report"])
-            
-        else:  # RAG-only mode
-            from agent.rag_agent import RAGAgent
-            rag_agent = RAGAgent()
-            rag_result = rag_agent.query_with_rag(
-                request.query, 
-                max_tokens=request.max_tokens,
-                debug=request.debug
-            )
-            
-            result = {
-                "final_report": rag_result["output"],
-                "rag_output": rag_result["output"],
-                "rag_debug": rag_result.get("debug", {})
-            }
-            memory_id = None
-        
-        execution_time = time.time() - start_time
-        
-        response = ResearchResponse(
-            success=True,
-            query=request.query,
-            final_report=result["final_report"],
-            mode=request.mode.value,
-            execution_time=execution_time,
-            memory_id=memory_id
+        loop = asyncio.get_event_loop()
+        result, memory_id = await loop.run_in_executor(
+            executor,
+            _execute,
+            request.query, request.mode, request.debug, request.max_tokens, request.namespace, request.filters
         )
         
-        # Add optional outputs if available
-        if request.debug:
-            response.search_output = result.get("search_output")
-            response.memory_output = result.get("memory_output")
-            response.rag_output = result.get("rag_output")
-            response.tool_output = result.get("tool_output")
-            response.analysis_output = result.get("analysis_output")
-            
-            # Combine debug info
-            debug_info = {}
-            for key in ["search_debug", "memory_debug", "rag_debug", "tool_debug", "analysis_debug", "generation_debug"]:
-                if key in result:
-                    debug_info[key] = result[key]
-            response.debug_info = debug_info
+        execution_time = time.time() - start_time
+        response = _build_response(request.query, request.mode, request.debug, result, memory_id, execution_time, trace_id)
         
         logger.info(f"Research completed in {execution_time:.2f}s")
         return response
         
+    except NamespaceNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
+        FAILURES.inc(component="research_api")
         logger.error(f"Research failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Research execution failed: {str(e)}"
         )
 
+def _stream_execute(query: str, mode: ResearchMode, debug: bool, max_tokens: Optional[int],
+                    namespace: str, filters: Optional[RetrievalFilters]) -> Iterator[Dict[str, Any]]:
+    """Like _execute, but yields workflow node events before the result event"""
+    if mode != ResearchMode.FULL:
+        result, memory_id = _execute(query, mode, debug, max_tokens, namespace, filters)
+        yield {"event": "result", "result": result, "memory_id": memory_id}
+        return
+
+    filters = filters.model_dump(exclude_none=True) if filters else None
+    for event in _workflow_events({"query": query, "debug": debug, "namespace": namespace, "filters": filters}):
+        if event["event"] == "result":
+            # Events may be shared with other requests, so copy before adding to them
+            event = {**event, "memory_id": get_memory_agent().store(query, event["result"]["final_report"])}
+        yield event
+
+_DONE = object()
+
+async def _iterate_in_thread(pool: ThreadPoolExecutor, iterator_fn, *args) -> AsyncIterator[Any]:
+    """Run a blocking iterator in the pool, yielding its items on the event loop"""
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for item in iterator_fn(*args):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    loop.run_in_executor(pool, produce)
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+def _node_payload(update: Dict[str, Any], inline_debug: bool) -> Dict[str, Any]:
+    # Debug details only go inline to clients that asked for them and are not traced
+    return {key: value for key, value in update.items()
+            if key != "nodes_run" and (inline_debug or not key.endswith("_debug"))}
+
+async def _research_events(request: ResearchRequest, trace_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Progress events of one research run, ready to send to a client.
+
+    node_start and node_error events are passed through. Each node event
+    carries the node's outputs and duration. The last event is the full
+    research response, or an error.
+    """
+    start_time = time.time()
+    logger.info(f"Starting streamed research for query: {request.query}")
+    try:
+        async for event in _iterate_in_thread(
+            executor, _stream_execute,
+            request.query, request.mode, request.debug, request.max_tokens, request.namespace, request.filters
+        ):
+            if event["event"] == "node":
+                yield {**{key: value for key, value in event.items() if key != "update"},
+                       "output": _node_payload(event["update"], request.debug and not trace_id)}
+            elif event["event"] == "result":
+                execution_time = time.time() - start_time
+                response = _build_response(request.query, request.mode, request.debug,
+                                           event["result"], event["memory_id"], execution_time, trace_id)
+                logger.info(f"Streamed research completed in {execution_time:.2f}s")
+                yield {"event": "result", **response.model_dump(mode="json")}
+            else:
+                yield event
+    except Exception as e:
+        FAILURES.inc(component="research_api")
+        logger.error(f"Streamed research failed: {str(e)}")
+        yield {"event": "error", "success": False, "error": str(e)}
+
+@router.post("/stream")
+async def research_stream(request: ResearchRequest):
+    """
+    Execute a research query, streaming one JSON line per workflow progress event.
+
+    Nodes report when they start and, once finished, their duration and
+    outputs, so clients can render each agent's result as soon as it is
+    ready. The last line is the full research response, or an error.
+    """
+    trace_id = _start_trace(request.debug)
+
+    async def stream():
+        async for event in _research_events(request, trace_id):
+            yield json.dumps(event, default=str) + "\n"
+
+    headers = {"X-Trace-Id": trace_id} if trace_id else None
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers=headers)
+
+@router.websocket("/ws")
+async def research_websocket(websocket: WebSocket):
+    """
+    Research over a WebSocket: send one research request as JSON, receive the
+    same progress events as /research/stream as JSON messages. The server
+    closes the connection after the result.
+    """
+    await websocket.accept()
+    try:
+        request = ResearchRequest.model_validate(await websocket.receive_json())
+    except (ValidationError, ValueError) as e:
+        await websocket.send_json({"event": "error", "success": False, "error": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    try:
+        async for event in _research_events(request, _start_trace(request.debug)):
+            await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        # The run finishes in the pool and is still stored in memory
+        logger.info(f"Client disconnected from streamed research: {request.query}")
+        return
+    await websocket.close()
+
+def _execute_in_scope(scope: BatchScope, query: str, mode: ResearchMode, debug: bool, max_tokens: Optional[int],
+                      namespace: str, filters: Optional[RetrievalFilters]):
+    # Batch LLM calls queue behind interactive ones when rate limited
+    with scope.activate(), llm_priority(Priority.BATCH):
+        return _execute(query, mode, debug, max_tokens, namespace, filters)
+
+@router.post("/batch")
+async def research_batch(request: BatchResearchRequest):
+    """
+    Research many queries at once, streaming one JSON line per query as it completes.
+
+    Queries run in parallel under the global LLM and tool concurrency caps.
+    Repeated queries run once, and tool lookups and retrievals are shared
+    across the batch. The last line summarizes the batch.
+    """
+    if len(request.queries) > batch_config.get("max_queries", 200):
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {batch_config.get('max_queries', 200)} queries")
+
+    start_time = time.time()
+    loop = asyncio.get_event_loop()
+    scope = BatchScope()
+
+    # Identical queries (after normalization) are researched once
+    groups: Dict[str, List[int]] = {}
+    for index, query in enumerate(request.queries):
+        groups.setdefault(normalize_query(query), []).append(index)
+    logger.info(f"Starting batch of {len(request.queries)} queries ({len(groups)} unique)")
+
+    async def run_one(indices: List[int]):
+        query = request.queries[indices[0]]
+        query_start = time.time()
+        try:
+            result, memory_id = await loop.run_in_executor(
+                batch_executor,
+                _execute_in_scope,
+                scope, query, request.mode, request.debug, request.max_tokens, request.namespace, request.filters
+            )
+            response = _build_response(query, request.mode, request.debug, result, memory_id,
+                                       time.time() - query_start, _start_trace(request.debug))
+            return indices, response.model_dump(mode="json")
+        except Exception as e:
+            FAILURES.inc(component="research_batch")
+            logger.error(f"Batch query failed: {query}: {str(e)}")
+            return indices, {"success": False, "query": query, "error": str(e)}
+
+    async def stream():
+        tasks = [asyncio.ensure_future(run_one(indices)) for indices in groups.values()]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, payload = await next_done
+                for index in indices:
+                    failed += not payload["success"]
+                    yield json.dumps({"index": index, **payload, "query": request.queries[index]}) + "\n"
+        finally:
+            # Client went away: drop queries that have not started yet
+            for task in tasks:
+                task.cancel()
+        execution_time = time.time() - start_time
+        logger.info(f"Batch of {len(request.queries)} queries completed in {execution_time:.2f}s")
+        yield json.dumps({
+            "done": True,
+            "total": len(request.queries),
+            "unique": len(groups),
+            "failed": failed,
+            "shared_lookups": len(scope),
+            "execution_time": execution_time
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    Debug trace of a research run: per-agent outputs, prompts and timings.
+    Other workers can serve it once the background writer has stored it,
+    normally milliseconds after the response.
+    """
+    trace = get_trace_store().get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found, expired or not written yet")
+    return trace
+
 @router.get("/health")
 async def health_check():
     """
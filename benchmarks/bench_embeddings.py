@@ -0,0 +1,107 @@
+"""Accuracy and throughput of the embedding backends.
+
+Embeds the same corpus with the reference HuggingFace (PyTorch) model and
+the ONNX Runtime backend in fp32 and int8, then reports:
+
+- accuracy: cosine similarity of every ONNX vector to its reference vector,
+  and how many of the reference top-k neighbours each query keeps
+- throughput: texts per second for batched ingestion-style embedding and
+  latency of single query embeddings
+
+Needs the real models (sentence-transformers, onnxruntime, optimum). Exits
+non-zero when a backend falls below --min-cosine or --min-recall, so it can
+gate switching embedding_backend to onnx.
+
+    python -m benchmarks.bench_embeddings --texts 2000 --threads 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.fakes import fake_text
+from benchmarks.bench_hot_paths import RESULTS_DIR, git_commit, summarize
+
+def corpus(size: int) -> List[str]:
+    # Varied lengths, like chunks of 50 to 250 words
+    return [fake_text(f"chunk {i}", 50 + (i * 37) % 200) for i in range(size)]
+
+def accuracy(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> Dict[str, float]:
+    cosine = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+    # Use the first texts as queries against the whole corpus
+    reference_top = np.argsort(-(reference[:queries] @ reference.T), axis=1)[:, 1:k + 1]
+    candidate_top = np.argsort(-(candidate[:queries] @ candidate.T), axis=1)[:, 1:k + 1]
+    recall = np.mean([len(set(r) & set(c)) / k for r, c in zip(reference_top, candidate_top)])
+    return {"cosine_mean": float(cosine.mean()), "cosine_min": float(cosine.min()), f"recall_at_{k}": float(recall)}
+
+def throughput(model, texts: List[str], queries: int) -> Dict[str, Any]:
+    model.embed_documents(texts[:8])  # warm up
+    start = time.perf_counter()
+    vectors = model.embed_documents(texts)
+    seconds = time.perf_counter() - start
+
+    samples = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        model.embed_query(text[:200])
+        samples.append(time.perf_counter() - start)
+    return {"vectors": np.asarray(vectors, dtype=np.float32), "texts_per_sec": len(texts) / seconds, "query": summarize(samples)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=1000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=100, help="Single-query latency samples and recall queries")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = all cores)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--cache-dir", default="./data/onnx_models")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/embeddings-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    from rag.vector_store import build_embedding_model
+    from rag.onnx_embeddings import OnnxEmbeddings
+
+    texts = corpus(args.texts)
+    backends = {
+        "huggingface": build_embedding_model({"embedding_model": args.model}),
+        "onnx_fp32": OnnxEmbeddings(args.model, cache_dir=args.cache_dir, quantize=False,
+                                    intra_op_threads=args.threads, batch_size=args.batch_size),
+        "onnx_int8": OnnxEmbeddings(args.model, cache_dir=args.cache_dir, quantize=True,
+                                    intra_op_threads=args.threads, batch_size=args.batch_size),
+    }
+
+    results, reference, failed = {}, None, False
+    for name, model in backends.items():
+        print(f"Embedding {len(texts)} texts with {name}...")
+        measured = throughput(model, texts, args.queries)
+        vectors = measured.pop("vectors")
+        if reference is None:
+            reference = vectors
+        else:
+            measured["accuracy"] = accuracy(reference, vectors, args.queries, args.k)
+            ok = (measured["accuracy"]["cosine_min"] >= args.min_cosine
+                  and measured["accuracy"][f"recall_at_{args.k}"] >= args.min_recall)
+            measured["accuracy"]["passed"] = ok
+            failed |= not ok
+        measured["speedup"] = measured["texts_per_sec"] / results["huggingface"]["texts_per_sec"] if results else 1.0
+        results[name] = measured
+        print(json.dumps(measured, indent=2))
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"embeddings-{commit[:8]}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": {"commit": commit, "args": vars(args)}, "results": results}, f, indent=2)
+    print(f"Results written to {output}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Offline benchmarks for the research workflow, ingestion and retrieval.
+
+Runs entirely against fake LLM, tool and embedding backends (see fakes.py),
+so it needs no API keys. Results are written as JSON; pass --compare with a
+previous result file to print the relative change of every metric.
+
+    python -m benchmarks.bench_hot_paths --suites workflow ingestion
+    python -m benchmarks.bench_hot_paths --suites retrieval --sizes 10000 100000
+    python -m benchmarks.bench_hot_paths --compare benchmarks/results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fakes import fake_backends, fake_text, FakeEmbeddings
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))] * 1000
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+def bench_workflow(args) -> Dict[str, Any]:
+    """Per-node and end-to-end latency of research_workflow"""
+    with fake_backends(llm_latency=args.llm_latency, tool_latency=args.tool_latency):
+        from workflow.research_flow import get_research_workflow
+        research_workflow = get_research_workflow()
+
+        node_samples: Dict[str, List[float]] = {}
+        totals = []
+        for i in range(args.iterations):
+            workflow_input = {"query": f"benchmark query {i}", "debug": args.debug}
+            start = last = time.perf_counter()
+            for update in research_workflow.stream(workflow_input, stream_mode="updates"):
+                now = time.perf_counter()
+                for node in update:
+                    node_samples.setdefault(node, []).append(now - last)
+                last = now
+            totals.append(time.perf_counter() - start)
+
+    return {
+        "end_to_end": summarize(totals),
+        "nodes": {node: summarize(samples) for node, samples in node_samples.items()},
+    }
+
+def bench_ingestion(args) -> Dict[str, Any]:
+    """Chunking and vector store insert throughput"""
+    with fake_backends(embedding_latency=args.embedding_latency):
+        from config.config_loader import config
+        from rag.document_processor import DocumentProcessor
+        from rag.vector_store import VectorStoreManager
+
+        processor = DocumentProcessor(
+            chunk_size=config["vector_store"]["chunk_size"],
+            chunk_overlap=config["vector_store"]["chunk_overlap"]
+        )
+        paragraphs = [fake_text(f"paragraph {i}", 120) + "." for i in range(args.paragraphs)]
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+            path = f.name
+
+        try:
+            start = time.perf_counter()
+            documents = processor.process_file(path)
+            chunk_seconds = time.perf_counter() - start
+        finally:
+            os.unlink(path)
+
+        store = VectorStoreManager(config["vector_store"])
+        start = time.perf_counter()
+        store.add_documents(documents)
+        insert_seconds = time.perf_counter() - start
+
+    return {
+        "chunks": len(documents),
+        "document_processor_chunks_per_sec": len(documents) / chunk_seconds if chunk_seconds else 0.0,
+        "vector_store_chunks_per_sec": len(documents) / insert_seconds if insert_seconds else 0.0,
+    }
+
+def _bulk_load(store, size: int, embeddings: FakeEmbeddings, batch_size: int = 5000):
+    """Insert synthetic chunks with precomputed embeddings"""
+    collection = store.vector_store._collection
+    for offset in range(0, size, batch_size):
+        ids = [f"synthetic_{i}" for i in range(offset, min(size, offset + batch_size))]
+        texts = [fake_text(chunk_id, 40) for chunk_id in ids]
+        collection.add(
+            ids=ids,
+            documents=texts,
+            embeddings=embeddings.embed_documents(texts),
+            metadatas=[{"source": f"synthetic_{int(i.split('_')[1]) % 100}"} for i in ids],
+        )
+
+def bench_retrieval(args) -> Dict[str, Any]:
+    """similarity_search latency at several corpus sizes"""
+    results = {}
+    for size in args.sizes:
+        with fake_backends(embedding_latency=args.embedding_latency):
+            from config.config_loader import config
+            from rag.vector_store import VectorStoreManager
+
+            store = VectorStoreManager(config["vector_store"])
+            start = time.perf_counter()
+            _bulk_load(store, size, FakeEmbeddings())
+            load_seconds = time.perf_counter() - start
+
+            samples = []
+            for i in range(args.queries):
+                query = fake_text(f"query {i}", 8)
+                start = time.perf_counter()
+                store.similarity_search(query, k=5, threshold=0.0)
+                samples.append(time.perf_counter() - start)
+
+        results[str(size)] = {"load_seconds": load_seconds, "search": summarize(samples)}
+    return results
+
+SUITES: Dict[str, Callable] = {
+    "workflow": bench_workflow,
+    "ingestion": bench_ingestion,
+    "retrieval": bench_retrieval,
+}
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+def compare(current: Dict[str, Any], baseline_path: str, threshold: float):
+    """Print metric deltas against a previous result file"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    regressions = 0
+    for name, value in sorted(flatten(current).items()):
+        if name not in baseline or not baseline[name]:
+            continue
+        change = (value - baseline[name]) / baseline[name]
+        # Throughput regresses when it drops, latency when it grows
+        worse = change < -threshold if name.endswith("_per_sec") else (change > threshold and name.endswith("_ms"))
+        regressions += worse
+        print(f"{'REGRESSION ' if worse else ''}{name}: {baseline[name]:.2f} -> {value:.2f} ({change:+.1%})")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--iterations", type=int, default=5, help="Workflow runs")
+    parser.add_argument("--debug", action="store_true", help="Run the workflow with debug=True")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Seconds per fake tool call")
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Seconds per fake embedding batch")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Paragraphs in the ingestion document")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50, help="Queries per retrieval size")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Previous result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suites:
+        print(f"Running {suite} benchmark...")
+        results[suite] = SUITES[suite](args)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit[:8]}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Deterministic stand-ins for the Groq LLM, external tools and the embedding model.
+
+Benchmarks and load tests install these so the real workflow, document
+processor and vector store can be exercised without API keys or network
+access. Every fake sleeps for a configurable latency and returns output that
+depends only on its input, so runs are repeatable.
+"""
+import hashlib
+import math
+import os
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, List
+from unittest import mock
+
+# Add src to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, "..", "src")
+sys.path.insert(0, src_dir)
+
+LOREM = (
+    "research evidence analysis model data results study method framework "
+    "education health policy learning system network performance trend "
+    "outcome survey benchmark review adoption risk impact quality source"
+).split()
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+def fake_text(seed: str, words: int) -> str:
+    """Deterministic pseudo-text derived from seed"""
+    digest = _digest(seed)
+    return " ".join(LOREM[digest[i % len(digest)] % len(LOREM)] for i in range(words))
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeChatModel:
+    """Replaces ChatGroq: sleeps for latency and echoes a deterministic reply"""
+
+    def __init__(self, latency: float = 0.0, output_words: int = 200):
+        self.latency = latency
+        self.output_words = output_words
+
+    def invoke(self, messages) -> FakeMessage:
+        prompt = messages[-1].content
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeMessage(fake_text(prompt, self.output_words))
+
+class FakeEmbeddings:
+    """Hash-seeded unit vectors with the same dimensionality as MiniLM"""
+
+    def __init__(self, dimension: int = 384, latency_per_batch: float = 0.0):
+        self.dimension = dimension
+        self.latency_per_batch = latency_per_batch
+
+    def _vector(self, text: str) -> List[float]:
+        digest = _digest(text)
+        values = [(digest[i % len(digest)] ^ (i * 31 % 256)) / 255.0 - 0.5 for i in range(self.dimension)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_per_batch:
+            time.sleep(self.latency_per_batch)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def make_fake_tool(name: str, latency: float):
+    def search(query: str) -> str:
+        if latency:
+            time.sleep(latency)
+        return f"{name} Results:\n{fake_text(name + query, 80)}"
+    return search
+
+@contextmanager
+def fake_backends(
+    llm_latency: float = 0.0,
+    tool_latency: float = 0.0,
+    embedding_latency: float = 0.0,
+    persist_directory: str = None
+) -> Iterator[str]:
+    """Patch the LLM, tools and embeddings with fakes for the duration of the block.
+
+    The vector store is redirected to persist_directory (a fresh temporary
+    directory by default), which is yielded to the caller.
+    """
+    from config.config_loader import config
+
+    with ExitStack() as stack:
+        if persist_directory is None:
+            persist_directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_store_"))
+
+        # The fake embeddings stand in for the in-process HuggingFace backend
+        stack.enter_context(mock.patch.dict(config["vector_store"], {
+            "persist_directory": persist_directory,
+            "embedding_backend": "huggingface",
+            "embedding_server": {"enabled": False},
+        }))
+        stack.enter_context(mock.patch.dict(config.setdefault("report_cache", {}), {"enabled": False}))
+
+        import tools.groq_llm
+        chat_model = FakeChatModel(latency=llm_latency)
+        stack.enter_context(mock.patch.object(tools.groq_llm, "get_groq_llm", lambda model=None: chat_model))
+        # Fake calls cost nothing, so Groq's rate limits do not apply
+        stack.enter_context(mock.patch.dict(tools.groq_llm.rate_config, {"enabled": False}))
+
+        import rag.vector_store
+        embeddings = FakeEmbeddings(latency_per_batch=embedding_latency)
+        stack.enter_context(mock.patch.object(rag.vector_store, "HuggingFaceEmbeddings", lambda **kwargs: embeddings))
+        # Models are shared per process; start from (and leave) an empty cache
+        stack.enter_context(mock.patch.dict(rag.vector_store._embedding_models, clear=True))
+
+        import agent.tool_agent
+        for name in ("search_wikipedia", "search_tavily", "search_arxiv"):
+            fake = make_fake_tool(name.replace("search_", "").title(), tool_latency)
+            stack.enter_context(mock.patch.object(agent.tool_agent, name, fake))
+
+        yield persist_directory
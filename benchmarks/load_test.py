@@ -0,0 +1,193 @@
+"""Open-loop load generator for the FastAPI service.
+
+Requests arrive as a Poisson process at each configured rate and are drawn
+from a weighted mix of full/rag_only research queries (optionally with debug)
+and document uploads. By default the app runs in-process with the fake LLM,
+tool and embedding backends from fakes.py; pass --url to target a server on
+localhost instead (start one with fakes via the `serve` subcommand).
+
+    python -m benchmarks.load_test run --rates 1 2 5 10 --duration 30
+    python -m benchmarks.load_test run --mix full=0.6,rag_only=0.3,upload=0.1 --debug-fraction 0.2
+    python -m benchmarks.load_test serve --port 8000 --llm-latency 0.5
+    python -m benchmarks.load_test run --url http://localhost:8000 --server-pid <pid>
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fakes import fake_backends, fake_text
+from benchmarks.bench_hot_paths import summarize
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, weight = part.split("=")
+        if kind not in ("full", "rag_only", "upload"):
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+def peak_rss_mb(server_pid: Optional[int]) -> float:
+    """Peak resident set size of the server (this process when in-process)"""
+    if server_pid:
+        with open(f"/proc/{server_pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.queries = [fake_text(f"topic {i}", 6) for i in range(args.distinct_queries)]
+        self.kinds = list(args.mix)
+        self.weights = [args.mix[kind] for kind in self.kinds]
+
+    def _next_request(self) -> Dict[str, Any]:
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        if kind == "upload":
+            return {"label": "upload"}
+        debug = self.random.random() < self.args.debug_fraction
+        return {
+            "label": f"{kind}{'+debug' if debug else ''}",
+            "payload": {"query": self.random.choice(self.queries), "mode": kind, "debug": debug},
+        }
+
+    async def _send(self, request: Dict[str, Any], samples: List[Dict[str, Any]]):
+        start = time.perf_counter()
+        try:
+            if request["label"] == "upload":
+                content = "\n\n".join(fake_text(f"upload {start} {i}", 120) + "." for i in range(20))
+                response = await self.client.post(
+                    "/api/v1/documents/upload",
+                    files={"files": ("load_test.txt", content.encode("utf-8"), "text/plain")},
+                )
+            else:
+                response = await self.client.post("/api/v1/research/query", json=request["payload"])
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        samples.append({"label": request["label"], "latency": time.perf_counter() - start, "ok": ok})
+
+    async def run_step(self, rate: float) -> Dict[str, Any]:
+        """Generate load at rate requests/second for the configured duration"""
+        samples: List[Dict[str, Any]] = []
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival - start < self.args.duration:
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+            tasks.append(asyncio.create_task(self._send(self._next_request(), samples)))
+            next_arrival += self.random.expovariate(rate)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        return self._report(rate, samples, elapsed)
+
+    def _report(self, rate: float, samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        def stats(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+            succeeded = [s["latency"] for s in group if s["ok"]]
+            return {
+                "requests": len(group),
+                "error_rate": 1 - len(succeeded) / len(group) if group else 0.0,
+                "throughput_per_sec": len(succeeded) / elapsed,
+                "latency": summarize(succeeded) if succeeded else {},
+            }
+        labels = sorted({s["label"] for s in samples})
+        return {
+            "offered_rate": rate,
+            "elapsed_seconds": elapsed,
+            "overall": stats(samples),
+            "by_kind": {label: stats([s for s in samples if s["label"] == label]) for label in labels},
+            "peak_rss_mb": peak_rss_mb(self.args.server_pid),
+        }
+
+def print_step(result: Dict[str, Any]):
+    overall = result["overall"]
+    latency = overall["latency"] or {"p50_ms": 0, "p95_ms": 0, "p99_ms": 0}
+    print(
+        f"rate {result['offered_rate']:>6.1f}/s | done {overall['throughput_per_sec']:>6.2f}/s | "
+        f"p50 {latency['p50_ms']:>8.1f}ms p95 {latency['p95_ms']:>8.1f}ms p99 {latency['p99_ms']:>8.1f}ms | "
+        f"errors {overall['error_rate']:>6.1%} | peak RSS {result['peak_rss_mb']:.0f}MB"
+    )
+
+async def run_load(args) -> List[Dict[str, Any]]:
+    backends = nullcontext() if args.url else fake_backends(
+        llm_latency=args.llm_latency,
+        tool_latency=args.tool_latency,
+        embedding_latency=args.embedding_latency,
+    )
+    with backends:
+        if args.url:
+            transport = None
+            base_url = args.url
+        else:
+            from api.main import app
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://load-test"
+
+        results = []
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+            generator = LoadGenerator(client, args)
+            for rate in args.rates:
+                result = await generator.run_step(rate)
+                print_step(result)
+                results.append(result)
+        return results
+
+def serve(args):
+    """Run the API on localhost with fake backends installed"""
+    import uvicorn
+    with fake_backends(llm_latency=args.llm_latency, tool_latency=args.tool_latency, embedding_latency=args.embedding_latency):
+        from api.main import app
+        uvicorn.run(app, host="127.0.0.1", port=args.port, workers=1, log_level="warning")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_backend_args(sub):
+        sub.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per fake LLM call")
+        sub.add_argument("--tool-latency", type=float, default=0.1, help="Seconds per fake tool call")
+        sub.add_argument("--embedding-latency", type=float, default=0.01, help="Seconds per fake embedding batch")
+
+    run_parser = subparsers.add_parser("run", help="Generate load")
+    add_backend_args(run_parser)
+    run_parser.add_argument("--url", help="Target server, e.g. http://localhost:8000 (default: in-process)")
+    run_parser.add_argument("--server-pid", type=int, help="PID of the target server for peak RSS")
+    run_parser.add_argument("--rates", type=float, nargs="+", default=[1, 2, 5], help="Arrival rates (req/s), one step each")
+    run_parser.add_argument("--duration", type=float, default=20, help="Seconds per rate step")
+    run_parser.add_argument("--mix", type=parse_mix, default=parse_mix("full=0.6,rag_only=0.3,upload=0.1"))
+    run_parser.add_argument("--debug-fraction", type=float, default=0.1, help="Share of queries sent with debug=true")
+    run_parser.add_argument("--distinct-queries", type=int, default=50, help="Size of the query pool")
+    run_parser.add_argument("--timeout", type=float, default=120)
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--output", help="Write step results as JSON")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the API with fake backends")
+    add_backend_args(serve_parser)
+    serve_parser.add_argument("--port", type=int, default=8000)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+        return
+
+    results = asyncio.run(run_load(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items()}, "steps": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,30 @@
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.decorators import timed
+from utils.metrics import AGENT_RUN_SECONDS, FAILURES
 import time
 logger = setup_logger("AnalysisAgent")
 
+FAILURE_OUTPUT = "AnalysisAgent failed"
+
 class AnalysisAgent:
     def __init__(self):
-        self.prompt_template=  load_prompt("analysis_prompt.txt")
+        self.prompt_template=  get_prompt_template("analysis_prompt.txt")
 
+    @timed(AGENT_RUN_SECONDS, agent="AnalysisAgent")
     def run(self,search_output:str, debug:bool=False)->dict:
         start = time.time()
-        logger.info("Analysing search output: %s",search_output)
-        prompt = self.prompt_template.replace("{{input}}",search_output.strip())
+        logger.info("Analysing %d characters of combined input", len(search_output))
+        logger.debug("Analysis input: %s", search_output)
+        prompt = self.prompt_template.render(input=search_output.strip())
         try:
             result = run_llm_prompt(prompt)
             logger.info("Analysis result,%d characters",len(result))
         except Exception as e:
             logger.error("Analysis Agent failed:%s",str(e))
-            result = "AnalysisAgent failed"
+            FAILURES.inc(component="AnalysisAgent")
+            result = FAILURE_OUTPUT
         elapsed = time.time() - start
         logger.warning("⏱️ AnalysisAgent completed in %.2f seconds", elapsed)
         return {
@@ -1,22 +1,29 @@
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.decorators import timed
+from utils.metrics import AGENT_RUN_SECONDS, FAILURES
 import time
 logger = setup_logger("GenerationAgent")
+
+FAILURE_OUTPUT = "GenerationAgent failed"
 class GenerationAgent:
     def __init__(self):
-        self.prompt_template = load_prompt("generation_prompt.txt")
+        self.prompt_template = get_prompt_template("generation_prompt.txt")
 
+    @timed(AGENT_RUN_SECONDS, agent="GenerationAgent")
     def run(self, analysis_output:str, debug:bool=False)-> dict:
         start = time.time()
-        logger.info("Generation Agent output %s",analysis_output)
-        prompt = self.prompt_template.replace("{{input}}", analysis_output.strip())
+        logger.info("Generating report from %d characters of analysis", len(analysis_output))
+        logger.debug("Generation input: %s", analysis_output)
+        prompt = self.prompt_template.render(input=analysis_output.strip())
         try:
             result = run_llm_prompt(prompt)
             logger.info("Generation Agent result, %d characters",len(result))
         except Exception as e:
             logger.error("GenerationAgent failed %s",str(e))
-            result=("GenerationAgent failed")
+            FAILURES.inc(component="GenerationAgent")
+            result=FAILURE_OUTPUT
         elapsed = time.time() - start
         logger.warning("⏱️ GenerationAgent completed in %.2f seconds", elapsed)
         return {
@@ -1,54 +1,86 @@
-from typing import Dict,List
+from typing import Dict,List,Optional
+from itertools import islice
 import uuid
 import datetime
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.decorators import timed
+from utils.metrics import AGENT_RUN_SECONDS, FAILURES
+from utils.compression import compress_text, decompress_text
+from config.config_loader import config
 import time
 
 logger = setup_logger("MemoryAgent")
 
+memory_config = config.get("memory", {})
+
+FAILURE_OUTPUT = "No previous research context available."
+
 class MemoryAgent:
     def __init__(self):
+        # Reports are kept compressed; listings only need the query and preview
         self.memory: Dict[str, Dict]= {}
-        self.prompt_template = load_prompt("memory_agent_prompt.txt")
+        self.codec = memory_config.get("compression", "zlib")
+        self.preview_chars = memory_config.get("preview_chars", 200)
+        self.prompt_template = get_prompt_template("memory_agent_prompt.txt")
 
     def store(self,query:str,final_report:str)->str:
         entry_id = str(uuid.uuid4())
+        preview = final_report[:self.preview_chars]
         self.memory[entry_id]={
             "query":query,
-            "final_report":final_report,
+            "report":compress_text(final_report, self.codec),
+            "preview":preview + "..." if len(final_report) > self.preview_chars else preview,
             "timestamp":datetime.datetime.now().isoformat()
         }
         return entry_id
     
     def get_all(self)->List[Dict]:
-        return[
-            {"id": k, **v} for k, v in sorted(self.memory.items(), key=lambda item: item[1]['timestamp'], reverse=True)
-        ]
-    def by_get_id(self,entry_id:str)->Dict:
-        return self.memory.get(entry_id,None)
+        """Entry summaries (id, query, timestamp, preview), newest first"""
+        return [self._summary(k, self.memory[k]) for k in reversed(list(self.memory))]
+
+    def get_recent(self, limit: int = 5) -> List[Dict]:
+        """Most recent entries including their full reports"""
+        return [self.get_by_id(entry_id) for entry_id in islice(reversed(self.memory), limit)]
+
+    def recent_queries(self, limit: int = 5) -> List[str]:
+        """Queries of the most recent entries, newest first, in O(limit)"""
+        return [self.memory[entry_id]["query"] for entry_id in islice(reversed(self.memory), limit)]
+
+    def get_by_id(self,entry_id:str)->Optional[Dict]:
+        entry = self.memory.get(entry_id)
+        if entry is None:
+            return None
+        return {**self._summary(entry_id, entry), "final_report": decompress_text(entry["report"])}
+
+    def clear(self):
+        self.memory.clear()
+
+    def _summary(self, entry_id: str, entry: Dict) -> Dict:
+        return {"id": entry_id, "query": entry["query"], "timestamp": entry["timestamp"], "preview": entry["preview"]}
     
+    @timed(AGENT_RUN_SECONDS, agent="MemoryAgent")
     def analyze_context(self, current_query: str, debug :bool= False) -> dict:
         """Analyze current query against historical context using LLM"""
         start= time.time()
         logger.info("Analyzing context for query: %s", current_query)
         # Get recent history (last 5 entries)
-        recent_history = self.get_all()[:5]
+        recent_history = self.get_recent(5)
         
         # Format history for prompt
         history_text = self._format_history(recent_history)
         
         # Apply prompt template
-        prompt_input = self.prompt_template.replace("{{query}}", current_query)
-        prompt_input = prompt_input.replace("{{history}}", history_text)
+        prompt_input = self.prompt_template.render(query=current_query, history=history_text)
         
         try:
             result = run_llm_prompt(prompt_input)
             logger.info("Memory analysis result: %d characters", len(result))
         except Exception as e:
             logger.error("Memory Agent failed: %s", str(e))
-            result = "No previous research context available."
+            FAILURES.inc(component="MemoryAgent")
+            result = FAILURE_OUTPUT
         
         elapsed = time.time() - start
         logger.warning("⏱️ MemoryAgent completed in %.2f seconds", elapsed)
@@ -1,41 +1,64 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from rag.vector_store import VectorStoreManager
+from rag.namespaces import DEFAULT_NAMESPACE
+from rag.filters import filters_key
 from rag.document_processor import DocumentProcessor
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from tools.rate_limiter import Priority, llm_priority
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.format_utils import normalize_query
+from utils.single_flight import SingleFlight
+from utils.batch_scope import batch_memo
+from utils.decorators import timed
+from utils.metrics import AGENT_RUN_SECONDS, CACHE_HITS, CACHE_MISSES, FAILURES
 from config.config_loader import config
+import logging
 import time
 
 logger = setup_logger("RAGAgent")
 
+# Shared across instances so concurrent identical RAG queries run once
+_rag_flight = SingleFlight()
+
 class RAGAgent:
-    def __init__(self):
-        self.vector_store = VectorStoreManager(config["vector_store"])
+    def __init__(self, namespace: str = DEFAULT_NAMESPACE):
+        self.namespace = namespace
+        self.vector_store = VectorStoreManager(config["vector_store"], namespace=namespace)
         self.document_processor = DocumentProcessor(
             chunk_size=config["vector_store"]["chunk_size"],
             chunk_overlap=config["vector_store"]["chunk_overlap"]
         )
-        self.rag_prompt_template = load_prompt("rag_prompt.txt")
+        self.rag_prompt_template = get_prompt_template("rag_prompt.txt")
     
-    def ingest_documents(self, file_paths: List[str]) -> Dict[str, Any]:
-        """Ingest documents into the vector store"""
+    def ingest_documents(self, file_paths: List[str], sources: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Ingest documents into the vector store.
+
+        sources names each file as users know it (e.g. the uploaded file name
+        instead of its temporary path); it is stored as the chunks' source
+        and used by source filters. LLM calls made while ingesting yield to
+        interactive and batch queries.
+        """
+        with llm_priority(Priority.INGESTION):
+            return self._ingest_documents(file_paths, sources)
+
+    def _ingest_documents(self, file_paths: List[str], sources: Optional[List[str]]) -> Dict[str, Any]:
         try:
             all_documents = []
             processed_files = []
             failed_files = []
             
-            for file_path in file_paths:
-                logger.info(f"Processing file: {file_path}")
-                documents = self.document_processor.process_file(file_path)
+            for file_path, source in zip(file_paths, sources or file_paths):
+                logger.info(f"Processing file: {source}")
+                documents = self.document_processor.process_file(file_path, source=source)
                 
                 if documents:
                     all_documents.extend(documents)
-                    processed_files.append(file_path)
-                    logger.info(f"Processed {len(documents)} chunks from {file_path}")
+                    processed_files.append(source)
+                    logger.info(f"Processed {len(documents)} chunks from {source}")
                 else:
-                    failed_files.append(file_path)
-                    logger.warning(f"Failed to process {file_path}")
+                    failed_files.append(source)
+                    logger.warning(f"Failed to process {source}")
             
             # Add to vector store
             if all_documents:
@@ -64,7 +87,11 @@ class RAGAgent:
             }
     
     def ingest_urls(self, urls: List[str]) -> Dict[str, Any]:
-        """Ingest web content into the vector store"""
+        """Ingest web content into the vector store, at ingestion LLM priority"""
+        with llm_priority(Priority.INGESTION):
+            return self._ingest_urls(urls)
+
+    def _ingest_urls(self, urls: List[str]) -> Dict[str, Any]:
         try:
             all_documents = []
             processed_urls = []
@@ -104,14 +131,27 @@ class RAGAgent:
                 "failed_urls": urls
             }
     
-    def query_with_rag(self, query: str, debug: bool = False) -> Dict[str, Any]:
-        """Query using RAG (Retrieval-Augmented Generation)"""
+    @timed(AGENT_RUN_SECONDS, agent="RAGAgent")
+    def query_with_rag(self, query: str, debug: bool = False, max_tokens: Optional[int] = None,
+                       filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Query using RAG (Retrieval-Augmented Generation), optionally restricted by metadata filters"""
+        if max_tokens is None:
+            max_tokens = config["vector_store"]["retrieval"].get("max_context_tokens", 4000)
+        key = (self.vector_store.collection_name, normalize_query(query), max_tokens, debug, filters_key(filters))
+        result, shared = _rag_flight.do(key, self._query_with_rag, query, debug, max_tokens, filters)
+        if shared:
+            CACHE_HITS.inc(cache="rag_single_flight")
+            logger.info("Joined in-flight RAG query: %s", query)
+        else:
+            CACHE_MISSES.inc(cache="rag_single_flight")
+        return result
+
+    def _query_with_rag(self, query: str, debug: bool, max_tokens: int, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         start = time.time()
         
         try:
-            # First, check if we have any documents
-            stats = self.vector_store.get_stats()
-            total_docs = stats.get("total_documents", 0)
+            # First, check if we have any documents (a count, not the full stats)
+            total_docs = self.vector_store.count()
             
             if total_docs == 0:
                 logger.warning("No documents in vector store")
@@ -120,20 +160,20 @@ class RAGAgent:
             logger.info(f"Querying vector store with {total_docs} documents")
             
             # Get relevant context from vector store
-            context = self.vector_store.get_relevant_context(
-                query, 
-                max_tokens=config["vector_store"]["retrieval"].get("max_context_tokens", 4000)
+            context = batch_memo(
+                "retrieval", (self.vector_store.collection_name, normalize_query(query), max_tokens, filters_key(filters)),
+                self.vector_store.get_relevant_context, query, max_tokens=max_tokens, filters=filters
             )
             
             if not context:
                 logger.warning("No relevant context found in vector store")
-                # Try a test retrieval to see what's available
-                test_result = self.vector_store.test_retrieval(query)
-                logger.info(f"Test retrieval result: {test_result}")
+                # Try a test retrieval to see what's available (a second search, so debug logging only)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Test retrieval result: %s", self.vector_store.test_retrieval(query))
                 return self._fallback_response(query, debug, error="No relevant context found")
             
             # Generate response with context
-            prompt = self.rag_prompt_template.replace("{{context}}", context).replace("{{query}}", query)
+            prompt = self.rag_prompt_template.render(context=context, query=query)
             
             response = run_llm_prompt(prompt)
             
@@ -152,12 +192,13 @@ class RAGAgent:
                     "output": response,
                     "elapsed_time": elapsed,
                     "total_docs_in_store": total_docs,
-                    "vector_store_stats": stats
+                    "collection_name": self.vector_store.collection_name
                 } if debug else {}
             }
             
         except Exception as e:
             logger.error(f"RAG query failed: {str(e)}")
+            FAILURES.inc(component="RAGAgent")
             return self._fallback_response(query, debug, error=str(e))
     
     def _fallback_response(self, query: str, debug: bool = False, error: str = None) -> Dict[str, Any]:
@@ -182,12 +223,13 @@ class RAGAgent:
                     "error": error,
                     "prompt": fallback_prompt,
                     "output": response,
-                    "vector_store_stats": self.vector_store.get_stats()
+                    "collection_name": self.vector_store.collection_name
                 } if debug else {}
             }
             
         except Exception as e:
             logger.error(f"Fallback response failed: {str(e)}")
+            FAILURES.inc(component="RAGAgent")
             return {
                 "output": "I apologize, but I'm unable to provide a response at this time.",
                 "context_used": False,
@@ -197,7 +239,7 @@ class RAGAgent:
                     "query": query,
                     "fallback": True,
                     "error": str(e),
-                    "vector_store_stats": self.vector_store.get_stats()
+                    "collection_name": self.vector_store.collection_name
                 } if debug else {}
             }
     
@@ -209,6 +251,10 @@ class RAGAgent:
         """Test retrieval functionality"""
         return self.vector_store.test_retrieval(query)
     
+    def compact_vector_store(self) -> Dict[str, Any]:
+        """Rebuild the namespace's collections without deleted entries"""
+        return self.vector_store.compact()
+    
     def clear_vector_store(self) -> bool:
         """Clear all documents from vector store"""
         return self.vector_store.clear_all()
\ No newline at end of file
@@ -1,23 +1,29 @@
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.decorators import timed
+from utils.metrics import AGENT_RUN_SECONDS, FAILURES
 import time
 logger = setup_logger("SearchAgent")
 
+FAILURE_OUTPUT = "SearchAgent failed."
+
 class SearchAgent:
     def __init__(self):
-        self.prompt_template = load_prompt("search_prompt.txt")
+        self.prompt_template = get_prompt_template("search_prompt.txt")
     
+    @timed(AGENT_RUN_SECONDS, agent="SearchAgent")
     def run(self,query:str, debug:bool= False)-> dict:
         start = time.time()
         logger.info("Running search for query: %s", query)
-        prompt= self.prompt_template.replace("{{input}}", query.strip())
+        prompt= self.prompt_template.render(input=query.strip())
         try:
             result= run_llm_prompt(prompt)
             logger.info("Search result received, %d characters", len(result))
         except Exception as e:
             logger.error("SearchAgent failed: %s", str(e))
-            result = "SearchAgent failed."
+            FAILURES.inc(component="SearchAgent")
+            result = FAILURE_OUTPUT
         elapsed = time.time() - start
         logger.warning("⏱️ SearchAgent completed in %.2f seconds", elapsed)
         return {
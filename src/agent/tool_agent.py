@@ -3,30 +3,46 @@ from tools.wikipedia_tool import search_wikipedia
 from tools.tavily_tool import search_tavily
 from config.config_loader import config
 from tools.groq_llm import run_llm_prompt
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import get_prompt_template
 from utils.logger import setup_logger
+from utils.decorators import timed
+from utils.batch_scope import batch_memo
+from utils.format_utils import normalize_query
+from utils.metrics import AGENT_RUN_SECONDS, FAILURES
+from typing import Callable, List, Optional
+import threading
 import time
 
 logger = setup_logger("ToolAgent")
 
+FAILURE_OUTPUT = "Tool Agent failed"
+
+# Global cap on concurrent external tool requests
+_tool_slots = threading.BoundedSemaphore(config["tools"].get("max_concurrency", 8))
+
+def _limited(search: Callable[[str], str], query: str) -> str:
+    with _tool_slots:
+        return search(query)
+
 class ToolAgent:
     def __init__(self):
-        self.prompt_template = load_prompt("tool_agent_prompt.txt")
+        self.prompt_template = get_prompt_template("tool_agent_prompt.txt")
 
-    def run(self, query: str,debug:bool=False) -> dict:
+    @timed(AGENT_RUN_SECONDS, agent="ToolAgent")
+    def run(self, query: str,debug:bool=False, tools: Optional[List[str]] = None) -> dict:
         start = time.time()
         logger.info("running tool agent: %s",query)
         #raw results
-        raw_results = self._gather_raw_data(query)
+        raw_results = self._gather_raw_data(query, tools)
         # Process with LLM using the prompt template
-        prompt_input = self.prompt_template.replace("{{input}}", query)
-        prompt_input = prompt_input.replace("{{raw_data}}", raw_results)
+        prompt_input = self.prompt_template.render(input=query, raw_data=raw_results)
         try:
             result = run_llm_prompt(prompt_input)
             logger.info("Tool agent result: %d characters", len(result))
         except Exception as e:
             logger.error("Tool Agent failed: %s", str(e))
-            result = "Tool Agent failed"
+            FAILURES.inc(component="ToolAgent")
+            result = FAILURE_OUTPUT
         
         elapsed = time.time() - start
         logger.warning("⏱️ ToolAgent completed in %.2f seconds", elapsed)
@@ -41,19 +57,26 @@ class ToolAgent:
             } if debug else {}
         }
         
-    def _gather_raw_data(self, query: str) -> str:
+    def _gather_raw_data(self, query: str, tools: Optional[List[str]] = None) -> str:
+        """Query the enabled tools, restricted to tools when given"""
         results = []
+        def use(name: str) -> bool:
+            return config["tools"].get(f"enable_{name}", True) and (tools is None or name in tools)
         
-        if config["tools"].get("enable_wikipedia", True):
-            wiki_results = search_wikipedia(query)
+        if use("wikipedia"):
+            wiki_results = self._lookup("wikipedia", search_wikipedia, query)
             results.append(f"WIKIPEDIA RESULTS:\n{wiki_results}")
         
-        if config["tools"].get("enable_tavily", True):
-            tavily_results = search_tavily(query)
+        if use("tavily"):
+            tavily_results = self._lookup("tavily", search_tavily, query)
             results.append(f"TAVILY RESULTS:\n{tavily_results}")
         
-        if config["tools"].get("enable_arxiv", True):
-            arxiv_results = search_arxiv(query)
+        if use("arxiv"):
+            arxiv_results = self._lookup("arxiv", search_arxiv, query)
             results.append(f"ARXIV RESULTS:\n{arxiv_results}")
         
-        return "\n\n".join(results)
\ No newline at end of file
+        return "\n\n".join(results)
+
+    def _lookup(self, name: str, search: Callable[[str], str], query: str) -> str:
+        # Shared across a batch request, so overlapping topics are looked up once
+        return batch_memo(f"tool:{name}", normalize_query(query), _limited, search, query)
@@ -1,8 +1,18 @@
 import yaml
 import os
 
-def load_config(path="src/config/config.yaml"):
+# Resolved relative to this file so imports work from any working directory;
+# RESEARCH_CONFIG points at an alternative file.
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def resolve_path(path: str) -> str:
+    """Resolve a relative path from the config against the project root, not the CWD"""
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(PROJECT_ROOT, path))
+
+def load_config(path=None):
+    path = path or os.getenv("RESEARCH_CONFIG", DEFAULT_CONFIG_PATH)
     with open(path, "r") as f:
         return yaml.safe_load(f)
 
-config = load_config()
\ No newline at end of file
+config = load_config()
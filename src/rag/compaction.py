@@ -0,0 +1,175 @@
+"""Fragmentation statistics for Chroma's on-disk files.
+
+Chroma keeps metadata and text in one SQLite file (chroma.sqlite3) and
+each collection's vectors in an HNSW index directory named after its
+vector segment id. Deleting chunks removes their rows, but the HNSW index
+only marks the elements as deleted, and SQLite keeps freed pages, so both
+grow with churn until the collection is rebuilt and the file vacuumed.
+"""
+import json
+import os
+import sqlite3
+import struct
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger("VectorCompaction")
+
+SQLITE_FILE = "chroma.sqlite3"
+HNSW_HEADER = "header.bin"
+POINTER_SUFFIX = "collection"
+RETIRED_SUFFIX = "retired"
+
+# hnswlib header: offsetLevel0, max_elements, cur_element_count (size_t each)
+_HNSW_COUNTS = struct.Struct("<QQQ")
+
+def hnsw_element_count(segment_dir: str) -> Optional[int]:
+    """Elements stored in a persisted HNSW index, deleted ones included"""
+    try:
+        with open(os.path.join(segment_dir, HNSW_HEADER), "rb") as f:
+            _, _, count = _HNSW_COUNTS.unpack(f.read(_HNSW_COUNTS.size))
+        return count
+    except (OSError, struct.error):
+        # Not flushed yet: Chroma buffers small collections before building HNSW
+        return None
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # Read-only, so stats never contend with Chroma's writers
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+def sqlite_stats(db_path: str) -> Dict[str, int]:
+    """File size and bytes held by free pages (reclaimable with VACUUM)"""
+    connection = _connect(db_path)
+    try:
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        connection.close()
+    return {"bytes": os.path.getsize(db_path), "free_bytes": page_size * free_pages}
+
+def vector_segments(db_path: str, collection_ids: List[str]) -> Dict[str, List[str]]:
+    """Vector segment ids (HNSW directory names) of each collection"""
+    segments: Dict[str, List[str]] = {collection_id: [] for collection_id in collection_ids}
+    connection = _connect(db_path)
+    try:
+        rows = connection.execute("SELECT id, collection FROM segments WHERE scope = 'VECTOR'").fetchall()
+    finally:
+        connection.close()
+    for segment_id, collection_id in rows:
+        if collection_id in segments:
+            segments[collection_id].append(segment_id)
+    return segments
+
+def fragmentation_stats(persist_directory: str, collections: List[Tuple[str, int]],
+                        dead_ratio_threshold: float = 0.2) -> Dict[str, Any]:
+    """Live vs dead index entries and on-disk bytes for (collection_id, live_count) pairs.
+
+    Dead entries are HNSW elements with no live row. Rows still buffered
+    before their first HNSW flush are not counted as elements, so the
+    figure is a lower bound.
+    """
+    db_path = os.path.join(persist_directory, SQLITE_FILE)
+    live = sum(count for _, count in collections)
+    stats = {"live_entries": live, "index_entries": 0, "dead_entries": 0, "dead_ratio": 0.0,
+             "index_bytes": 0, "sqlite_bytes": 0, "sqlite_free_bytes": 0, "compaction_recommended": False}
+    if not os.path.exists(db_path):
+        return stats
+
+    segments = vector_segments(db_path, [collection_id for collection_id, _ in collections])
+    for collection_id, count in collections:
+        for segment_id in segments[collection_id]:
+            segment_dir = os.path.join(persist_directory, segment_id)
+            elements = hnsw_element_count(segment_dir)
+            stats["index_bytes"] += directory_bytes(segment_dir)
+            if elements is not None:
+                stats["index_entries"] += elements
+                stats["dead_entries"] += max(0, elements - count)
+
+    sqlite = sqlite_stats(db_path)
+    stats["sqlite_bytes"] = sqlite["bytes"]
+    stats["sqlite_free_bytes"] = sqlite["free_bytes"]
+    total = live + stats["dead_entries"]
+    stats["dead_ratio"] = stats["dead_entries"] / total if total else 0.0
+    stats["compaction_recommended"] = stats["dead_ratio"] >= dead_ratio_threshold
+    return stats
+
+def _pointer_path(persist_directory: str, name: str) -> str:
+    return os.path.join(persist_directory, f"{name}.{POINTER_SUFFIX}")
+
+def collection_pointer(persist_directory: str, name: str) -> str:
+    """Chroma collection currently serving the shard called name.
+
+    Compaction builds a shard's replacement under a new collection name and
+    then swaps this pointer file, so the shard name always resolves to a
+    complete collection. Shards never compacted have no pointer and use
+    their own name.
+    """
+    try:
+        with open(_pointer_path(persist_directory, name), "r") as f:
+            return f.read().strip() or name
+    except FileNotFoundError:
+        return name
+
+def _write_atomically(path: str, text: str):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def write_collection_pointer(persist_directory: str, name: str, collection: str):
+    """Point the shard called name at collection, atomically"""
+    _write_atomically(_pointer_path(persist_directory, name), collection)
+
+def _retired_path(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"{collection_name}.{RETIRED_SUFFIX}")
+
+def load_retired(persist_directory: str, collection_name: str) -> Dict[str, float]:
+    """Collections compaction replaced in a namespace, with the time each was retired"""
+    try:
+        with open(_retired_path(persist_directory, collection_name), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_retired(persist_directory: str, collection_name: str, retired: Dict[str, float]):
+    _write_atomically(_retired_path(persist_directory, collection_name), json.dumps(retired))
+
+# VACUUM locks the whole SQLite file, which every namespace shares
+_vacuum_lock = threading.Lock()
+
+def vacuum_sqlite(persist_directory: str) -> int:
+    """VACUUM Chroma's SQLite file, returns the bytes reclaimed.
+
+    Reads and writes of every namespace wait while it runs, so run it off
+    peak; vacuums in one process run one at a time.
+    """
+    db_path = os.path.join(persist_directory, SQLITE_FILE)
+    with _vacuum_lock:
+        before = os.path.getsize(db_path)
+        connection = sqlite3.connect(db_path, timeout=60)
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+        reclaimed = before - os.path.getsize(db_path)
+    logger.info(f"Vacuumed {db_path}, reclaimed {reclaimed} bytes")
+    return reclaimed
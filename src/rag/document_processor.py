@@ -1,32 +1,34 @@
 import os
 import hashlib
-from typing import List, Dict, Any
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
 from pathlib import Path
-import tiktoken
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 import PyPDF2
 import docx
 from bs4 import BeautifulSoup
 import requests
 from utils.logger import setup_logger
+from utils.tokens import get_encoding
+from rag.token_chunker import TokenChunker
 
 logger = setup_logger("DocumentProcessor")
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 180, chunk_overlap: int = 40):
+        # Sizes are in tokens
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.chunker = TokenChunker(chunk_tokens=chunk_size, overlap_tokens=chunk_overlap)
+
+    @property
+    def encoding(self):
+        """cl100k_base encoding, loaded on first use"""
+        return get_encoding()
     
-    def process_file(self, file_path: str) -> List[Document]:
-        """Process a single file and return chunks"""
+    def process_file(self, file_path: str, source: Optional[str] = None) -> List[Document]:
+        """Process a single file and return chunks; source (default file_path) is stored as their source"""
         try:
             extension = Path(file_path).suffix.lower()
             
@@ -39,7 +41,7 @@ class DocumentProcessor:
             else:
                 raise ValueError(f"Unsupported file type: {extension}")
             
-            return self._chunk_text(text, file_path)
+            return self._chunk_text(text, source or file_path, file_type=extension.lstrip('.'))
             
         except Exception as e:
             logger.error(f"Failed to process {file_path}: {str(e)}")
@@ -58,7 +60,7 @@ class DocumentProcessor:
                 script.decompose()
             
             text = soup.get_text()
-            return self._chunk_text(text, url)
+            return self._chunk_text(text, url, file_type="url")
             
         except Exception as e:
             logger.error(f"Failed to process URL {url}: {str(e)}")
@@ -83,23 +85,31 @@ class DocumentProcessor:
         with open(file_path, 'r', encoding='utf-8') as file:
             return file.read()
     
-    def _chunk_text(self, text: str, source: str) -> List[Document]:
+    def _chunk_text(self, text: str, source: str, file_type: str = "txt") -> List[Document]:
         """Split text into chunks"""
         # Clean the text
         text = self._clean_text(text)
         
-        # Split into chunks
-        chunks = self.text_splitter.split_text(text)
-        
+        # Filterable at retrieval time (see VectorStoreManager.similarity_search)
+        ingested_at = time.time()
+        ingest_date = datetime.fromtimestamp(ingested_at, tz=timezone.utc).isoformat()
+
+        # Split into chunks: one tokenization, chunks are slices of the text
         documents = []
-        for i, chunk in enumerate(chunks):
+        for i, (start, end, token_count) in enumerate(self.chunker.split(text)):
+            chunk = text[start:end]
             doc = Document(
                 page_content=chunk,
                 metadata={
                     "source": source,
+                    "file_type": file_type,
+                    "ingested_at": ingested_at,
+                    "ingest_date": ingest_date,
                     "chunk_id": i,
                     "chunk_size": len(chunk),
-                    "token_count": len(self.encoding.encode(chunk)),
+                    "token_count": token_count,
+                    "start_offset": start,
+                    "end_offset": end,
                     "content_hash": hashlib.md5(chunk.encode()).hexdigest()
                 }
             )
@@ -0,0 +1,229 @@
+"""Shared embedding model served over a Unix socket.
+
+Every API worker otherwise loads its own copy of the sentence-transformer.
+With the server enabled (vector_store.embedding_server.enabled) workers send
+texts to one process instead, which merges concurrent requests from all
+workers into micro-batches and runs a single forward pass per batch.
+
+    python -m rag.embedding_server --socket /tmp/research_embeddings.sock
+
+Wire format, both directions: a 4-byte big-endian length and a JSON header,
+followed for responses by the embeddings as packed float32 values.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import Future
+from typing import List, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger("EmbeddingServer")
+
+HEADER = struct.Struct(">I")
+# Owner and group only: anyone who can connect can make the server embed
+SOCKET_MODE = 0o660
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def _send_message(sock: socket.socket, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data)) + data + payload)
+
+def _recv_header(sock: socket.socket) -> dict:
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+class MicroBatcher:
+    """Collects texts from concurrent requests and embeds them together.
+
+    A batch is run once max_batch_size texts are waiting or the oldest
+    request has waited max_wait seconds, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait: float = 0.005):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._embed(pending)
+
+    def _embed(self, pending: List[Tuple[List[str], Future]]):
+        texts = [text for item_texts, _ in pending for text in item_texts]
+        try:
+            vectors = self.model.embed_documents(texts)
+            self.batches += 1
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {str(e)}")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        offset = 0
+        for item_texts, future in pending:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A connection carries any number of requests from one worker thread
+        while True:
+            try:
+                request = _recv_header(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                vectors = self.server.batcher.submit(request["texts"]).result()
+                dimension = len(vectors[0]) if vectors else 0
+                payload = array("f", [value for vector in vectors for value in vector]).tobytes()
+                _send_message(self.request, {"count": len(vectors), "dimension": dimension}, payload)
+            except Exception as e:
+                _send_message(self.request, {"error": str(e)})
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, model, socket_path: str, max_batch_size: int = 64, max_wait: float = 0.005):
+        if os.path.lexists(socket_path):
+            # Only replace a stale socket, never a file or link someone put there
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            os.unlink(socket_path)
+        self.batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait=max_wait)
+        super().__init__(socket_path, _Handler)
+
+    def server_bind(self):
+        # Create the socket with SOCKET_MODE, leaving no window with wider permissions
+        umask = os.umask(0o777 & ~SOCKET_MODE)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+class EmbeddingClient:
+    """Embeddings interface backed by the shared embedding server.
+
+    Each thread keeps its own connection, so concurrent requests from one
+    worker reach the server in parallel and can share a batch. Large
+    inputs are sent as requests of at most max_batch_size texts, so the
+    timeout bounds one server batch rather than a whole upload.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0, max_batch_size: int = 64):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_batch_size = max(1, max_batch_size)
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        sock = self._connection()
+        try:
+            _send_message(sock, {"texts": texts})
+            response = _recv_header(sock)
+            if "error" in response:
+                raise RuntimeError(f"Embedding server error: {response['error']}")
+            values = array("f")
+            values.frombytes(_recv_exact(sock, response["count"] * response["dimension"] * values.itemsize))
+        except (ConnectionError, OSError):
+            # Drop the broken connection; the next call reconnects
+            self._close()
+            raise
+        dimension = response["dimension"]
+        return [values[i:i + dimension].tolist() for i in range(0, len(values), dimension)]
+
+    def _request_with_retry(self, texts: List[str]) -> List[List[float]]:
+        try:
+            return self._request(texts)
+        except (ConnectionError, FileNotFoundError):
+            # One retry covers a server restart since the last call (refused,
+            # reset, broken pipe, socket not there yet). Timeouts are not
+            # retried: the server may still be embedding the first request.
+            return self._request(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.max_batch_size):
+            vectors.extend(self._request_with_retry(texts[start:start + self.max_batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    from config.config_loader import config
+    server_config = config["vector_store"].get("embedding_server", {})
+    parser.add_argument("--socket", default=server_config.get("socket_path", "/tmp/research_embeddings.sock"))
+    parser.add_argument("--max-batch-size", type=int, default=server_config.get("max_batch_size", 64))
+    parser.add_argument("--max-wait-ms", type=float, default=server_config.get("max_wait_ms", 5))
+    args = parser.parse_args()
+
+    from rag.vector_store import build_embedding_model
+    model = build_embedding_model(config["vector_store"])
+    # Load the model before accepting connections
+    model.embed_documents(["warmup"])
+
+    server = EmbeddingServer(model, args.socket, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+    logger.info(f"Embedding server listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Translate retrieval filters into a Chroma where clause.
+
+    Supported filters: sources and file_types (lists, any match) and
+    ingested_after / ingested_before (datetimes or epoch seconds; datetimes
+    without a timezone are UTC, like ingest_date). Chroma
+    applies the clause through its metadata index before the vector search,
+    so selective filters narrow the candidates instead of trimming results.
+    """
+    if not filters:
+        return None
+    clauses = []
+    if filters.get("sources"):
+        clauses.append({"source": {"$in": list(filters["sources"])}})
+    if filters.get("file_types"):
+        clauses.append({"file_type": {"$in": [t.lower().lstrip(".") for t in filters["file_types"]]}})
+    for key, operator in (("ingested_after", "$gte"), ("ingested_before", "$lte")):
+        value = filters.get(key)
+        if isinstance(value, datetime):
+            value = (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+        if value is not None:
+            clauses.append({"ingested_at": {operator: float(value)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    """Hashable form of retrieval filters for coalescing and memo keys"""
+    return json.dumps(filters or {}, sort_keys=True, default=str)
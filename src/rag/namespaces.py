@@ -0,0 +1,17 @@
+import re
+
+DEFAULT_NAMESPACE = "default"
+# "__" separates namespaces and shards in collection names, so namespaces
+# cannot contain it (else "a__shard0of2" would be shard 0 of "a")
+NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9](?:_?[A-Za-z0-9-])*_?$")
+NAMESPACE_MAX_LENGTH = 48
+
+class NamespaceNotFound(LookupError):
+    """Raised when reading a namespace nothing was ingested into"""
+
+def validate_namespace(namespace: str) -> str:
+    """Return namespace if it can be used in a collection name, else raise ValueError"""
+    if not NAMESPACE_PATTERN.match(namespace or "") or len(namespace) > NAMESPACE_MAX_LENGTH:
+        raise ValueError(f"Invalid namespace '{namespace}': use up to {NAMESPACE_MAX_LENGTH} letters, digits, "
+                         "'-' or single '_'")
+    return namespace
@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger("OnnxEmbeddings")
+
+def hub_model_id(model_name: str) -> str:
+    # HuggingFaceEmbeddings accepts bare sentence-transformers names
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+def mean_pool(hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Mean over real tokens followed by L2 normalization (sentence-transformers pooling)"""
+    mask = attention_mask[..., None].astype(hidden_states.dtype)
+    summed = (hidden_states * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+def export_model(model_name: str, cache_dir: str, quantize: bool = True) -> str:
+    """Export the model to ONNX once (and int8-quantize it), returns the .onnx path"""
+    target = os.path.join(cache_dir, hub_model_id(model_name).replace("/", "__"))
+    fp32_path = os.path.join(target, "model.onnx")
+    int8_path = os.path.join(target, "model_int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        logger.info(f"Exporting {model_name} to ONNX in {target}")
+        model = ORTModelForFeatureExtraction.from_pretrained(hub_model_id(model_name), export=True)
+        model.save_pretrained(target)
+        AutoTokenizer.from_pretrained(hub_model_id(model_name)).save_pretrained(target)
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # Dynamic quantization: int8 weights, activations quantized at run time
+        logger.info(f"Quantizing {fp32_path} to int8")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+class OnnxEmbeddings:
+    """The sentence-transformer run through ONNX Runtime on CPU.
+
+    Drop-in for HuggingFaceEmbeddings (same pooling and normalization), with
+    optional int8 dynamic quantization and a fixed intra-op thread count.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", cache_dir: str = "./data/onnx_models",
+                 quantize: bool = True, intra_op_threads: int = 0, batch_size: int = 32, max_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = export_model(model_name, cache_dir, quantize=quantize)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # 0 lets ONNX Runtime use every physical core
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # Fast tokenizers are not safe to call from several threads at once
+        self._tokenizer_lock = threading.Lock()
+        logger.info(f"Loaded ONNX embedding model {path} (intra-op threads: {intra_op_threads or 'auto'})")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+        hidden_states = self.session.run(None, inputs)[0]
+        return mean_pool(hidden_states, encoded["attention_mask"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Sorting by length keeps padding per batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embedded = self._embed_batch([texts[i] for i in batch])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[batch] = embedded
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def build_onnx_embeddings(config: Dict[str, Any]) -> OnnxEmbeddings:
+    onnx_config = config.get("onnx", {})
+    return OnnxEmbeddings(
+        model_name=config.get("embedding_model", "all-MiniLM-L6-v2"),
+        cache_dir=onnx_config.get("cache_dir", "./data/onnx_models"),
+        quantize=onnx_config.get("quantize", True),
+        intra_op_threads=onnx_config.get("intra_op_threads", 0),
+        batch_size=onnx_config.get("batch_size", 32),
+        max_length=onnx_config.get("max_length", 256)
+    )
@@ -0,0 +1,247 @@
+"""Binary snapshots of a namespace's vectors, for replicas and restores.
+
+A snapshot is a directory:
+
+    manifest.json      format version, counts, embedding model and backend, file sizes
+    embeddings.npy     (count, dimension) float32, one contiguous array
+    texts.bin          every chunk's text, UTF-8, back to back
+    text_offsets.npy   (count + 1) int64 byte offsets into texts.bin
+    metadata.json      chunk ids and one list per metadata key (columnar)
+
+Import bulk-loads the stored embeddings, so nothing is re-embedded. Rows
+are re-sharded by id, so a snapshot can be loaded into a namespace with a
+different shard count.
+
+    python -m rag.snapshot export ./snapshots/default --namespace default
+    python -m rag.snapshot import ./snapshots/default --namespace default --replace
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger("VectorSnapshot")
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+EMBEDDINGS = "embeddings.npy"
+TEXTS = "texts.bin"
+TEXT_OFFSETS = "text_offsets.npy"
+METADATA = "metadata.json"
+
+class SnapshotWriter:
+    """Streams rows into a snapshot directory.
+
+    Embeddings and text go straight to disk as they arrive; only ids,
+    metadata and text offsets are kept in memory until close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._raw_path = os.path.join(path, EMBEDDINGS + ".part")
+        self._raw = open(self._raw_path, "wb")
+        self._texts = open(os.path.join(path, TEXTS), "wb")
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.offsets = [0]
+        self.dimension: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Optional[Dict[str, Any]]]):
+        if not ids:
+            return
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        if vectors.shape != (len(ids), self.dimension or vectors.shape[1]):
+            raise ValueError(f"Embedding batch of shape {vectors.shape} does not match {len(ids)} rows of dimension {self.dimension}")
+        self.dimension = vectors.shape[1]
+        self._raw.write(vectors.tobytes())
+        for text in documents:
+            encoded = (text or "").encode("utf-8")
+            self._texts.write(encoded)
+            self.offsets.append(self.offsets[-1] + len(encoded))
+        self.ids.extend(ids)
+        self.metadatas.extend(metadata or {} for metadata in metadatas)
+
+    def close(self, **manifest) -> Dict[str, Any]:
+        """Finish the files and write the manifest last, so a partial snapshot has none"""
+        self._raw.close()
+        self._texts.close()
+        shape = (len(self.ids), self.dimension or 0)
+
+        # Prefix the raw float32 rows with an .npy header
+        with open(os.path.join(self.path, EMBEDDINGS), "wb") as out, open(self._raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(out, {"descr": "<f4", "fortran_order": False, "shape": shape})
+            shutil.copyfileobj(raw, out, 16 << 20)
+        os.unlink(self._raw_path)
+        np.save(os.path.join(self.path, TEXT_OFFSETS), np.asarray(self.offsets, dtype=np.int64))
+
+        keys = sorted({key for metadata in self.metadatas for key in metadata})
+        columns = {key: [metadata.get(key) for metadata in self.metadatas] for key in keys}
+        with open(os.path.join(self.path, METADATA), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "columns": columns}, f, ensure_ascii=False)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "count": shape[0],
+            "dimension": shape[1],
+            "created_at": time.time(),
+            **manifest,
+            "files": {name: os.path.getsize(os.path.join(self.path, name))
+                      for name in (EMBEDDINGS, TEXTS, TEXT_OFFSETS, METADATA)},
+        }
+        with open(os.path.join(self.path, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+class Snapshot:
+    """Read side of a snapshot; embeddings and text are memory-mapped"""
+
+    def __init__(self, path: str):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"{path} is not a complete snapshot (no {MANIFEST})")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {self.manifest.get('format_version')}")
+        for name, size in self.manifest["files"].items():
+            actual = os.path.getsize(os.path.join(path, name))
+            if actual != size:
+                raise ValueError(f"Snapshot file {name} is {actual} bytes, manifest says {size}")
+
+        self.embeddings = np.load(os.path.join(path, EMBEDDINGS), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, TEXT_OFFSETS))
+        self.texts = np.memmap(os.path.join(path, TEXTS), dtype=np.uint8, mode="r") if self.offsets[-1] else b""
+        with open(os.path.join(path, METADATA), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        self.ids: List[str] = metadata["ids"]
+        self.columns: Dict[str, List[Any]] = metadata["columns"]
+        if not len(self.ids) == len(self.embeddings) == len(self.offsets) - 1 == self.manifest["count"]:
+            raise ValueError("Snapshot files disagree on the number of rows")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def text(self, row: int) -> str:
+        return bytes(self.texts[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        # Chroma rejects None metadata values, so absent keys stay absent
+        return {key: values[row] for key, values in self.columns.items() if values[row] is not None}
+
+    def batches(self, batch_size: int) -> Iterator[Tuple[List[str], np.ndarray, List[str], List[Dict[str, Any]]]]:
+        for start in range(0, len(self), batch_size):
+            rows = range(start, min(start + batch_size, len(self)))
+            yield (self.ids[rows.start:rows.stop], np.asarray(self.embeddings[rows.start:rows.stop]),
+                   [self.text(row) for row in rows], [self.metadata(row) for row in rows])
+
+def embedding_signature(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Settings that determine a store's vectors: model, backend and ONNX quantization"""
+    backend = config.get("embedding_backend", "huggingface")
+    signature = {"embedding_model": config.get("embedding_model"), "embedding_backend": backend}
+    if backend == "onnx":
+        signature["quantized"] = config.get("onnx", {}).get("quantize", True)
+    return signature
+
+def export_snapshot(manager, path: str, page_size: int = 1000) -> Dict[str, Any]:
+    """Write every chunk of manager's namespace (all shards) to a snapshot at path.
+
+    Chroma has no read snapshots, so pause ingestion for the namespace while
+    exporting to get a consistent copy.
+    """
+    writer = SnapshotWriter(path)
+    manager._refresh_shards()
+    for shard in manager.shards:
+        offset = 0
+        while True:
+            page = shard._collection.get(
+                limit=page_size, offset=offset, include=["embeddings", "documents", "metadatas"]
+            )
+            if not page["ids"]:
+                break
+            writer.append(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+    manifest = writer.close(
+        namespace=manager.namespace,
+        collection_name=manager.collection_name,
+        shards=manager.num_shards,
+        **embedding_signature(manager.config),
+        corpus_version=manager.get_corpus_version(),
+    )
+    logger.info(f"Exported {manifest['count']} chunks from '{manager.collection_name}' to {path}")
+    return manifest
+
+def import_snapshot(manager, path: str, batch_size: int = 4000, replace: bool = False) -> Dict[str, Any]:
+    """Bulk-load a snapshot into manager's namespace without re-embedding.
+
+    Rows are upserted by id, so importing twice is harmless; replace clears
+    the namespace first. Holds the namespace's write lock throughout, so it
+    never writes into collections a compaction is replacing. Fails when the
+    snapshot was built with a different embedding model or backend, since
+    its vectors would not match query embeddings.
+    """
+    snapshot = Snapshot(path)
+    expected = embedding_signature(manager.config)
+    # Snapshots from before backends were recorded came from HuggingFace stores
+    recorded = {key: snapshot.manifest.get(key) for key in expected}
+    recorded["embedding_backend"] = recorded["embedding_backend"] or "huggingface"
+    if recorded != expected:
+        raise ValueError(f"Snapshot was embedded with {recorded}, this store uses {expected}")
+
+    from rag.vector_store import shard_for, shard_key
+    start = time.perf_counter()
+    # Like ingestion, waits for a running compaction and keeps the next one out
+    with manager._write_lock:
+        if replace and not manager.clear_all():
+            raise RuntimeError(f"Could not clear '{manager.collection_name}' before import")
+        manager._refresh_shards()
+
+        for ids, embeddings, documents, metadatas in snapshot.batches(batch_size):
+            rows: Dict[int, List[int]] = {}
+            for row, chunk_id in enumerate(ids):
+                # Same shard as add_documents would pick for the chunk
+                rows.setdefault(shard_for(shard_key(chunk_id, metadatas[row]), manager.num_shards), []).append(row)
+            for shard, shard_rows in rows.items():
+                manager.shards[shard]._collection.upsert(
+                    ids=[ids[row] for row in shard_rows],
+                    embeddings=embeddings[shard_rows],
+                    documents=[documents[row] for row in shard_rows],
+                    metadatas=[metadatas[row] for row in shard_rows],
+                )
+        manager._bump_corpus_version()
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Imported {len(snapshot)} chunks into '{manager.collection_name}' in {seconds:.1f}s")
+    return {"imported": len(snapshot), "seconds": seconds, "collection_name": manager.collection_name}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot directory")
+    parser.add_argument("--namespace", default="default")
+    parser.add_argument("--batch-size", type=int, default=4000, help="Rows per upsert on import")
+    parser.add_argument("--replace", action="store_true", help="Clear the namespace before importing")
+    args = parser.parse_args()
+
+    from config.config_loader import config
+    from rag.vector_store import VectorStoreManager
+
+    manager = VectorStoreManager(config["vector_store"], namespace=args.namespace)
+    if args.action == "export":
+        result = export_snapshot(manager, args.path)
+    else:
+        result = import_snapshot(manager, args.path, batch_size=args.batch_size, replace=args.replace)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
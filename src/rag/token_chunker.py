@@ -0,0 +1,76 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, NamedTuple
+
+from utils.tokens import get_encoding
+
+# End of a sentence: terminal punctuation, optional closing quotes or
+# brackets, then whitespace. The boundary is where the next sentence starts.
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+")
+
+class Chunk(NamedTuple):
+    start: int
+    end: int
+    token_count: int
+
+class TokenChunker:
+    """Split text into token-sized chunks described by character offsets.
+
+    The text is tokenized once. Chunks target chunk_tokens tokens and
+    repeat overlap_tokens tokens of the previous chunk. Both ends snap to
+    the nearest sentence boundary when one is close enough: the end must
+    keep at least min_fill of the target size, and the start must fall
+    inside the overlap window. Chunks are returned as (start, end) offsets
+    into the text. token_count comes from the single tokenization.
+    """
+
+    def __init__(self, chunk_tokens: int = 180, overlap_tokens: int = 40, min_fill: float = 0.5, encoding=None):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_fill = min_fill
+        self.encoding = encoding
+
+    def split(self, text: str) -> List[Chunk]:
+        encoding = self.encoding or get_encoding()
+        tokens = encoding.encode(text, disallowed_special=())
+        if not tokens:
+            return []
+        # Character offset where each token starts
+        _, offsets = encoding.decode_with_offsets(tokens)
+        total = len(tokens)
+
+        # Sentence starts as token indices: the token holding the first
+        # character of the sentence (usually together with its leading space)
+        boundaries = sorted({bisect_right(offsets, m.end()) - 1 for m in SENTENCE_END.finditer(text)} - {0, total})
+
+        chunks = []
+        start = 0
+        while True:
+            end = min(total, start + self.chunk_tokens)
+            if end < total:
+                # Latest sentence start that still leaves the chunk min_fill full
+                i = bisect_right(boundaries, end) - 1
+                if i >= 0 and boundaries[i] >= start + int(self.chunk_tokens * self.min_fill):
+                    end = boundaries[i]
+            chunks.append(self._chunk(text, offsets, start, end, total))
+            if end >= total:
+                return chunks
+
+            next_start = max(start + 1, end - self.overlap_tokens)
+            # Earliest sentence start inside the overlap window
+            i = bisect_left(boundaries, next_start)
+            if i < len(boundaries) and boundaries[i] < end:
+                next_start = boundaries[i]
+            start = next_start
+
+    def _chunk(self, text: str, offsets: List[int], start: int, end: int, total: int) -> Chunk:
+        char_start = offsets[start]
+        char_end = offsets[end] if end < total else len(text)
+        # Tokens usually carry their leading space; keep it out of the slice
+        while char_start < char_end and text[char_start].isspace():
+            char_start += 1
+        while char_end > char_start and text[char_end - 1].isspace():
+            char_end -= 1
+        return Chunk(char_start, char_end, end - start)
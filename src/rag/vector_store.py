@@ -1,46 +1,239 @@
+import hashlib
+import heapq
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 import chromadb
+from rag.compaction import (collection_pointer, fragmentation_stats, load_retired, save_retired,
+                            write_collection_pointer)
+from rag.filters import build_where
+from rag.namespaces import DEFAULT_NAMESPACE, validate_namespace
 from utils.logger import setup_logger
+from utils.decorators import timed, lazy_resource
+from utils.metrics import EMBEDDING_BATCH_SECONDS, EMBEDDED_TEXTS, VECTOR_SEARCH_SECONDS
 
 logger = setup_logger("VectorStore")
 
+CORPUS_VERSION_FILE = "corpus_version"
+
+class InstrumentedEmbeddings:
+    """Wraps an embedding model to record batch latency and volume.
+
+    The model is built by factory on the first embed call, so opening the
+    vector store for stats or deletes never loads it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.inc(len(texts), operation="documents")
+        with EMBEDDING_BATCH_SECONDS.time(operation="documents"):
+            return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        EMBEDDED_TEXTS.inc(operation="query")
+        with EMBEDDING_BATCH_SECONDS.time(operation="query"):
+            return self.model.embed_query(text)
+
+def build_embedding_model(config: Dict[str, Any]):
+    """Load the embedding model in this process with the configured backend"""
+    if config.get("embedding_backend", "huggingface") == "onnx":
+        from rag.onnx_embeddings import build_onnx_embeddings
+        return build_onnx_embeddings(config)
+    return HuggingFaceEmbeddings(
+        model_name=config.get("embedding_model", "all-MiniLM-L6-v2"),
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+_embedding_models: Dict[Tuple, InstrumentedEmbeddings] = {}
+_embedding_models_lock = threading.Lock()
+
+def shared_embedding_model(config: Dict[str, Any]) -> InstrumentedEmbeddings:
+    """One embedding model per process, shared by every namespace and shard"""
+    server_config = config.get("embedding_server", {})
+    key = (config.get("embedding_backend", "huggingface"), config.get("embedding_model"),
+           server_config.get("enabled", False) and server_config.get("socket_path"))
+    with _embedding_models_lock:
+        if key not in _embedding_models:
+            if server_config.get("enabled", False):
+                # Workers share one model in the embedding server process
+                from rag.embedding_server import EmbeddingClient
+                _embedding_models[key] = InstrumentedEmbeddings(lambda: EmbeddingClient(
+                    server_config.get("socket_path", "/tmp/research_embeddings.sock"),
+                    timeout=server_config.get("timeout", 30),
+                    max_batch_size=server_config.get("max_batch_size", 64)
+                ))
+            else:
+                _embedding_models[key] = InstrumentedEmbeddings(lambda: build_embedding_model(config))
+        return _embedding_models[key]
+
+@lazy_resource
+def namespace_write_lock(collection_name: str) -> threading.RLock:
+    """Shared by every manager of a namespace, so reopening one never splits its writers"""
+    return threading.RLock()
+
+@lazy_resource
+def get_chroma_client(persist_directory: str):
+    os.makedirs(persist_directory, exist_ok=True)
+    return chromadb.PersistentClient(path=persist_directory)
+
+@lazy_resource
+def get_search_executor(workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-search")
+
+def shard_for(key: str, shards: int) -> int:
+    """Stable shard index for a document key"""
+    return int(hashlib.md5(key.encode("utf-8")).hexdigest(), 16) % shards
+
+def chunk_id(document: Document) -> str:
+    """Stable id for a chunk, the same in every process and on every ingest"""
+    key = "\0".join([str(document.metadata.get("source", "")), str(document.metadata.get("start_offset", "")),
+                      document.page_content])
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+def shard_key(row_id: str, metadata: Optional[Dict[str, Any]]) -> str:
+    """Key a row is sharded by: its chunk id, which new rows also use as row id"""
+    return (metadata or {}).get("id") or row_id
+
+def namespace_collection_name(config: Dict[str, Any], namespace: str) -> str:
+    base_name = config.get("collection_name", "research_documents")
+    return base_name if namespace == DEFAULT_NAMESPACE else f"{base_name}__{namespace}"
+
+def namespace_sharding(config: Dict[str, Any], namespace: str) -> Dict[str, Any]:
+    return {**config.get("sharding", {}), **config.get("namespaces", {}).get(namespace, {})}
+
+def shard_collection_names(collection_name: str, shards: int) -> List[str]:
+    if shards == 1:
+        return [collection_name]
+    # The shard count is part of the name so resharding never mixes layouts
+    return [f"{collection_name}__shard{i}of{shards}" for i in range(shards)]
+
+def list_collection_names(client) -> set:
+    # Older chromadb versions return collection objects, newer ones names
+    return {c if isinstance(c, str) else c.name for c in client.list_collections()}
+
+def namespace_exists(config: Dict[str, Any], namespace: str) -> bool:
+    """Whether anything was ingested into the namespace (its collections exist).
+
+    Checked before opening a namespace for reads, because opening creates
+    the collections. The default namespace always counts as existing.
+    """
+    if namespace == DEFAULT_NAMESPACE:
+        return True
+    validate_namespace(namespace)
+    shards = max(1, namespace_sharding(config, namespace).get("shards", 1))
+    names = shard_collection_names(namespace_collection_name(config, namespace), shards)
+    persist_directory = config.get("persist_directory", "./data/vector_store")
+    collections = {collection_pointer(persist_directory, name) for name in names}
+    return collections <= list_collection_names(get_chroma_client(persist_directory))
+
 class VectorStoreManager:
-    def __init__(self, config: Dict[str, Any]):
+    """Chroma collections for one namespace (tenant).
+
+    The default namespace uses the configured collection_name; others get
+    their own collection, so a query only scans its tenant's vectors. A
+    namespace can be hash-sharded over several collections, which are
+    searched in parallel with the per-shard top-k merged.
+    """
+
+    def __init__(self, config: Dict[str, Any], namespace: str = DEFAULT_NAMESPACE):
         self.config = config
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=config.get("embedding_model", "all-MiniLM-L6-v2"),
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        self.namespace = validate_namespace(namespace)
+        self.collection_name = namespace_collection_name(config, namespace)
+        sharding = namespace_sharding(config, namespace)
+        self.num_shards = max(1, sharding.get("shards", 1))
+        self.search_workers = sharding.get("search_workers", 8)
+        self.embedding_model = shared_embedding_model(config)
+        self.shards: List[Chroma] = []
         self.vector_store = None
+        # Serializes writers with compaction; searches never take it
+        self._write_lock = namespace_write_lock(self.collection_name)
         self._initialize_vector_store()
+        try:
+            with self._write_lock:
+                self._sweep_retired()
+        except Exception as e:
+            logger.error(f"Failed to drop retired collections: {str(e)}")
     
+    def _shard_names(self) -> List[str]:
+        return shard_collection_names(self.collection_name, self.num_shards)
+
+    def _open_collection(self, name: str) -> Chroma:
+        """Open the collection currently serving the shard called name"""
+        persist_directory = self.config.get("persist_directory", "./data/vector_store")
+        return Chroma(
+            client=get_chroma_client(persist_directory),
+            collection_name=collection_pointer(persist_directory, name),
+            embedding_function=self.embedding_model,
+            persist_directory=persist_directory
+        )
+
     def _initialize_vector_store(self):
         """Initialize the vector store"""
         try:
             persist_directory = self.config.get("persist_directory", "./data/vector_store")
-            os.makedirs(persist_directory, exist_ok=True)
             
-            # Create persistent client
-            client = chromadb.PersistentClient(path=persist_directory)
+            # Initialize one Chroma vector store per shard
+            self.shards = [self._open_collection(name) for name in self._shard_names()]
+            self.vector_store = self.shards[0]
             
-            # Initialize Chroma vector store
-            self.vector_store = Chroma(
-                client=client,
-                collection_name=self.config.get("collection_name", "research_documents"),
-                embedding_function=self.embedding_model,
-                persist_directory=persist_directory
-            )
-            
-            logger.info(f"Vector store initialized successfully at {persist_directory}")
+            logger.info(f"Vector store '{self.collection_name}' initialized with {self.num_shards} shard(s) at {persist_directory}")
             
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {str(e)}")
             raise
+
+    def _refresh_shards(self):
+        """Reopen shards whose pointer a compaction (maybe in another worker) swapped"""
+        persist_directory = self.config.get("persist_directory", "./data/vector_store")
+        for index, name in enumerate(self._shard_names()):
+            if self.shards[index]._collection.name != collection_pointer(persist_directory, name):
+                self.shards[index] = self._open_collection(name)
+                if index == 0:
+                    self.vector_store = self.shards[0]
+
+    def _sweep_retired(self):
+        """Drop collections compaction retired once searches can no longer hold them"""
+        persist_directory = self.config.get("persist_directory", "./data/vector_store")
+        retired = load_retired(persist_directory, self.collection_name)
+        grace = self.config.get("compaction", {}).get("retire_grace_seconds", 600)
+        expired = [collection for collection, retired_at in retired.items() if time.time() - retired_at >= grace]
+        if not expired:
+            return
+        client = get_chroma_client(persist_directory)
+        existing = list_collection_names(client)
+        for collection in expired:
+            if collection in existing:
+                client.delete_collection(collection)
+            del retired[collection]
+        save_retired(persist_directory, self.collection_name, retired)
+        logger.info(f"Dropped {len(expired)} retired collection(s) of '{self.collection_name}'")
+
+    def _fan_out(self, fn, *args) -> List[Any]:
+        """Call fn(shard, *args) on every shard, in parallel when sharded"""
+        self._refresh_shards()
+        if len(self.shards) == 1:
+            return [fn(self.shards[0], *args)]
+        executor = get_search_executor(self.search_workers)
+        return list(executor.map(lambda shard: fn(shard, *args), self.shards))
     
     def add_documents(self, documents: List[Document]) -> List[str]:
         """Add documents to vector store"""
@@ -56,13 +249,31 @@ class VectorStoreManager:
                 logger.warning("No valid documents to add (all empty)")
                 return []
             
-            # Add unique IDs to documents if not present
-            for i, doc in enumerate(valid_docs):
-                if "id" not in doc.metadata:
-                    doc.metadata["id"] = f"doc_{i}_{hash(doc.page_content)}"
+            # The chunk id is the row id and shard key, so re-ingesting a chunk replaces it
+            unique: Dict[str, Document] = {}
+            for doc in valid_docs:
+                doc.metadata.setdefault("id", chunk_id(doc))
+                unique[doc.metadata["id"]] = doc
+            valid_docs = list(unique.values())
+            row_ids = list(unique)
             
-            # Add documents to vector store
-            ids = self.vector_store.add_documents(valid_docs)
+            # Embed before taking the write lock, which only covers the inserts
+            embeddings = self.embedding_model.embed_documents([doc.page_content for doc in valid_docs])
+            groups: Dict[int, List[int]] = {}
+            for row, row_id in enumerate(row_ids):
+                groups.setdefault(shard_for(row_id, self.num_shards), []).append(row)
+            ids = []
+            with self._write_lock:
+                self._refresh_shards()
+                for shard, rows in groups.items():
+                    self.shards[shard]._collection.upsert(
+                        ids=[row_ids[row] for row in rows],
+                        embeddings=[embeddings[row] for row in rows],
+                        documents=[valid_docs[row].page_content for row in rows],
+                        metadatas=[valid_docs[row].metadata for row in rows],
+                    )
+                    ids.extend(row_ids[row] for row in rows)
+                self._bump_corpus_version()
             
             logger.info(f"Added {len(valid_docs)} documents to vector store")
             return ids
@@ -71,16 +282,26 @@ class VectorStoreManager:
             logger.error(f"Failed to add documents: {str(e)}")
             return []
     
-    def similarity_search(self, query: str, k: int = 5, threshold: float = 0.3) -> List[Document]:
-        """Search for similar documents with lower threshold"""
+    @timed(VECTOR_SEARCH_SECONDS)
+    def similarity_search(self, query: str, k: int = 5, threshold: float = 0.3,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Search for similar documents with lower threshold, restricted by metadata filters"""
         try:
             if not query.strip():
                 logger.warning("Empty query provided")
                 return []
             
-            # Perform similarity search with relevance scores
-            docs_with_scores = self.vector_store.similarity_search_with_relevance_scores(
-                query, k=k
+            # Embed once, then search every shard and keep the best k overall
+            where = build_where(filters)
+            embedding = self.embedding_model.embed_query(query)
+            relevance = self.vector_store._select_relevance_score_fn()
+            shard_results = self._fan_out(
+                lambda shard: shard.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=where)
+            )
+            docs_with_scores = heapq.nlargest(
+                k,
+                ((doc, relevance(distance)) for results in shard_results for doc, distance in results),
+                key=lambda item: item[1]
             )
             
             # Filter by threshold (lowered from 0.7 to 0.3)
@@ -93,8 +314,7 @@ class VectorStoreManager:
             
             # Log scores for debugging
             if docs_with_scores:
-                scores = [score for _, score in docs_with_scores]
-                logger.info(f"Similarity scores: {scores}")
+                logger.debug("Similarity scores: %s", [round(score, 3) for _, score in docs_with_scores])
             
             return filtered_docs
             
@@ -102,11 +322,11 @@ class VectorStoreManager:
             logger.error(f"Similarity search failed: {str(e)}")
             return []
     
-    def get_relevant_context(self, query: str, max_tokens: int = 4000) -> str:
+    def get_relevant_context(self, query: str, max_tokens: int = 4000, filters: Optional[Dict[str, Any]] = None) -> str:
         """Get relevant context for a query with token limit"""
         try:
             # Use lower threshold for better recall
-            docs = self.similarity_search(query, k=10, threshold=0.1)
+            docs = self.similarity_search(query, k=10, threshold=0.1, filters=filters)
             
             if not docs:
                 logger.warning("No relevant documents found")
@@ -140,9 +360,10 @@ class VectorStoreManager:
     def delete_documents(self, source: str) -> bool:
         """Delete documents from a specific source"""
         try:
-            # Get collection and delete by metadata
-            collection = self.vector_store._collection
-            collection.delete(where={"source": source})
+            # Get collections and delete by metadata
+            with self._write_lock:
+                self._fan_out(lambda shard: shard._collection.delete(where={"source": source}))
+                self._bump_corpus_version()
             
             logger.info(f"Deleted documents from source: {source}")
             return True
@@ -151,32 +372,142 @@ class VectorStoreManager:
             return False
     
     def clear_all(self) -> bool:
-        """Clear all documents from vector store"""
+        """Clear all documents in this namespace"""
         try:
-            collection = self.vector_store._collection
-            collection.delete()
-            logger.info("Cleared all documents from vector store")
+            with self._write_lock:
+                self._refresh_shards()
+                for shard in self.shards:
+                    shard.delete_collection()
+                self._initialize_vector_store()
+                self._bump_corpus_version()
+            logger.info(f"Cleared all documents from '{self.collection_name}'")
             return True
         except Exception as e:
             logger.error(f"Failed to clear vector store: {str(e)}")
             return False
     
+    def compact(self, page_size: int = 1000) -> Dict[str, Any]:
+        """Rebuild every shard without its deleted entries, online.
+
+        Each shard is copied (stored embeddings, no re-embedding) into a
+        fresh collection. The shard's pointer file is then swapped to it,
+        so its name never resolves to a missing or partial collection, and
+        it replaces the old one for searches in one assignment. If a copy
+        fails, the shard keeps its old collection. Searches keep using the
+        old collections until the swap; writes wait for the compaction.
+        Every search and write re-reads the pointers, so other API workers
+        switch on their next call. Replaced collections are only dropped
+        after compaction.retire_grace_seconds, so searches already running
+        on them finish. VACUUM is separate (vacuum_sqlite), since it locks
+        the SQLite file every namespace shares.
+        """
+        persist_directory = self.config.get("persist_directory", "./data/vector_store")
+        client = get_chroma_client(persist_directory)
+        start = time.perf_counter()
+        with self._write_lock:
+            self._refresh_shards()
+            self._sweep_retired()
+            before = self.storage_stats()
+            retired = load_retired(persist_directory, self.collection_name)
+            try:
+                for index, name in enumerate(self._shard_names()):
+                    shard = self.shards[index]
+                    for leftover in list_collection_names(client):
+                        # Left behind by an interrupted compaction
+                        if (leftover.startswith(f"{name}.gen") and leftover != shard._collection.name
+                                and leftover not in retired):
+                            client.delete_collection(leftover)
+
+                    # "." cannot occur in namespaces, so this never names another namespace's shard
+                    building = f"{name}.gen{uuid.uuid4().hex[:12]}"
+                    target = client.create_collection(building, metadata=shard._collection.metadata)
+                    try:
+                        offset = 0
+                        while True:
+                            page = shard._collection.get(limit=page_size, offset=offset,
+                                                         include=["embeddings", "documents", "metadatas"])
+                            if not page["ids"]:
+                                break
+                            target.add(ids=page["ids"], embeddings=page["embeddings"],
+                                       documents=page["documents"], metadatas=page["metadatas"])
+                            offset += len(page["ids"])
+                        write_collection_pointer(persist_directory, name, building)
+                    except Exception:
+                        client.delete_collection(building)
+                        raise
+
+                    # Searches switch to the rebuilt shard here
+                    retired[shard._collection.name] = time.time()
+                    self.shards[index] = self._open_collection(name)
+                    if index == 0:
+                        self.vector_store = self.shards[0]
+            finally:
+                save_retired(persist_directory, self.collection_name, retired)
+            after = self.storage_stats()
+
+        seconds = time.perf_counter() - start
+        logger.info(f"Compacted '{self.collection_name}' in {seconds:.1f}s: "
+                    f"{before.get('dead_entries', 0)} dead entries removed")
+        return {"collection_name": self.collection_name, "seconds": seconds, "before": before, "after": after}
+
+    def storage_stats(self) -> Dict[str, Any]:
+        """Live vs dead index entries and on-disk bytes for this namespace"""
+        try:
+            threshold = self.config.get("compaction", {}).get("dead_ratio_threshold", 0.2)
+            self._refresh_shards()
+            collections = [(str(shard._collection.id), shard._collection.count()) for shard in self.shards]
+            return fragmentation_stats(self.config.get("persist_directory", "./data/vector_store"), collections, threshold)
+        except Exception as e:
+            logger.error(f"Failed to get storage stats: {str(e)}")
+            return {"error": str(e)}
+
+    def _corpus_version_path(self) -> str:
+        persist_directory = self.config.get("persist_directory", "./data/vector_store")
+        return os.path.join(persist_directory, f"{self.collection_name}.{CORPUS_VERSION_FILE}")
+
+    def _bump_corpus_version(self):
+        """Record that the corpus changed so cached outputs built on it go stale"""
+        try:
+            with open(self._corpus_version_path(), "w") as f:
+                f.write(uuid.uuid4().hex)
+        except OSError as e:
+            logger.error(f"Failed to update corpus version: {str(e)}")
+
+    def get_corpus_version(self) -> str:
+        """Get an opaque token that changes whenever documents are added or removed"""
+        try:
+            with open(self._corpus_version_path(), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return "initial"
+    
+    def count(self) -> int:
+        """Number of stored chunks, without touching the embedding model"""
+        try:
+            self._refresh_shards()
+            return sum(shard._collection.count() for shard in self.shards)
+        except Exception as e:
+            logger.error(f"Failed to count documents: {str(e)}")
+            return 0
+
     def get_stats(self) -> Dict[str, Any]:
         """Get vector store statistics"""
         try:
-            collection = self.vector_store._collection
-            count = collection.count()
+            count = self.count()
             
             # Get sample of documents to check sources
-            sample_docs = self.vector_store.similarity_search("", k=5) if count > 0 else []
-            sources = list(set([doc.metadata.get('source', 'Unknown') for doc in sample_docs]))
+            sample = self.vector_store._collection.get(limit=5, include=["metadatas"]) if count > 0 else {"metadatas": []}
+            sources = list(set([(metadata or {}).get('source', 'Unknown') for metadata in sample["metadatas"]]))
             
             return {
                 "total_documents": count,
-                "collection_name": self.config.get("collection_name"),
+                "collection_name": self.collection_name,
+                "namespace": self.namespace,
+                "shards": self.num_shards,
                 "embedding_model": self.config.get("embedding_model"),
                 "persist_directory": self.config.get("persist_directory"),
-                "sample_sources": sources[:5]  # Show first 5 sources
+                "sample_sources": sources[:5],  # Show first 5 sources
+                "storage": self.storage_stats()
             }
             
         except Exception as e:
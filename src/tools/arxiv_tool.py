@@ -1,10 +1,16 @@
-from langchain_community.utilities.arxiv import ArxivAPIWrapper
+from utils.decorators import timed, lazy_resource
+from utils.metrics import TOOL_CALL_SECONDS, FAILURES
 
-arxiv = ArxivAPIWrapper(load_max_docs=3)
+@lazy_resource
+def get_arxiv():
+    from langchain_community.utilities.arxiv import ArxivAPIWrapper
+    return ArxivAPIWrapper(load_max_docs=3)
 
+@timed(TOOL_CALL_SECONDS, tool="arxiv")
 def search_arxiv(query: str) -> str:
     try:
-        results = arxiv.run(query)
+        results = get_arxiv().run(query)
         return f"📄 Arxiv Results:\n{results}"
     except Exception as e:
-        return f"❌ Arxiv failed: {str(e)}"
\ No newline at end of file
+        FAILURES.inc(component="arxiv")
+        return f"❌ Arxiv failed: {str(e)}"
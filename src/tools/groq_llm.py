@@ -1,20 +1,234 @@
-from langchain_groq import ChatGroq
-from langchain.schema import HumanMessage
 import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
 from dotenv import load_dotenv
+from config.config_loader import config
+from utils.decorators import lazy_resource
+from utils.logger import setup_logger
+from utils.metrics import LLM_CALL_SECONDS, LLM_HEDGES, LLM_QUEUE_SECONDS, LLM_RETRIES, FAILURES
+from tools.rate_limiter import Priority, RateLimitScheduler, current_priority
 
 load_dotenv()
 
-def get_groq_llm():
+logger = setup_logger("GroqLLM")
+
+llm_config = config.get("llm", {})
+hedge_config = llm_config.get("hedging", {})
+retry_config = llm_config.get("retry", {})
+rate_config = llm_config.get("rate_limit", {})
+
+MODEL_NAME = llm_config.get("model", "llama3-70b-8192")
+
+@lazy_resource
+def get_groq_llm(model: str = MODEL_NAME):
+    # Imported here so loading an agent module doesn't pull in the Groq SDK
+    from langchain_groq import ChatGroq
     return ChatGroq(
         groq_api_key=os.getenv("GROQ_API_KEY"),
-        model="llama3-70b-8192"
+        model=model,
+        timeout=llm_config.get("request_timeout", 60),
+        # Retries are handled below, within the request deadline
+        max_retries=0
     )
-def run_llm_prompt(prompt:str)->str:
-    llm = get_groq_llm()
-    response = llm.invoke([HumanMessage(content=prompt)])
+
+class HedgingPolicy:
+    """Decides when a slow LLM call gets a duplicate request.
+
+    The hedge delay is a percentile of recent successful latencies, so only
+    the slowest few percent of calls are duplicated. Until enough samples
+    exist a fixed initial delay is used.
+    """
+
+    def __init__(self, percentile: float = 0.95, min_samples: int = 20, window: int = 200,
+                 initial_delay: float = 10.0, min_delay: float = 0.5):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+hedging_policy = HedgingPolicy(
+    percentile=hedge_config.get("percentile", 0.95),
+    min_samples=hedge_config.get("min_samples", 20),
+    initial_delay=hedge_config.get("initial_delay_seconds", 10.0)
+)
+
+# Global cap on concurrent LLM requests across API calls, batches and hedges
+_llm_slots = threading.BoundedSemaphore(llm_config.get("max_concurrency", 8))
+
+@lazy_resource
+def get_hedge_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=hedge_config.get("max_workers", 16), thread_name_prefix="llm")
+
+@lazy_resource
+def get_rate_limiter(model: str) -> RateLimitScheduler:
+    """Scheduler for the model's Groq RPM/TPM limits (limits are per model)"""
+    limits = {**rate_config.get("default", {}), **rate_config.get("models", {}).get(model, {})}
+    return RateLimitScheduler(
+        requests_per_minute=limits.get("requests_per_minute", 30),
+        tokens_per_minute=limits.get("tokens_per_minute", 6000)
+    )
+
+def _estimate_tokens(text: str) -> int:
+    try:
+        from utils.tokens import count_tokens
+        return count_tokens(text)
+    except Exception:
+        # Encoding unavailable, use the usual ~4 characters per token
+        return len(text) // 4 + 1
+
+def _admit(model: str, prompt: str, priority: Priority, deadline: float, wait_for_capacity: bool = True) -> int:
+    """Take rate budget and an LLM slot for one request, returns the tokens reserved.
+
+    Raises TimeoutError when they are not available by deadline
+    (time.monotonic()), or right away when wait_for_capacity is False.
+    """
+    estimate = 0
+    if rate_config.get("enabled", False):
+        # Groq counts prompt and completion tokens against the TPM limit
+        estimate = _estimate_tokens(prompt) + rate_config.get("expected_output_tokens", 800)
+        waited = get_rate_limiter(model).acquire(estimate, priority,
+                                                 deadline=deadline if wait_for_capacity else time.monotonic())
+        LLM_QUEUE_SECONDS.observe(waited, model=model, priority=priority.name.lower())
+    if wait_for_capacity:
+        acquired = _llm_slots.acquire(timeout=max(0.0, deadline - time.monotonic()))
+    else:
+        acquired = _llm_slots.acquire(blocking=False)
+    if not acquired:
+        if estimate:
+            get_rate_limiter(model).settle(estimate, 0)
+        raise TimeoutError(f"No free LLM slot for {model}")
+    return estimate
+
+def _invoke(model: str, prompt: str, estimate: int = 0, abandoned: Optional[threading.Event] = None) -> str:
+    """Send one admitted request (see _admit); releases its LLM slot when done.
+
+    An attempt whose caller has already returned gives back its slot and
+    budget instead of sending the request.
+    """
+    from langchain_core.messages import HumanMessage
+
+    if abandoned is not None and abandoned.is_set():
+        _llm_slots.release()
+        if estimate:
+            get_rate_limiter(model).settle(estimate, 0)
+        raise CancelledError(f"LLM call to {model} abandoned before it started")
+    try:
+        llm = get_groq_llm(model)
+        start = time.perf_counter()
+        with LLM_CALL_SECONDS.time(model=model):
+            response = llm.invoke([HumanMessage(content=prompt)])
+    finally:
+        _llm_slots.release()
+    if model == MODEL_NAME:
+        hedging_policy.record(time.perf_counter() - start)
     content = response.content.strip()
+    if estimate:
+        usage = getattr(response, "usage_metadata", None) or {}
+        actual = usage.get("total_tokens") or _estimate_tokens(prompt) + _estimate_tokens(content)
+        get_rate_limiter(model).settle(estimate, actual)
 
     if  content.startswith("<think>"):
         content=content.split("<think>")[-1].strip()
-    return content
\ No newline at end of file
+    return content
+
+def _invoke_hedged(prompt: str, timeout: float, priority: Priority) -> str:
+    """Invoke the primary model, duplicating the request if it runs slow.
+
+    Budget and a slot are taken before the hedge timer starts, so time
+    spent queueing never triggers a hedge. A hedge is only sent when it can
+    start at once; under saturation it would just queue behind the primary.
+    """
+    deadline = time.monotonic() + timeout
+    estimate = _admit(MODEL_NAME, prompt, priority, deadline)
+    # Requests run on the executor, even without hedging, so the caller can stop at the deadline
+    executor = get_hedge_executor()
+    # Set once this call returns; attempts that have not started by then give up
+    abandoned = threading.Event()
+    hedge = None
+    done, pending = set(), {executor.submit(_invoke, MODEL_NAME, prompt, estimate, abandoned)}
+    try:
+        if hedge_config.get("enabled", False):
+            done, pending = wait(pending, timeout=min(hedging_policy.hedge_delay(), max(0.0, deadline - time.monotonic())))
+            if not done:
+                hedge_model = hedge_config.get("fallback_model") or MODEL_NAME
+                try:
+                    hedge_estimate = _admit(hedge_model, prompt, priority, deadline, wait_for_capacity=False)
+                except TimeoutError:
+                    LLM_HEDGES.inc(outcome="skipped")
+                else:
+                    logger.info("LLM call exceeded hedge delay, issuing hedge to %s", hedge_model)
+                    LLM_HEDGES.inc(outcome="issued")
+                    hedge = executor.submit(_invoke, hedge_model, prompt, hedge_estimate, abandoned)
+                    pending.add(hedge)
+
+        error = None
+        while done or pending:
+            for future in done:
+                if future.exception() is None:
+                    if hedge is not None:
+                        # A request already sent cannot be recalled; the slower one finishes in the background
+                        LLM_HEDGES.inc(outcome="hedge_won" if future is hedge else "primary_won")
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        raise error or TimeoutError(f"LLM call did not complete within {timeout:.1f}s")
+    finally:
+        abandoned.set()
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors other than rate limits and timeouts will fail again"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 409, 429)
+    return True
+
+def run_llm_prompt(prompt:str)->str:
+    """Run a prompt with rate limiting, hedging and jittered retries inside a request deadline.
+
+    Calls wait for RPM/TPM budget at the priority set with llm_priority()
+    (interactive by default).
+    """
+    priority = current_priority()
+    max_attempts = retry_config.get("max_attempts", 4)
+    base_delay = retry_config.get("base_delay_seconds", 0.5)
+    max_delay = retry_config.get("max_delay_seconds", 8.0)
+    deadline = time.monotonic() + retry_config.get("deadline_seconds", 120)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return _invoke_hedged(prompt, timeout=max(0.0, deadline - time.monotonic()), priority=priority)
+        except Exception as e:
+            FAILURES.inc(component="llm")
+            # Full jitter: sleep a random time up to the exponential backoff
+            backoff = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            remaining = deadline - time.monotonic()
+            if attempt >= max_attempts or not _is_retryable(e) or backoff >= remaining:
+                raise
+            logger.warning("LLM call failed (attempt %d/%d): %s, retrying in %.2fs", attempt, max_attempts, str(e), backoff)
+            LLM_RETRIES.inc()
+            time.sleep(backoff)
@@ -0,0 +1,110 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Optional
+
+class Priority(IntEnum):
+    """LLM call classes, lower values are admitted first"""
+    INTERACTIVE = 0
+    BATCH = 1
+    INGESTION = 2
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run LLM calls made inside the block at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to one minute of budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available, assuming refill() was just called"""
+        missing = amount - self.level
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+class RateLimitScheduler:
+    """Admit LLM calls within requests-per-minute and tokens-per-minute budgets.
+
+    Callers wait in a priority queue (then FIFO); only the head of the queue
+    may take budget, so batch work never overtakes a waiting interactive call.
+    Token cost is an estimate made before the call and settled afterwards
+    with the actual size, refunding any overestimate.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+
+    def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE, deadline: Optional[float] = None) -> float:
+        """Block until the call may run, returns the seconds spent waiting.
+
+        deadline is a time.monotonic() value; if the call is not admitted by
+        then it leaves the queue without taking budget and TimeoutError is
+        raised. A deadline already passed only admits a call that can run now.
+        """
+        # A single call larger than the whole bucket would never be admitted
+        tokens = min(tokens, self.tokens.capacity)
+        entry = (int(priority), next(self._sequence))
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = None
+                    if self._queue[0] == entry:
+                        self.requests.refill(now)
+                        self.tokens.refill(now)
+                        delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if delay <= 0:
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            return now - start
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise TimeoutError(f"No LLM rate budget within {now - start:.1f}s")
+                        delay = min(delay, deadline - now) if delay is not None else deadline - now
+                    self._condition.wait(timeout=delay)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token bucket once the real call size is known"""
+        # acquire() debited at most the bucket capacity
+        debited = min(estimated, self.tokens.capacity)
+        with self._condition:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + debited - actual)
+            self._condition.notify_all()
+
+    def waiting(self) -> int:
+        """Number of calls queued for budget"""
+        with self._condition:
+            return len(self._queue)
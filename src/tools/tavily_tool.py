@@ -1,14 +1,24 @@
 import os
-from tavily import TavilyClient
+from utils.decorators import timed, lazy_resource
+from utils.metrics import TOOL_CALL_SECONDS, FAILURES
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY) if TAVILY_API_KEY else None
 
+@lazy_resource
+def get_tavily_client():
+    if not TAVILY_API_KEY:
+        return None
+    from tavily import TavilyClient
+    return TavilyClient(api_key=TAVILY_API_KEY)
+
+@timed(TOOL_CALL_SECONDS, tool="tavily")
 def search_tavily(query: str) -> str:
+    tavily_client = get_tavily_client()
     if not tavily_client:
         return "Tavily not configured."
     try:
         results = tavily_client.search(query=query, search_depth="advanced", max_results=3)
         return "🌐 Tavily Results:\n" + "\n\n".join([f"{r['title']}: {r['url']}" for r in results["results"]])
     except Exception as e:
-        return f"❌ Tavily search failed: {str(e)}"
\ No newline at end of file
+        FAILURES.inc(component="tavily")
+        return f"❌ Tavily search failed: {str(e)}"
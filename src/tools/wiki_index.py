@@ -0,0 +1,304 @@
+"""Offline Wikipedia abstracts index, searched before the live API.
+
+Built once from an abstracts dump, either the XML dump
+(enwiki-latest-abstract.xml[.gz]) or JSON lines with "title", "abstract"
+and optional "aliases". An index is a directory:
+
+    manifest.json        format version, counts, BM25 parameters, file sizes
+    titles.bin           article titles, UTF-8, back to back (+ titles_offsets.npy)
+    abstracts.bin        article abstracts (+ abstracts_offsets.npy)
+    doc_lengths.npy      (count) int32 tokens per article
+    keys.bin             sorted normalized titles and aliases (+ keys_offsets.npy)
+    key_docs.npy         article of each key
+    terms.bin            sorted vocabulary (+ terms_offsets.npy)
+    postings_offsets.npy (terms + 1) int64 start of each term's postings
+    postings_docs.npy    int32 article ids, grouped by term
+    postings_tf.npy      uint16 term frequencies, aligned with postings_docs
+
+Everything is memory-mapped, so opening an index is instant and lookups
+only touch the pages they need. A query is first matched against titles
+and aliases; otherwise the abstracts are ranked with BM25, with misspelt
+terms replaced by their closest vocabulary entry.
+
+    python -m tools.wiki_index build enwiki-latest-abstract.xml.gz ./data/wiki_index
+    python -m tools.wiki_index query ./data/wiki_index "theory of relativity"
+"""
+import argparse
+import bisect
+import difflib
+import gzip
+import json
+import math
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has he in is it its of on or that the to was were will with "
+    "what who whom which when where why how does did do about tell me explain".split()
+)
+# Leading question words dropped before title matching
+QUESTION_PREFIX = re.compile(r"^(?:(?:what|who|where|when|which)(?: s| is| are| was| were)?|tell me about|explain|define) (?:the |a |an )?")
+TITLE_PREFIX = "Wikipedia: "
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def normalize_title(text: str) -> str:
+    """Case, punctuation and spacing insensitive form used for title keys"""
+    return " ".join(TOKEN_PATTERN.findall(text.lower()))
+
+class _Strings:
+    """Memory-mapped list of strings stored as a UTF-8 blob plus offsets"""
+
+    def __init__(self, path: str, name: str):
+        self.offsets = np.load(os.path.join(path, f"{name}_offsets.npy"), mmap_mode="r")
+        blob = os.path.join(path, f"{name}.bin")
+        self.blob = np.memmap(blob, dtype=np.uint8, mode="r") if self.offsets[-1] else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def find(self, key: str) -> int:
+        """Position of key in a sorted list, or -1"""
+        i = bisect.bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else -1
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        return bisect.bisect_left(self, prefix), bisect.bisect_left(self, prefix + "\U0010ffff")
+
+def _write_strings(path: str, name: str, strings: Iterable[str]):
+    offsets = [0]
+    with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+        for text in strings:
+            encoded = text.encode("utf-8")
+            f.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+    np.save(os.path.join(path, f"{name}_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+def read_abstracts(path: str) -> Iterator[Dict[str, Any]]:
+    """Articles from an XML abstracts dump or a JSON lines file (optionally gzipped)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    if ".xml" in os.path.basename(path):
+        with opener(path, "rb") as f:
+            for _, element in ET.iterparse(f):
+                if element.tag != "doc":
+                    continue
+                title = element.findtext("title") or ""
+                if title.startswith(TITLE_PREFIX):
+                    title = title[len(TITLE_PREFIX):]
+                yield {"title": title, "abstract": element.findtext("abstract") or ""}
+                element.clear()
+    else:
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def build_index(articles: Iterable[Dict[str, Any]], path: str, title_boost: int = 3,
+                k1: float = 1.2, b: float = 0.75) -> Dict[str, Any]:
+    """Write an index of articles to path.
+
+    Postings are collected in memory, which for the full English dump needs
+    a few GB; the result is what gets memory-mapped at query time. Title
+    tokens count title_boost times towards an article's BM25 score.
+    """
+    os.makedirs(path, exist_ok=True)
+    start = time.perf_counter()
+    titles, abstracts, lengths = [], [], array("i")
+    keys: Dict[str, int] = {}
+    base_keys: Dict[str, int] = {}
+    postings: Dict[str, Tuple[array, array]] = {}
+
+    for article in articles:
+        title, abstract = article.get("title", "").strip(), (article.get("abstract") or "").strip()
+        if not title or not abstract:
+            continue
+        doc = len(titles)
+        titles.append(title)
+        abstracts.append(abstract)
+        keys.setdefault(normalize_title(title), doc)
+        for alias in article.get("aliases") or []:
+            keys.setdefault(normalize_title(alias), doc)
+        # "Mercury (planet)" also answers "mercury" unless an article has that title
+        if "(" in title:
+            base_keys.setdefault(normalize_title(title.split("(")[0]), doc)
+
+        counts: Dict[str, int] = {}
+        for token in tokenize(title) * title_boost + tokenize(abstract):
+            counts[token] = counts.get(token, 0) + 1
+        lengths.append(sum(counts.values()))
+        for token, tf in counts.items():
+            docs, tfs = postings.setdefault(token, (array("i"), array("H")))
+            docs.append(doc)
+            tfs.append(min(tf, 65535))
+
+    for key, doc in base_keys.items():
+        keys.setdefault(key, doc)
+    keys.pop("", None)
+
+    _write_strings(path, "titles", titles)
+    _write_strings(path, "abstracts", abstracts)
+    np.save(os.path.join(path, "doc_lengths.npy"), np.frombuffer(lengths, dtype=np.int32))
+
+    sorted_keys = sorted(keys)
+    _write_strings(path, "keys", sorted_keys)
+    np.save(os.path.join(path, "key_docs.npy"), np.asarray([keys[key] for key in sorted_keys], dtype=np.int32))
+
+    terms = sorted(postings)
+    _write_strings(path, "terms", terms)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[term][0]) for term in terms])
+    with open(os.path.join(path, "postings_docs.npy"), "wb") as docs_file, \
+            open(os.path.join(path, "postings_tf.npy"), "wb") as tf_file:
+        # Headers first, then each term's postings appended in order
+        np.lib.format.write_array_header_1_0(docs_file, {"descr": "<i4", "fortran_order": False, "shape": (int(offsets[-1]),)})
+        np.lib.format.write_array_header_1_0(tf_file, {"descr": "<u2", "fortran_order": False, "shape": (int(offsets[-1]),)})
+        for term in terms:
+            docs, tfs = postings[term]
+            docs_file.write(docs.tobytes())
+            tf_file.write(tfs.tobytes())
+    np.save(os.path.join(path, "postings_offsets.npy"), offsets)
+
+    files = [name for name in os.listdir(path) if name != MANIFEST]
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "count": len(titles),
+        "terms": len(terms),
+        "keys": len(sorted_keys),
+        "avg_doc_length": float(np.mean(lengths)) if len(lengths) else 0.0,
+        "k1": k1,
+        "b": b,
+        "title_boost": title_boost,
+        "built_at": time.time(),
+        "build_seconds": time.perf_counter() - start,
+        "files": {name: os.path.getsize(os.path.join(path, name)) for name in sorted(files)},
+    }
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+class WikiIndex:
+    """Read side of an index built by build_index()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"{path} is not a complete Wikipedia index (no {MANIFEST})")
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported Wikipedia index format version {self.manifest.get('format_version')}")
+
+        self.titles = _Strings(path, "titles")
+        self.abstracts = _Strings(path, "abstracts")
+        self.keys = _Strings(path, "keys")
+        self.terms = _Strings(path, "terms")
+        self.key_docs = np.load(os.path.join(path, "key_docs.npy"), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode="r")
+        self.postings_offsets = np.load(os.path.join(path, "postings_offsets.npy"), mmap_mode="r")
+        self.postings_docs = np.load(os.path.join(path, "postings_docs.npy"), mmap_mode="r")
+        self.postings_tf = np.load(os.path.join(path, "postings_tf.npy"), mmap_mode="r")
+        self.count = self.manifest["count"]
+        self.k1, self.b = self.manifest["k1"], self.manifest["b"]
+        self.avg_doc_length = self.manifest["avg_doc_length"] or 1.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _article(self, doc: int, score: float, match: str) -> Dict[str, Any]:
+        return {"title": self.titles[doc], "abstract": self.abstracts[doc], "score": score, "match": match}
+
+    def _correct(self, term: str) -> Optional[str]:
+        """term if it is in the vocabulary, else the closest entry sharing its first two letters"""
+        if self.terms.find(term) >= 0:
+            return term
+        if len(term) < 4:
+            return None
+        lo, hi = self.terms.prefix_range(term[:2])
+        # Very common prefixes are too costly to scan on every query
+        if hi - lo > 50000:
+            return None
+        matches = difflib.get_close_matches(term, [self.terms[i] for i in range(lo, hi)], n=1, cutoff=0.8)
+        return matches[0] if matches else None
+
+    def title_match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Article whose title or alias equals the query, ignoring case, punctuation and question words"""
+        key = normalize_title(query)
+        for candidate in (key, normalize_title(QUESTION_PREFIX.sub("", key))):
+            position = self.keys.find(candidate)
+            if position >= 0:
+                return self._article(int(self.key_docs[position]), math.inf, "title")
+        return None
+
+    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        """Top k articles by BM25 over titles and abstracts"""
+        terms = {corrected for corrected in map(self._correct, tokenize(query)) if corrected}
+        if not terms or not self.count:
+            return []
+
+        docs, scores = [], []
+        for term in terms:
+            t = self.terms.find(term)
+            start, end = int(self.postings_offsets[t]), int(self.postings_offsets[t + 1])
+            term_docs = np.asarray(self.postings_docs[start:end])
+            tf = np.asarray(self.postings_tf[start:end], dtype=np.float32)
+            idf = math.log(1 + (self.count - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_lengths[term_docs]) / self.avg_doc_length)
+            docs.append(term_docs)
+            scores.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        unique_docs, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        top = np.argsort(-totals)[:k] if len(totals) <= k else np.argpartition(-totals, k)[:k]
+        top = top[np.argsort(-totals[top])]
+        return [self._article(int(unique_docs[i]), float(totals[i]), "bm25") for i in top]
+
+    def lookup(self, query: str, min_score: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Best article for query: a title match, else the top BM25 hit scoring at least min_score"""
+        article = self.title_match(query)
+        if article:
+            return article
+        results = self.search(query, k=1)
+        return results[0] if results and results[0]["score"] >= min_score else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    build = subparsers.add_parser("build", help="Build an index from an abstracts dump")
+    build.add_argument("dump", help="XML abstracts dump or JSON lines file (.gz allowed)")
+    build.add_argument("path", help="Index directory")
+    build.add_argument("--title-boost", type=int, default=3)
+    query = subparsers.add_parser("query", help="Look a query up in an index")
+    query.add_argument("path", help="Index directory")
+    query.add_argument("query")
+    query.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.action == "build":
+        manifest = build_index(read_abstracts(args.dump), args.path, title_boost=args.title_boost)
+        print(json.dumps({key: value for key, value in manifest.items() if key != "files"}, indent=2))
+    else:
+        index = WikiIndex(args.path)
+        start = time.perf_counter()
+        match = index.title_match(args.query)
+        results = [match] if match else index.search(args.query, args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"{result['score']:.2f}  {result['title']} ({result['match']})\n    {result['abstract'][:200]}")
+        print(f"{len(results)} results in {elapsed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,59 @@
-import wikipediaapi
+import os
+from utils.decorators import timed, lazy_resource
+from utils.logger import setup_logger
+from utils.metrics import TOOL_CALL_SECONDS, CACHE_HITS, CACHE_MISSES, FAILURES
+from config.config_loader import config
 
+logger = setup_logger("WikipediaTool")
+
+wiki_config = config["tools"].get("wikipedia", {})
+
+@lazy_resource
+def get_wikipedia():
+    import wikipediaapi
+    return wikipediaapi.Wikipedia(
+        language=wiki_config.get("language", "en"),
+        user_agent='MultiAgentResearchBot/1.0'
+    )
+
+@lazy_resource
+def get_local_index():
+    """The offline abstracts index, or None when none is configured or built"""
+    path = wiki_config.get("local_index")
+    if not path or not os.path.exists(path):
+        return None
+    from tools.wiki_index import WikiIndex
+    try:
+        index = WikiIndex(path)
+        logger.info(f"Loaded local Wikipedia index with {len(index)} articles from {path}")
+        return index
+    except (OSError, ValueError) as e:
+        logger.warning(f"Local Wikipedia index unavailable, using the live API: {str(e)}")
+        return None
+
+def _format(title: str, summary: str) -> str:
+    return f"Wikipedia ({title}):\n{summary[:500]}..."  # Trim for brevity
+
+@timed(TOOL_CALL_SECONDS, tool="wikipedia")
 def search_wikipedia(query: str) -> str:
+    # Local index first: a title or BM25 match takes milliseconds and no network
+    index = get_local_index()
+    if index is not None:
+        try:
+            article = index.lookup(query, min_score=wiki_config.get("min_score", 5.0))
+            if article:
+                CACHE_HITS.inc(cache="wikipedia_index")
+                return _format(article["title"], article["abstract"])
+            CACHE_MISSES.inc(cache="wikipedia_index")
+        except Exception as e:
+            FAILURES.inc(component="wikipedia_index")
+            logger.error(f"Local Wikipedia lookup failed: {str(e)}")
+
     try:
-        wiki = wikipediaapi.Wikipedia(
-            language='en',
-            user_agent='MultiAgentResearchBot/1.0'
-        )
-        page = wiki.page(query)
+        page = get_wikipedia().page(query)
         if not page.exists():
             return f"Wikipedia: No page found for '{query}'"
-        summary = page.summary[:500] + "..."  # Trim for brevity
-        return f"Wikipedia:\n{summary}"
+        return _format(page.title, page.summary)
     except Exception as e:
+        FAILURES.inc(component="wikipedia")
         return f"Wikipedia search failed: {str(e)}"
@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from utils.single_flight import SingleFlight
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+
+_current: ContextVar[Optional["BatchScope"]] = ContextVar("batch_scope", default=None)
+
+class BatchScope:
+    """Results shared by every query of one batch request.
+
+    Tool lookups and retrievals made while the scope is active are keyed and
+    kept for the lifetime of the batch, so overlapping topics reuse them.
+    Concurrent calls for the same key run once through SingleFlight.
+    """
+
+    def __init__(self):
+        self._flight = SingleFlight()
+        self._results: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def call(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            if key in self._results:
+                CACHE_HITS.inc(cache="batch_scope")
+                return self._results[key]
+        result, shared = self._flight.do(key, fn, *args, **kwargs)
+        if shared:
+            CACHE_HITS.inc(cache="batch_scope")
+        else:
+            CACHE_MISSES.inc(cache="batch_scope")
+            with self._lock:
+                self._results[key] = result
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+    @contextmanager
+    def activate(self):
+        """Make this the current scope for the calling thread or task"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+def batch_memo(namespace: str, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call fn, sharing the result within the active batch scope if there is one"""
+    scope = _current.get()
+    if scope is None:
+        return fn(*args, **kwargs)
+    return scope.call((namespace, key), fn, *args, **kwargs)
@@ -0,0 +1,43 @@
+import zlib
+from utils.logger import setup_logger
+
+logger = setup_logger("Compression")
+
+# One-byte codec tag in front of every blob, so the codec can change
+# without breaking entries written earlier
+ZLIB, ZSTD, RAW = b"z", b"s", b"r"
+
+def _zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+def compress_text(text: str, codec: str = "zlib", level: int = 6) -> bytes:
+    """Compress text into a self-describing blob ("zstd", "zlib" or "none")"""
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is not None:
+            return ZSTD + zstandard.ZstdCompressor(level=level).compress(data)
+        logger.warning("zstandard is not installed, falling back to zlib")
+        codec = "zlib"
+    if codec == "zlib":
+        return ZLIB + zlib.compress(data, level)
+    return RAW + data
+
+def decompress_text(blob: bytes) -> str:
+    tag, payload = blob[:1], blob[1:]
+    if tag == ZLIB:
+        data = zlib.decompress(payload)
+    elif tag == ZSTD:
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this entry")
+        data = zstandard.ZstdDecompressor().decompress(payload)
+    elif tag == RAW:
+        data = payload
+    else:
+        raise ValueError(f"Unknown compression tag {tag!r}")
+    return data.decode("utf-8")
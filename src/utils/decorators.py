@@ -0,0 +1,61 @@
+import functools
+import threading
+from collections import OrderedDict
+from utils.metrics import Histogram
+
+def timed(histogram: Histogram, **labels):
+    """Record the wrapped function's latency in histogram"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def lazy_resource(fn):
+    """Build the factory's result on first call and reuse it for the same arguments.
+
+    Used for agents and clients that are expensive to construct (models,
+    database handles, compiled graphs) so importing a module stays cheap.
+    Construction is guarded by a lock so concurrent first calls build once.
+    """
+    lock = threading.Lock()
+    instances = {}
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        if args in instances:
+            return instances[args]
+        with lock:
+            if args not in instances:
+                instances[args] = fn(*args)
+            return instances[args]
+
+    wrapper.cache_clear = instances.clear
+    return wrapper
+
+def bounded_resource(max_entries: int):
+    """Like lazy_resource, but keeps only the max_entries most recently used results.
+
+    For factories keyed by caller-supplied values (e.g. namespaces), where
+    lazy_resource would keep one instance per distinct value forever.
+    """
+    def decorator(fn):
+        lock = threading.Lock()
+        instances = OrderedDict()
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            with lock:
+                if args not in instances:
+                    instances[args] = fn(*args)
+                    while len(instances) > max_entries:
+                        instances.popitem(last=False)
+                instances.move_to_end(args)
+                return instances[args]
+
+        wrapper.is_cached = lambda *args: args in instances
+        wrapper.cache_clear = instances.clear
+        return wrapper
+    return decorator
@@ -0,0 +1,3 @@
+def normalize_query(query: str) -> str:
+    """Normalize a query for use as a cache or coalescing key"""
+    return " ".join(query.lower().split())
@@ -1,33 +1,146 @@
 # utils/logger.py
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+from typing import Dict, List, Optional
 
-LOG_DIR = "logs"
+from config.config_loader import config, resolve_path
+
+log_config = config.get("logging", {})
+
+LOG_DIR = resolve_path(log_config.get("directory", "./logs"))
 LOG_FILE = "app.log"
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def truncate(message: str, max_chars: int) -> str:
+    if max_chars <= 0 or len(message) <= max_chars:
+        return message
+    return f"{message[:max_chars]}... [{len(message) - max_chars} chars truncated]"
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: the queue may be full when stopping
+        self.queue.put(self._sentinel)
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """Hands records to a background thread that formats and writes them.
+
+    The calling thread only samples, truncates and enqueues. Records below
+    WARNING from loggers listed in sample_rates are kept with that
+    probability. When the queue is full, records are dropped and counted
+    instead of blocking the caller.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = 10000,
+                 max_message_chars: int = 2000, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__(queue.Queue(queue_size))
+        self.max_message_chars = max_message_chars
+        self.sample_rates = sample_rates or {}
+        self.dropped = 0
+        self._listener = _Listener(self.queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        self._running = True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.sample_rates.get(record.name)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may change later) and cap the size;
+        # formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = truncate(record.getMessage(), self.max_message_chars)
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Writes out everything still queued; logging.shutdown() may call this again
+        if self._running:
+            self._running = False
+            self._listener.stop()
+        super().close()
+
+_handler: Optional[AsyncLogHandler] = None
+_handler_lock = threading.Lock()
+
+def _shared_handler() -> AsyncLogHandler:
+    """The process-wide async handler, created on first use"""
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+
+            # File handler - full log
+            log_path = os.path.join(LOG_DIR, LOG_FILE)
+            if log_config.get("rotation", "external") == "size":
+                # Rolls over in this process, so only for a single worker
+                file_handler = logging.handlers.RotatingFileHandler(
+                    log_path,
+                    maxBytes=log_config.get("max_megabytes", 10) * 1024 * 1024,
+                    backupCount=log_config.get("backup_count", 5),
+                    encoding="utf-8"
+                )
+            else:
+                # Workers append to one file; logrotate moves it and each reopens
+                file_handler = logging.handlers.WatchedFileHandler(log_path, encoding="utf-8")
+            # The logger level (set in setup_logger) is the only threshold for the file
+            file_handler.setLevel(logging.NOTSET)
+            if log_config.get("format", "json") == "json":
+                file_handler.setFormatter(JsonFormatter())
+            else:
+                file_handler.setFormatter(logging.Formatter(
+                    "%(asctime)s | %(name)s | %(levelname)s | %(message)s", "%Y-%m-%d %H:%M:%S"
+                ))
+
+            # Console handler - only show key warnings
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.WARNING)
+            console_handler.setFormatter(logging.Formatter("🔔 %(message)s"))
+
+            _handler = AsyncLogHandler(
+                [file_handler, console_handler],
+                queue_size=log_config.get("queue_size", 10000),
+                max_message_chars=log_config.get("max_message_chars", 2000),
+                sample_rates=log_config.get("sample_rates", {})
+            )
+            atexit.register(_handler.close)
+        return _handler
+
 def setup_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
 
     if not logger.hasHandlers():
-        logger.setLevel(logging.DEBUG)  # log everything, decide output by handler level
-
-        os.makedirs(LOG_DIR, exist_ok=True)
-
-        # File handler - full log
-        file_handler = logging.FileHandler(os.path.join(LOG_DIR, LOG_FILE), encoding="utf-8")
-        file_handler.setLevel(logging.INFO)
-        file_format = logging.Formatter(
-            "%(asctime)s | %(name)s | %(levelname)s | %(message)s", "%Y-%m-%d %H:%M:%S"
-        )
-        file_handler.setFormatter(file_format)
-        logger.addHandler(file_handler)
-
-        # Console handler - only show key warnings
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.WARNING)
-        console_format = logging.Formatter("🔔 %(message)s")
-        console_handler.setFormatter(console_format)
-        logger.addHandler(console_handler)
+        # Records below this level are never created, so DEBUG payloads cost nothing
+        logger.setLevel(log_config.get("level", "INFO"))
+        logger.addHandler(_shared_handler())
 
     return logger
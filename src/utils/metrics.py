@@ -0,0 +1,148 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, sized for LLM calls as well as vector searches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. cache hits or failures"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations, from which p50/p99 are derived"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # Per series: one count per bucket, then +Inf count, then sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, bucket_count in zip(self.buckets, series):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+                cumulative += series[len(self.buckets)]
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+AGENT_RUN_SECONDS = REGISTRY.histogram("research_agent_run_seconds", "Agent run latency", ["agent"])
+TOOL_CALL_SECONDS = REGISTRY.histogram("research_tool_call_seconds", "External tool call latency", ["tool"])
+LLM_CALL_SECONDS = REGISTRY.histogram("research_llm_call_seconds", "LLM call latency", ["model"])
+LLM_HEDGES = REGISTRY.counter("research_llm_hedges_total", "Hedged LLM requests issued and which request won", ["outcome"])
+LLM_RETRIES = REGISTRY.counter("research_llm_retries_total", "LLM calls retried after a failure")
+LLM_QUEUE_SECONDS = REGISTRY.histogram("research_llm_queue_seconds", "Time LLM calls waited for rate limit budget", ["model", "priority"])
+EMBEDDING_BATCH_SECONDS = REGISTRY.histogram("research_embedding_batch_seconds", "Embedding batch latency", ["operation"])
+EMBEDDED_TEXTS = REGISTRY.counter("research_embedded_texts_total", "Texts embedded", ["operation"])
+VECTOR_SEARCH_SECONDS = REGISTRY.histogram("research_vector_search_seconds", "Vector similarity search latency")
+HTTP_REQUEST_SECONDS = REGISTRY.histogram("research_http_request_seconds", "HTTP request latency", ["method", "route", "status"])
+CACHE_HITS = REGISTRY.counter("research_cache_hits_total", "Cache and coalescing hits", ["cache"])
+CACHE_MISSES = REGISTRY.counter("research_cache_misses_total", "Cache and coalescing misses", ["cache"])
+FAILURES = REGISTRY.counter("research_failures_total", "Failed agent, tool and LLM operations", ["component"])
+TRACES = REGISTRY.counter("research_traces_total", "Debug traces written, dropped, failed or expired", ["outcome"])
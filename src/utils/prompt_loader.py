@@ -1,16 +1,70 @@
 import os
+import re
+import hashlib
+from typing import Dict, List
+from utils.decorators import lazy_resource
+from utils.tokens import count_tokens
 PROMPT_DIR = os.path.join(os.path.dirname(__file__),"../prompt_library")
 
-def load_prompt(filename: str) -> str:
-    base_dir = os.path.abspath(os.path.dirname(__file__))  # full absolute path
-    prompt_path = os.path.join(base_dir, "../prompt_library", filename)
-    prompt_path = os.path.abspath(prompt_path)  # normalize ../
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+class PromptTemplate:
+    """A prompt parsed once into literal segments and {{placeholder}} names.
+
+    render() fills every placeholder in a single pass, so inserted content is
+    copied once and is never rescanned for placeholders of its own.
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        # Alternating literal, field, literal, ... always starting and ending with a literal
+        self._parts: List[str] = PLACEHOLDER.split(text)
+        self.fields = tuple(dict.fromkeys(self._parts[1::2]))
+        self._static_token_count = None
 
-    if not os.path.exists(prompt_path):
+    @property
+    def static_token_count(self) -> int:
+        """Tokens in the template with every placeholder empty"""
+        if self._static_token_count is None:
+            self._static_token_count = count_tokens("".join(self._parts[0::2]))
+        return self._static_token_count
+
+    def render(self, **values: str) -> str:
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise ValueError(f"Prompt {self.name} is missing values for: {', '.join(missing)}")
+        parts = self._parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+@lazy_resource
+def get_prompt_registry() -> Dict[str, PromptTemplate]:
+    """Every template in the prompt library, read and parsed once"""
+    prompt_dir = os.path.abspath(PROMPT_DIR)
+    registry = {}
+    for filename in sorted(os.listdir(prompt_dir)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(prompt_dir, filename), "r", encoding="utf-8") as f:
+                registry[filename] = PromptTemplate(filename, f.read())
+    return registry
+
+def get_prompt_template(filename: str) -> PromptTemplate:
+    template = get_prompt_registry().get(filename)
+    if template is None:
+        prompt_path = os.path.abspath(os.path.join(PROMPT_DIR, filename))
         raise FileNotFoundError(f"❌ Prompt not found: {prompt_path}")
-    
-    with open(prompt_path, "r", encoding="utf-8") as f:
-        return f.read()
+    return template
 
-    
+def load_prompt(filename: str) -> str:
+    return get_prompt_template(filename).text
 
+@lazy_resource
+def prompt_library_hash() -> str:
+    """Hash of every prompt template, used to version cached outputs"""
+    digest = hashlib.sha256()
+    for filename, template in get_prompt_registry().items():
+        digest.update(filename.encode("utf-8"))
+        digest.update(template.text.encode("utf-8"))
+    return digest.hexdigest()[:16]
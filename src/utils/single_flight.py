@@ -0,0 +1,117 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Tuple
+
+
+class _Call:
+    """An in-flight execution shared by every caller with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+        # Items produced so far by a streamed call
+        self.items: List[Any] = []
+        self.changed = threading.Condition()
+        self.finished = False
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running block until it finishes and receive the same result (or the
+    same exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """Run fn or join the in-flight call for key, returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key: Hashable, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> Tuple[Iterator[Any], bool]:
+        """Iterate fn's items or follow the in-flight iteration for key, returns (items, shared).
+
+        Callers joining late first receive every item produced so far, then
+        new items as the leader produces them. Iterate the items to the end:
+        a leader that stops early fails the call for its followers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+        if leader:
+            return self._lead(key, call, fn, args, kwargs), False
+        return self._follow(call), True
+
+    def _lead(self, key: Hashable, call: _Call, fn, args, kwargs) -> Iterator[Any]:
+        try:
+            for item in fn(*args, **kwargs):
+                with call.changed:
+                    call.items.append(item)
+                    call.changed.notify_all()
+                yield item
+        except GeneratorExit:
+            call.error = RuntimeError("Shared call was abandoned before it finished")
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            with call.changed:
+                call.finished = True
+                call.changed.notify_all()
+            call.done.set()
+
+    def _follow(self, call: _Call) -> Iterator[Any]:
+        index = 0
+        while True:
+            with call.changed:
+                while index >= len(call.items) and not call.finished:
+                    call.changed.wait()
+                if index < len(call.items):
+                    item = call.items[index]
+                elif call.error is not None:
+                    raise call.error
+                else:
+                    return
+            index += 1
+            yield item
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        with self._lock:
+            return len(self._calls)
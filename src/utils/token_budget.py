@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional, Tuple
+from utils.tokens import get_encoding
+
+TRIM_MARKER = "\n[... {count} tokens trimmed ...]\n"
+
+class TokenBudgetManager:
+    """Fit named prompt sections into a model's context window.
+
+    Each section is measured once with tiktoken and gets a configurable share
+    of the tokens left after the template, section headers and the reserved
+    output. Sections that need less than their share give the surplus to the
+    others; sections that still exceed their allocation are compressed
+    (duplicate lines dropped) and then truncated keeping their head and tail.
+    """
+
+    def __init__(
+        self,
+        context_window: int = 8192,
+        reserve_output_tokens: int = 1500,
+        shares: Optional[Dict[str, float]] = None,
+        encoding=None
+    ):
+        self.context_window = context_window
+        self.reserve_output_tokens = reserve_output_tokens
+        self.shares = shares or {}
+        self.encoding = encoding
+
+    def _encode(self, text: str) -> List[int]:
+        encoding = self.encoding or get_encoding()
+        return encoding.encode(text, disallowed_special=())
+
+    def _decode(self, tokens: List[int]) -> str:
+        return (self.encoding or get_encoding()).decode(tokens)
+
+    def fit(self, sections: Dict[str, str], fixed_tokens: int = 0) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Return sections trimmed to the budget and a record of the decisions.
+
+        fixed_tokens covers everything outside the sections, i.e. the static
+        template tokens and section headers.
+        """
+        available = max(0, self.context_window - self.reserve_output_tokens - fixed_tokens)
+        tokens = {name: self._encode(text) for name, text in sections.items()}
+        sizes = {name: len(t) for name, t in tokens.items()}
+        report = {
+            "context_window": self.context_window,
+            "reserved_output": self.reserve_output_tokens,
+            "fixed_tokens": fixed_tokens,
+            "available": available,
+            "requested": sum(sizes.values()),
+            "sections": {}
+        }
+
+        if sum(sizes.values()) <= available:
+            for name, size in sizes.items():
+                report["sections"][name] = {"tokens": size, "allocated": size, "final": size, "action": "kept"}
+            report["used"] = sum(sizes.values())
+            return dict(sections), report
+
+        allocation = self._allocate(sizes, available)
+        fitted = {}
+        for name, text in sections.items():
+            size, limit = sizes[name], allocation[name]
+            if size <= limit:
+                fitted[name], final, action = text, size, "kept"
+            else:
+                fitted[name], final, action = self._shrink(text, tokens[name], limit)
+            report["sections"][name] = {"tokens": size, "allocated": limit, "final": final, "action": action}
+        report["used"] = sum(s["final"] for s in report["sections"].values())
+        return fitted, report
+
+    def _allocate(self, sizes: Dict[str, int], available: int) -> Dict[str, int]:
+        """Share-weighted allocation that redistributes unused share"""
+        allocation = {}
+        pending = dict(sizes)
+        remaining = available
+        while pending:
+            total_share = sum(self.shares.get(name, 1.0) for name in pending) or 1.0
+            quotas = {name: int(remaining * self.shares.get(name, 1.0) / total_share) for name in pending}
+            satisfied = [name for name in pending if pending[name] <= quotas[name]]
+            if not satisfied:
+                allocation.update(quotas)
+                break
+            for name in satisfied:
+                allocation[name] = pending.pop(name)
+                remaining -= allocation[name]
+        return allocation
+
+    def _shrink(self, text: str, tokens: List[int], limit: int) -> Tuple[str, int, str]:
+        # Cheap compression first: repeated lines are common in tool and RAG output
+        seen = set()
+        lines = []
+        for line in text.splitlines():
+            key = line.strip()
+            if key and key in seen:
+                continue
+            seen.add(key)
+            lines.append(line)
+        compressed = "\n".join(lines)
+        if compressed != text:
+            tokens = self._encode(compressed)
+            if len(tokens) <= limit:
+                return compressed, len(tokens), "compressed"
+
+        marker_tokens = len(self._encode(TRIM_MARKER.format(count=len(tokens))))
+        keep = max(0, limit - marker_tokens)
+        if keep == 0:
+            return "", 0, "dropped"
+        head = keep * 2 // 3
+        tail = keep - head
+        trimmed = self._decode(tokens[:head]) + TRIM_MARKER.format(count=len(tokens) - keep) + (self._decode(tokens[-tail:]) if tail else "")
+        return trimmed, keep + marker_tokens, "truncated"
@@ -0,0 +1,13 @@
+from utils.decorators import lazy_resource
+
+ENCODING_NAME = "cl100k_base"
+
+@lazy_resource
+def get_encoding():
+    """Shared tiktoken encoding, loaded on first use"""
+    import tiktoken
+    return tiktoken.get_encoding(ENCODING_NAME)
+
+def count_tokens(text: str) -> int:
+    """Get token count for text"""
+    return len(get_encoding().encode(text, disallowed_special=()))
@@ -0,0 +1,177 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.compression import compress_text, decompress_text
+from utils.decorators import lazy_resource
+from utils.logger import setup_logger
+from utils.metrics import TRACES
+from config.config_loader import config, resolve_path
+
+logger = setup_logger("TraceStore")
+
+TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+SUFFIX = ".trace"
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+class TraceStore:
+    """Debug traces kept out of band, one compressed file per trace.
+
+    submit() only queues the payload; a background thread serializes,
+    compresses and writes it. Pruning to the retention limits (count, age
+    and total bytes, oldest first) scans the whole directory, so it runs
+    every prune_interval seconds, and between those only when this
+    process's own writes since the last scan push it over a limit. Traces
+    submitted but not yet written are served from memory, by the
+    submitting process only. When the queue is full, traces are dropped
+    rather than slowing the request down.
+    """
+
+    def __init__(self, directory: str, max_traces: int = 1000, max_age_seconds: float = 86400,
+                 max_bytes: int = 200 * 1024 * 1024, queue_size: int = 256, compression: str = "zlib",
+                 prune_interval: float = 300):
+        self.directory = directory
+        self.max_traces = max_traces
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.prune_interval = prune_interval
+        os.makedirs(directory, exist_ok=True)
+        # Traces and bytes on disk at the last scan plus this process's writes since
+        self._stored_count = 0
+        self._stored_bytes = 0
+
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def _path(self, trace_id: str) -> str:
+        return os.path.join(self.directory, trace_id + SUFFIX)
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """(written_at, trace_id, size) of every stored trace, oldest first"""
+        index = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    # Pruned by another process meanwhile
+                    continue
+                index.append((stat.st_mtime, name[:-len(SUFFIX)], stat.st_size))
+        return sorted(index)
+
+    def submit(self, trace_id: str, payload: Dict[str, Any]) -> bool:
+        """Queue a trace for writing; returns False if it was dropped"""
+        with self._lock:
+            self._pending[trace_id] = payload
+        try:
+            self._queue.put_nowait((trace_id, payload))
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(trace_id, None)
+            TRACES.inc(outcome="dropped")
+            logger.warning(f"Trace queue full, dropped trace {trace_id}")
+            return False
+        return True
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        if not TRACE_ID_PATTERN.match(trace_id):
+            return None
+        with self._lock:
+            if trace_id in self._pending:
+                return self._pending[trace_id]
+        try:
+            # Expired traces may not be pruned yet
+            if time.time() - os.path.getmtime(self._path(trace_id)) > self.max_age_seconds:
+                return None
+            with open(self._path(trace_id), "rb") as f:
+                return json.loads(decompress_text(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued traces are written (for tests and shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _run(self):
+        next_prune = time.monotonic()
+        while True:
+            over_limit = self._stored_count > self.max_traces or self._stored_bytes > self.max_bytes
+            if over_limit or time.monotonic() >= next_prune:
+                # On a timer too, for age limits, quiet servers and other workers' writes
+                self._prune_safely()
+                next_prune = time.monotonic() + self.prune_interval
+            try:
+                trace_id, payload = self._queue.get(timeout=max(0.0, next_prune - time.monotonic()))
+            except queue.Empty:
+                continue
+            try:
+                self._stored_bytes += self._write(trace_id, payload)
+                self._stored_count += 1
+                TRACES.inc(outcome="written")
+            except Exception as e:
+                TRACES.inc(outcome="failed")
+                logger.error(f"Failed to write trace {trace_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.pop(trace_id, None)
+                self._queue.task_done()
+
+    def _write(self, trace_id: str, payload: Dict[str, Any]) -> int:
+        blob = compress_text(json.dumps(payload, default=str), self.compression)
+        path = self._path(trace_id)
+        with open(path + ".tmp", "wb") as f:
+            f.write(blob)
+        os.replace(path + ".tmp", path)
+        return len(blob)
+
+    def _prune_safely(self):
+        try:
+            self._prune()
+        except Exception as e:
+            logger.error(f"Failed to prune traces: {str(e)}")
+
+    def _prune(self):
+        """Drop the oldest traces until every retention limit holds.
+
+        The directory is rescanned each time, so the limits cover traces
+        written by every worker process sharing it.
+        """
+        index = self._scan()
+        cutoff = time.time() - self.max_age_seconds
+        total = sum(size for _, _, size in index)
+        while index and (len(index) > self.max_traces or total > self.max_bytes or index[0][0] < cutoff):
+            _, trace_id, size = index.pop(0)
+            total -= size
+            try:
+                os.unlink(self._path(trace_id))
+            except FileNotFoundError:
+                pass
+            TRACES.inc(outcome="expired")
+        self._stored_count, self._stored_bytes = len(index), total
+
+tracing_config = config.get("tracing", {})
+
+@lazy_resource
+def get_trace_store() -> TraceStore:
+    return TraceStore(
+        directory=resolve_path(tracing_config.get("directory", "./data/traces")),
+        max_traces=tracing_config.get("max_traces", 1000),
+        max_age_seconds=tracing_config.get("max_age_hours", 24) * 3600,
+        max_bytes=tracing_config.get("max_megabytes", 200) * 1024 * 1024,
+        queue_size=tracing_config.get("queue_size", 256),
+        compression=tracing_config.get("compression", "zlib"),
+        prune_interval=tracing_config.get("prune_interval_seconds", 300)
+    )
@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger("ReportCache")
+
+class _CacheEntry:
+    def __init__(self, query: str, vector: np.ndarray, version: Tuple[str, ...], result: Dict[str, Any]):
+        self.query = query
+        self.vector = vector
+        self.version = version
+        self.result = result
+        self.created_at = time.time()
+
+class SemanticReportCache:
+    """Report-level cache that serves near-duplicate queries by embedding similarity.
+
+    Entries are tagged with a version (corpus version and prompt template hash);
+    lookups only consider entries whose version matches, so reports built on an
+    older corpus or older prompts are never served. Expired entries are dropped
+    on access and the least recently used entry is evicted once the cache is full.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], List[float]],
+        similarity_threshold: float = 0.88,
+        ttl_seconds: float = 3600,
+        max_entries: int = 500
+    ):
+        self.embed_query = embed_query
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query as a unit vector"""
+        vector = np.asarray(self.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, vector: np.ndarray, version: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """Return the closest cached report above the similarity threshold"""
+        with self._lock:
+            self._purge(version)
+            if not self._entries:
+                return None
+
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[k].vector for k in keys])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.similarity_threshold:
+                return None
+
+            entry = self._entries[keys[best]]
+            self._entries.move_to_end(keys[best])
+            return {
+                "result": entry.result,
+                "similarity": similarity,
+                "matched_query": entry.query
+            }
+
+    def store(self, query: str, vector: np.ndarray, version: Tuple[str, ...], result: Dict[str, Any]):
+        """Cache a report under the given version"""
+        with self._lock:
+            self._entries[uuid.uuid4().hex] = _CacheEntry(query, vector, version, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _purge(self, version: Tuple[str, ...]):
+        """Drop expired entries and entries from other versions"""
+        now = time.time()
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry.version != version or now - entry.created_at > self.ttl_seconds
+        ]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.info("Evicted %d stale report cache entries", len(stale))
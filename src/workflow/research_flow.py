@@ -1,16 +1,21 @@
-from langgraph.graph import StateGraph, END
-from agent.search_agent import SearchAgent
-from agent.analysis_agent import AnalysisAgent
-from agent.generation_agent import GenerationAgent
-from agent.tool_agent import ToolAgent
-from agent.rag_agent import RAGAgent
-from agent.memory_agent import MemoryAgent
+from utils.prompt_loader import prompt_library_hash
+from utils.logger import setup_logger
+from utils.decorators import lazy_resource, bounded_resource
+from utils.metrics import CACHE_HITS, CACHE_MISSES
+from rag.namespaces import DEFAULT_NAMESPACE, NamespaceNotFound
+from workflow.routing import TOOL_NAMES, NodeTimings, classify_tools, history_relevance
 from config.config_loader import config
-from typing import TypedDict
+from typing import TypedDict, Dict, Any, Iterator, List, Annotated
+import operator
+import time
+
+logger = setup_logger("ResearchFlow")
 
 class ResearchState(TypedDict):
     query: str
     debug: bool
+    namespace: str
+    filters: dict
     search_output: str
     analysis_output: str
     final_report: str
@@ -22,86 +27,385 @@ class ResearchState(TypedDict):
     generation_debug: dict
     rag_debug: dict
     memory_debug: dict
-    
+    tool_debug: dict
+    route: dict
+    # Each node appends its name, so the final state lists the nodes that ran
+    nodes_run: Annotated[List[str], operator.add]
+
+
+# Agents load models, open the vector store and build API clients, so they
+# are created on first use rather than when this module is imported.
+@lazy_resource
+def get_search_agent():
+    from agent.search_agent import SearchAgent
+    return SearchAgent()
+
+@lazy_resource
+def get_analysis_agent():
+    from agent.analysis_agent import AnalysisAgent
+    return AnalysisAgent()
+
+@lazy_resource
+def get_generation_agent():
+    from agent.generation_agent import GenerationAgent
+    return GenerationAgent()
+
+@lazy_resource
+def get_tool_agent():
+    from agent.tool_agent import ToolAgent
+    return ToolAgent()
 
-search_agent = SearchAgent()
-analysis_agent = AnalysisAgent()
-generation_agent = GenerationAgent()
-tool_agent = ToolAgent()
-rag_agent = RAGAgent()
-memory_agent = MemoryAgent()
+# Agents of the least recently used namespaces are dropped beyond this
+MAX_OPEN_NAMESPACES = config["vector_store"].get("max_open_namespaces", 32)
+
+@bounded_resource(MAX_OPEN_NAMESPACES)
+def _rag_agent(namespace: str):
+    from agent.rag_agent import RAGAgent
+    return RAGAgent(namespace)
+
+def get_rag_agent(namespace: str = DEFAULT_NAMESPACE, create: bool = True):
+    """RAG agent over the namespace's document collection.
+
+    Opening a namespace creates its collections, so reads pass create=False
+    to get NamespaceNotFound for a namespace nothing was ingested into.
+    """
+    if not create and not _rag_agent.is_cached(namespace):
+        from rag.vector_store import namespace_exists
+        if not namespace_exists(config["vector_store"], namespace):
+            raise NamespaceNotFound(f"Namespace '{namespace}' has no documents")
+    return _rag_agent(namespace)
+
+@lazy_resource
+def get_memory_agent():
+    from agent.memory_agent import MemoryAgent
+    return MemoryAgent()
 
 def run_search_agent(state: ResearchState) -> dict:
-    result = search_agent.run(state["query"], debug=state.get("debug", False))
+    result = get_search_agent().run(state["query"], debug=state.get("debug", False))
     return {
         "search_output": result["output"],
         "search_debug": result["debug"]
     }
 
 def run_tool_agent(state: ResearchState) -> dict:
-    result = tool_agent.run(state["query"], debug=state.get("debug", False))
+    tools = state.get("route", {}).get("tool_agent", {}).get("tools")
+    result = get_tool_agent().run(state["query"], debug=state.get("debug", False), tools=tools)
     return {
         "tool_output": result["output"],
         "tool_debug": result["debug"]}
 
 def run_rag_agent(state: ResearchState) -> dict:
     """Run RAG agent to get context-aware responses"""
-    if not config["tools"].get("enable_rag", False):
-        return {"rag_output": ""}
-    
-    result = rag_agent.query_with_rag(state["query"], debug=state.get("debug", False))
+    namespace = state.get("namespace", DEFAULT_NAMESPACE)
+    try:
+        rag_agent = get_rag_agent(namespace, create=False)
+    except NamespaceNotFound as e:
+        logger.warning(str(e))
+        return {"rag_output": f"No documents in namespace '{namespace}'.", "rag_debug": {}}
+    result = rag_agent.query_with_rag(
+        state["query"], debug=state.get("debug", False), filters=state.get("filters")
+    )
     return {
         "rag_output": result["output"],
         "rag_debug": result["debug"]
     }
 def run_memory_agent(state: ResearchState) -> dict:
     """Run memory agent to analyze context from previous research"""
-    result = memory_agent.analyze_context(state["query"])
+    result = get_memory_agent().analyze_context(state["query"])
     return {"memory_output": result["output"] if isinstance(result, dict)
             else result,
             "memory_debug":result.get("debug",{})if isinstance(result,dict)
             else{}}
 
-def run_analysis_agent(state: ResearchState) -> dict:
-    combined_input = (
-        "🔎 Search Summary:\n" + state["search_output"] +
-        "\n\n🧠 Memory Context:\n" + state.get("memory_output", "") +
-        "\n\n📚 RAG Context:\n" + state.get("rag_output", "") +
-        "\n\n🌐 External Sources:\n" + state.get("tool_output", "")
+ANALYSIS_HEADERS = {
+    "search": "🔎 Search Summary:\n",
+    "memory": "\n\n🧠 Memory Context:\n",
+    "rag": "\n\n📚 RAG Context:\n",
+    "tools": "\n\n🌐 External Sources:\n",
+}
+GENERATION_HEADERS = {
+    "analysis": "Insights:\n",
+    "tools": "\n\nReferenced Sources:\n",
+}
+
+budget_config = config.get("prompt_budget", {})
+
+@lazy_resource
+def get_budget_manager(stage: str):
+    from utils.token_budget import TokenBudgetManager
+    return TokenBudgetManager(
+        context_window=budget_config.get("context_window", 8192),
+        reserve_output_tokens=budget_config.get("reserve_output_tokens", 1500),
+        shares=budget_config.get(f"{stage}_shares", {})
     )
+
+def assemble_prompt_input(stage: str, headers: Dict[str, str], sections: Dict[str, str], template) -> tuple:
+    """Join sections under their headers, trimmed to the stage's token budget"""
+    if not budget_config.get("enabled", True):
+        return "".join(headers[name] + sections[name] for name in headers), {}
+
+    from utils.tokens import count_tokens
+    fixed_tokens = template.static_token_count + count_tokens("".join(headers.values()))
+    fitted, report = get_budget_manager(stage).fit(sections, fixed_tokens=fixed_tokens)
+    trimmed = [name for name, section in report["sections"].items() if section["action"] != "kept"]
+    if trimmed:
+        logger.info("%s prompt over budget, trimmed sections: %s", stage, ", ".join(trimmed))
+    return "".join(headers[name] + fitted[name] for name in headers), report
+
+def run_analysis_agent(state: ResearchState) -> dict:
+    analysis_agent = get_analysis_agent()
+    combined_input, budget = assemble_prompt_input("analysis", ANALYSIS_HEADERS, {
+        "search": state["search_output"],
+        "memory": state.get("memory_output", ""),
+        "rag": state.get("rag_output", ""),
+        "tools": state.get("tool_output", ""),
+    }, analysis_agent.prompt_template)
     result = analysis_agent.run(combined_input, debug=state.get("debug", False))
+    if state.get("debug", False):
+        result["debug"]["budget"] = budget
     return {
         "analysis_output": result["output"],
         "analysis_debug": result["debug"]
     }
 
 def run_generation_agent(state: ResearchState) -> dict:
-    combined_input = (
-        "Insights:\n" + state["analysis_output"] +
-        "\n\nReferenced Sources:\n" + state.get("tool_output", "")
-    )
+    generation_agent = get_generation_agent()
+    combined_input, budget = assemble_prompt_input("generation", GENERATION_HEADERS, {
+        "analysis": state["analysis_output"],
+        "tools": state.get("tool_output", ""),
+    }, generation_agent.prompt_template)
     result = generation_agent.run(combined_input, debug=state.get("debug", False))
+    if state.get("debug", False):
+        result["debug"]["budget"] = budget
     return {
         "final_report": result["output"],
         "generation_debug": result["debug"]
     }
 
+routing_config = config.get("routing", {})
+node_timings = NodeTimings()
+
+# Nodes between search and analysis that routing may skip, in graph order
+OPTIONAL_NODES = ["memory", "rag", "tool_agent"]
+
+def plan_route(state: ResearchState) -> dict:
+    """Decide which optional nodes can contribute, using cheap pre-checks only"""
+    query = state["query"]
+    tools_config = config["tools"]
+    enabled_tools = [name for name in TOOL_NAMES if tools_config.get(f"enable_{name}", True)]
+    route = {node: {"run": True, "reason": "routing disabled"} for node in OPTIONAL_NODES}
+    route["tool_agent"]["tools"] = enabled_tools
+
+    if not tools_config.get("enable_rag", False):
+        route["rag"] = {"run": False, "reason": "RAG disabled"}
+    if not enabled_tools:
+        route["tool_agent"] = {"run": False, "reason": "no tools enabled", "tools": []}
+
+    if routing_config.get("enabled", True):
+        previous_queries = get_memory_agent().recent_queries(5)
+        relevance = history_relevance(query, previous_queries)
+        if not previous_queries:
+            route["memory"] = {"run": False, "reason": "no research history"}
+        elif relevance < routing_config.get("memory_min_relevance", 0.2):
+            route["memory"] = {"run": False, "reason": f"history not relevant (overlap {relevance:.2f})"}
+        else:
+            route["memory"] = {"run": True, "reason": f"relevant history (overlap {relevance:.2f})"}
+
+        if route["rag"]["run"]:
+            try:
+                chunks = get_rag_agent(state.get("namespace", DEFAULT_NAMESPACE), create=False).vector_store.count()
+            except NamespaceNotFound:
+                chunks = 0
+            if chunks < routing_config.get("rag_min_chunks", 1):
+                route["rag"] = {"run": False, "reason": "vector store is empty"}
+            else:
+                route["rag"] = {"run": True, "reason": f"{chunks} chunks indexed"}
+
+        if route["tool_agent"]["run"] and routing_config.get("classify_tools", True):
+            tools = classify_tools(query, enabled_tools)
+            route["tool_agent"] = {"run": True, "reason": "query classifier", "tools": tools}
+
+    skipped = [node for node in OPTIONAL_NODES if not route[node]["run"]]
+    if skipped:
+        logger.info("Routing skips %s for query: %s", ", ".join(skipped), query)
+    route["estimated_time_saved"] = sum(node_timings.estimate(node) for node in skipped)
+    return {"route": route}
+
+def _next_node(after: str):
+    """Conditional edge: the next optional node the route keeps, else analysis"""
+    remaining = OPTIONAL_NODES[OPTIONAL_NODES.index(after) + 1:] if after in OPTIONAL_NODES else OPTIONAL_NODES
+    def choose(state: ResearchState) -> str:
+        route = state.get("route", {})
+        for node in remaining:
+            if route.get(node, {}).get("run", True):
+                return node
+        return "analyse"
+    return choose, remaining + ["analyse"]
+
+def _stream_writer():
+    """Writer for progress events; a no-op when the graph is not being streamed"""
+    try:
+        from langgraph.config import get_stream_writer
+        return get_stream_writer()
+    except (ImportError, RuntimeError):
+        return lambda event: None
+
+def _observed(name: str, node):
+    """Emit node start and finish events (with duration) to stream consumers"""
+    def wrapper(state: ResearchState) -> dict:
+        write = _stream_writer()
+        write({"event": "node_start", "node": name})
+        start = time.perf_counter()
+        try:
+            update = node(state)
+        except Exception as e:
+            write({"event": "node_error", "node": name, "duration": time.perf_counter() - start, "error": str(e)})
+            raise
+        write({"event": "node_finish", "node": name, "duration": time.perf_counter() - start})
+        return update
+    return wrapper
+
+def _tracked(name: str, node):
+    """Record the node's duration and that it ran"""
+    def wrapper(state: ResearchState) -> dict:
+        start = time.perf_counter()
+        update = node(state)
+        node_timings.record(name, time.perf_counter() - start)
+        return {**update, "nodes_run": [name]}
+    return _observed(name, wrapper)
+
+def routing_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Which nodes ran or were skipped, and the estimated time saved"""
+    route = result.get("route", {})
+    return {
+        "nodes_run": result.get("nodes_run", []),
+        "skipped": {node: route[node]["reason"] for node in OPTIONAL_NODES if node in route and not route[node]["run"]},
+        "tools": route.get("tool_agent", {}).get("tools", []),
+        "estimated_time_saved": round(route.get("estimated_time_saved", 0.0), 3)
+    }
+
 def build_graph():
+    from langgraph.graph import StateGraph, END
+
     graph_builder = StateGraph(ResearchState)
-    graph_builder.add_node("search", run_search_agent)
-    graph_builder.add_node("memory", run_memory_agent)
-    graph_builder.add_node("rag", run_rag_agent)
-    graph_builder.add_node("tool_agent", run_tool_agent)
-    graph_builder.add_node("analyse", run_analysis_agent)
-    graph_builder.add_node("generate", run_generation_agent)
+    graph_builder.add_node("search", _tracked("search", run_search_agent))
+    graph_builder.add_node("route", _observed("route", plan_route))
+    graph_builder.add_node("memory", _tracked("memory", run_memory_agent))
+    graph_builder.add_node("rag", _tracked("rag", run_rag_agent))
+    graph_builder.add_node("tool_agent", _tracked("tool_agent", run_tool_agent))
+    graph_builder.add_node("analyse", _tracked("analyse", run_analysis_agent))
+    graph_builder.add_node("generate", _tracked("generate", run_generation_agent))
 
     graph_builder.set_entry_point("search")
-    graph_builder.add_edge("search","memory")
-    graph_builder.add_edge("memory", "rag")  # Search -> RAG
-    graph_builder.add_edge("rag", "tool_agent")  # RAG -> Tools
-    graph_builder.add_edge("tool_agent", "analyse")
+    graph_builder.add_edge("search", "route")
+    # Search -> Memory -> RAG -> Tools -> Analysis, skipping nodes the route rules out
+    for source in ["route"] + OPTIONAL_NODES:
+        choose, destinations = _next_node(source)
+        graph_builder.add_conditional_edges(source, choose, destinations)
     graph_builder.add_edge("analyse", "generate")
     graph_builder.add_edge("generate", END)
     return graph_builder.compile()
 
-research_workflow = build_graph()
\ No newline at end of file
+@lazy_resource
+def get_research_workflow():
+    """Compiled research graph, built on first use"""
+    return build_graph()
+
+cache_config = config.get("report_cache", {})
+
+@bounded_resource(MAX_OPEN_NAMESPACES)
+def get_report_cache(namespace: str):
+    """Report cache for one namespace; reports depend on its documents"""
+    from workflow.report_cache import SemanticReportCache
+    from rag.vector_store import shared_embedding_model
+    return SemanticReportCache(
+        embed_query=shared_embedding_model(config["vector_store"]).embed_query,
+        similarity_threshold=cache_config.get("similarity_threshold", 0.88),
+        ttl_seconds=cache_config.get("ttl_seconds", 3600),
+        max_entries=cache_config.get("max_entries", 500)
+    )
+
+def stream_research(workflow_input: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Run the research workflow behind the semantic report cache, as events.
+
+    Yields {"event": "node_start", "node": name} when a graph node starts,
+    {"event": "node", "node": name, "update": {...}, "duration": seconds}
+    when it finishes (node_error if it raises) and {"event": "result",
+    "result": {...}} with the final state last. Events carry "elapsed",
+    seconds since the run started. A cache hit yields only the result.
+    """
+    research_workflow = get_research_workflow()
+    # Debug runs want fresh per-agent traces, so they always execute; filtered
+    # runs use a subset of the corpus, so a cached report may not apply
+    cacheable = cache_config.get("enabled", True) and not workflow_input.get("debug", False) and not workflow_input.get("filters")
+
+    if cacheable:
+        namespace = workflow_input.get("namespace", DEFAULT_NAMESPACE)
+        report_cache = get_report_cache(namespace)
+        try:
+            corpus_version = get_rag_agent(namespace, create=False).vector_store.get_corpus_version()
+        except NamespaceNotFound:
+            corpus_version = "initial"
+        version = (corpus_version, prompt_library_hash())
+        vector = report_cache.embed(workflow_input["query"])
+        hit = report_cache.lookup(vector, version)
+        if hit:
+            CACHE_HITS.inc(cache="report_cache")
+            logger.info("Report cache hit for '%s' (matched '%s', similarity %.3f)",
+                        workflow_input["query"], hit["matched_query"], hit["similarity"])
+            yield {"event": "result", "result": {**hit["result"], "cache_hit": True}}
+            return
+        CACHE_MISSES.inc(cache="report_cache")
+
+    result = dict(workflow_input)
+    started = time.perf_counter()
+    durations: Dict[str, float] = {}
+    for mode, chunk in research_workflow.stream(workflow_input, stream_mode=["custom", "updates", "values"]):
+        if mode == "values":
+            result = chunk
+        elif mode == "custom":
+            if chunk.get("event") == "node_finish":
+                # Reported with the node's output, which follows in "updates"
+                durations[chunk["node"]] = chunk["duration"]
+            else:
+                yield {**chunk, "elapsed": time.perf_counter() - started}
+        else:
+            for node, update in chunk.items():
+                yield {"event": "node", "node": node, "update": update or {},
+                       "duration": durations.get(node), "elapsed": time.perf_counter() - started}
+
+    logger.info("Node timings for '%s': %s", workflow_input["query"],
+                ", ".join(f"{node} {seconds:.2f}s" for node, seconds in durations.items()))
+    if cacheable:
+        failed = _failed_stages(result)
+        if result.get("final_report") and not failed:
+            report_cache.store(workflow_input["query"], vector, version, result)
+        elif failed:
+            logger.info("Not caching report for '%s', failed stages: %s", workflow_input["query"], ", ".join(failed))
+    yield {"event": "result", "result": result}
+
+def _failed_stages(result: Dict[str, Any]) -> List[str]:
+    """Outputs holding an agent's failure placeholder instead of real content"""
+    from agent import analysis_agent, generation_agent, memory_agent, search_agent, tool_agent
+    failures = {
+        "search_output": search_agent.FAILURE_OUTPUT,
+        "memory_output": memory_agent.FAILURE_OUTPUT,
+        "tool_output": tool_agent.FAILURE_OUTPUT,
+        "analysis_output": analysis_agent.FAILURE_OUTPUT,
+        "final_report": generation_agent.FAILURE_OUTPUT,
+    }
+    return [key for key, failure in failures.items() if result.get(key) == failure]
+
+def run_research(workflow_input: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the research workflow behind the semantic report cache"""
+    for event in stream_research(workflow_input):
+        if event["event"] == "result":
+            return event["result"]
+    raise RuntimeError("Research workflow finished without a result")
+
+def __getattr__(name: str):
+    # Keeps `from workflow.research_flow import research_workflow` working;
+    # the graph is still only compiled when first requested.
+    if name == "research_workflow":
+        return get_research_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,81 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+TOOL_NAMES = ("wikipedia", "tavily", "arxiv")
+
+# Keyword cues for the query classifier. A query that matches none of them
+# uses every enabled tool.
+TOOL_CUES = {
+    "arxiv": {
+        "paper", "papers", "study", "studies", "research", "algorithm", "model", "models",
+        "neural", "learning", "theory", "theorem", "benchmark", "dataset", "method",
+        "methods", "survey", "arxiv", "quantum", "physics", "mathematics", "experiment"
+    },
+    "tavily": {
+        "latest", "recent", "recently", "current", "currently", "today", "news", "now",
+        "trend", "trends", "price", "prices", "market", "update", "updates", "announced",
+        "release", "released", "this year", "2023", "2024", "2025", "2026"
+    },
+    "wikipedia": {
+        "what is", "who is", "who was", "what are", "history", "define", "definition",
+        "meaning", "biography", "overview", "origin", "explain", "introduction"
+    },
+}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was",
+    "what", "how", "why", "who", "which", "with", "about", "does", "do", "can",
+    "by", "from", "at", "as", "be", "it", "its", "this", "that", "these", "those"
+}
+
+def _words(text: str) -> Set[str]:
+    return {w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS}
+
+def classify_tools(query: str, enabled: Iterable[str]) -> List[str]:
+    """Pick the external tools likely to help with query.
+
+    A cheap keyword classifier: each tool has a set of cue words and phrases,
+    and only tools whose cues appear in the query are used. When nothing
+    matches the query is ambiguous, so all enabled tools run.
+    """
+    enabled = [name for name in TOOL_NAMES if name in set(enabled)]
+    text = " " + " ".join(re.findall(r"[a-z0-9]+", query.lower())) + " "
+    selected = [name for name in enabled if any(f" {cue} " in text for cue in TOOL_CUES[name])]
+    return selected or enabled
+
+def history_relevance(query: str, previous_queries: Iterable[str]) -> float:
+    """Best word-overlap score (Jaccard) between query and earlier queries"""
+    words = _words(query)
+    if not words:
+        return 0.0
+    best = 0.0
+    for previous in previous_queries:
+        other = _words(previous)
+        if other:
+            best = max(best, len(words & other) / len(words | other))
+    return best
+
+class NodeTimings:
+    """Exponentially weighted average duration of each workflow node.
+
+    Used to estimate the time saved when routing skips a node.
+    """
+
+    def __init__(self, alpha: float = 0.2, defaults: Optional[Dict[str, float]] = None):
+        self.alpha = alpha
+        self._averages = dict(defaults or {})
+        self._lock = threading.Lock()
+
+    def record(self, node: str, seconds: float):
+        with self._lock:
+            previous = self._averages.get(node)
+            self._averages[node] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def estimate(self, node: str) -> float:
+        with self._lock:
+            return self._averages.get(node, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._averages)
@@ -1,22 +1,112 @@
 import streamlit as st
 import os
 import sys
-import io
 import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 
 sys.path.insert(0,os.path.abspath("src"))
-from workflow.research_flow import research_workflow
-from agent.memory_agent import MemoryAgent
-from agent.rag_agent import RAGAgent
+from config.config_loader import config
 
-# Initialize session state
-if "memory_agent" not in st.session_state:
-    st.session_state.memory_agent = MemoryAgent()
+# With an API URL the UI is a thin client of the FastAPI service; otherwise
+# the agents run inside the Streamlit process
+API_URL = os.getenv("RESEARCH_API_URL") or config.get("ui", {}).get("api_url")
 
-if "rag_agent" not in st.session_state:
-    st.session_state.rag_agent = RAGAgent()
+NODE_LABELS = {
+    "search": "🔎 Search",
+    "route": "🧭 Routing",
+    "memory": "🧠 Memory",
+    "rag": "📚 RAG",
+    "tool_agent": "🧰 Tools",
+    "analyse": "🧠 Analysis",
+    "generate": "📄 Report",
+}
+
+# Shared by every browser session, so new tabs reuse warm clients and models
+@st.cache_resource
+def get_api_client(base_url: str):
+    from api.client import ResearchAPIClient
+    return ResearchAPIClient(base_url, timeout=config.get("ui", {}).get("request_timeout", 300))
+
+@st.cache_resource
+def get_local_agents():
+    from workflow.research_flow import get_memory_agent, get_rag_agent
+    return get_memory_agent(), get_rag_agent()
+
+def ingest_files(uploaded_files) -> dict:
+    if API_URL:
+        return get_api_client(API_URL).upload_documents([(f.name, f.getvalue()) for f in uploaded_files])
+    temp_files = []
+    try:
+        # Save uploaded files temporarily
+        for uploaded_file in uploaded_files:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+                tmp_file.write(uploaded_file.getvalue())
+                temp_files.append(tmp_file.name)
+        return get_local_agents()[1].ingest_documents(temp_files, sources=[f.name for f in uploaded_files])
+    finally:
+        # Clean up temp files
+        for temp_file in temp_files:
+            try:
+                os.unlink(temp_file)
+            except:
+                pass
+
+def ingest_url(url: str) -> dict:
+    if API_URL:
+        return get_api_client(API_URL).ingest_urls([url])
+    return get_local_agents()[1].ingest_urls([url])
+
+def vector_store_stats() -> dict:
+    if API_URL:
+        return get_api_client(API_URL).vector_store_stats()
+    return get_local_agents()[1].get_vector_store_stats()
+
+def memory_entries() -> list:
+    if API_URL:
+        return get_api_client(API_URL).memory_entries(limit=20)
+    return get_local_agents()[0].get_all()
+
+def memory_report(entry_id: str) -> str:
+    if API_URL:
+        return get_api_client(API_URL).memory_entry(entry_id)["final_report"]
+    return get_local_agents()[0].get_by_id(entry_id)["final_report"]
+
+def research_events(query: str, rag_only: bool, debug: bool):
+    """Yield ("start", name) and ("node", name, outputs, duration) as agents run, then ("result", result)"""
+    if API_URL:
+        mode = "rag_only" if rag_only else "full"
+        for event in get_api_client(API_URL).stream_research(query, mode=mode, debug=debug):
+            if event["event"] == "node_start":
+                yield "start", event["node"]
+            elif event["event"] == "node":
+                yield "node", event["node"], event["output"], event.get("duration")
+            elif event["event"] == "result":
+                if event.get("trace_id"):
+                    # Debug details are stored as a trace rather than sent inline
+                    trace = get_api_client(API_URL).trace(event["trace_id"])
+                    event = {**trace["outputs"], **trace["debug_info"], **event}
+                yield "result", event
+            elif event["event"] == "error":
+                raise RuntimeError(event.get("error", "Research failed"))
+        return
+
+    memory_agent, rag_agent = get_local_agents()
+    if rag_only:
+        result = rag_agent.query_with_rag(query, debug=debug)
+        yield "result", {**result, "final_report": result["output"]}
+        return
+
+    from workflow.research_flow import stream_research
+    for event in stream_research({"query": query, "debug": debug}):
+        if event["event"] == "node_start":
+            yield "start", event["node"]
+        elif event["event"] == "node":
+            yield "node", event["node"], event["update"], event.get("duration")
+        elif event["event"] == "result":
+            # Store in memory
+            memory_agent.store(query, event["result"]["final_report"])
+            yield "result", event["result"]
 
 if "ingested_files" not in st.session_state:
     st.session_state.ingested_files = []
@@ -25,78 +115,73 @@ st.set_page_config(page_title="ECYPD Research Assistant", layout="wide")
 
 # Sidebar for document management and memory
 with st.sidebar:
+    if API_URL:
+        st.caption(f"🔌 Connected to {API_URL}")
+
     st.header("📚 Document Management")
-    
+
     # File uploader
     uploaded_files = st.file_uploader(
         "Upload documents for RAG",
         accept_multiple_files=True,
         type=['txt', 'pdf', 'docx']
     )
-    
+
     if uploaded_files:
         if st.button("📥 Ingest Documents"):
             with st.spinner("Processing documents..."):
-                temp_files = []
                 try:
-                    # Save uploaded files temporarily
-                    for uploaded_file in uploaded_files:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            temp_files.append(tmp_file.name)
-                    
-                    # Ingest documents
-                    result = st.session_state.rag_agent.ingest_documents(temp_files)
-                    
-                    if result["success"]:
-                        st.success(f"✅ Ingested {result['total_chunks']} chunks from {len(result['processed_files'])} files")
-                        st.session_state.ingested_files.extend([f.name for f in uploaded_files])
-                    else:
-                        st.error(f"❌ Failed to ingest documents: {result.get('error', 'Unknown error')}")
-                        
-                finally:
-                    # Clean up temp files
-                    for temp_file in temp_files:
-                        try:
-                            os.unlink(temp_file)
-                        except:
-                            pass
-    
+                    result = ingest_files(uploaded_files)
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+
+                if result["success"]:
+                    st.success(f"✅ Ingested {result['total_chunks']} chunks from {len(result['processed_files'])} files")
+                    st.session_state.ingested_files.extend([f.name for f in uploaded_files])
+                else:
+                    st.error(f"❌ Failed to ingest documents: {result.get('error', 'Unknown error')}")
+
     # Show ingested files
     if st.session_state.ingested_files:
         st.subheader("📄 Ingested Files")
         for file in st.session_state.ingested_files:
             st.text(f"• {file}")
-    
+
     # Vector store stats
     if st.button("📊 Vector Store Stats"):
-        stats = st.session_state.rag_agent.get_vector_store_stats()
-        st.json(stats)
-    
+        st.json(vector_store_stats())
+
     # URL ingestion
     st.subheader("🌐 URL Ingestion")
     url_input = st.text_input("Enter URL to ingest:")
     if st.button("📥 Ingest URL") and url_input:
         with st.spinner("Processing URL..."):
-            result = st.session_state.rag_agent.ingest_urls([url_input])
+            try:
+                result = ingest_url(url_input)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
             if result["success"]:
                 st.success(f"✅ Ingested {result['total_chunks']} chunks from URL")
             else:
                 st.error(f"❌ Failed to ingest URL: {result.get('error', 'Unknown error')}")
-    
+
     st.divider()
-    
+
     # Memory section
     st.header("🧠 Memory")
-    past = st.session_state.memory_agent.get_all()
-    
+    past = memory_entries()
+
     if past:
         for entry in past:
-            with st.expander(f"📌 {entry['query']} ({entry['timestamp'].split('T')[0]})"):
-                st.markdown(entry["final_report"])
+            with st.expander(f"📌 {entry['query']} ({str(entry['timestamp']).split('T')[0]})"):
+                # Only decompress the report when asked for
+                if st.checkbox("Show full report", key=f"full_{entry['id']}"):
+                    st.markdown(memory_report(entry["id"]))
+                else:
+                    st.markdown(entry["preview"])
     else:
         st.markdown("No memory yet. Run a query to store it here.")
-    
+
     # Debug toggle
     debug_mode = st.checkbox("🔧 Show Debug Logs", value=False)
 
@@ -114,44 +199,51 @@ with st.form("query_form"):
 
 # Results placeholder
 if submitted and query.strip():
+    # Agent outputs arrive one node at a time and are shown as they finish
+    outputs, result = {}, None
+    with st.status("Running agents..." if not rag_only else "Querying your documents...", expanded=True) as status:
+        partial = st.container()
+        try:
+            for event in research_events(query.strip(), rag_only, debug_mode):
+                if event[0] == "start":
+                    status.update(label=f"Running {NODE_LABELS.get(event[1], event[1])}...")
+                elif event[0] == "node":
+                    _, node, output, duration = event
+                    outputs.update(output)
+                    took = f" in {duration:.1f}s" if duration is not None else ""
+                    status.write(f"✅ {NODE_LABELS.get(node, node)} finished{took}")
+                    if node == "search" and output.get("search_output"):
+                        with partial.expander("🔍 Search Agent Output"):
+                            st.markdown(output["search_output"])
+                    elif node == "analyse" and output.get("analysis_output"):
+                        with partial.expander("🧠 Analysis Agent Output"):
+                            st.markdown(output["analysis_output"])
+                else:
+                    # The API leaves outputs it did not include as null
+                    result = {**outputs, **{k: v for k, v in event[1].items() if v is not None}}
+            status.update(label="✅ Done!", state="complete", expanded=False)
+        except Exception as e:
+            status.update(label=f"❌ Research failed: {e}", state="error")
+
+if submitted and query.strip() and result is not None:
     if rag_only:
-        # RAG-only mode
-        with st.spinner("Querying your documents..."):
-            result = st.session_state.rag_agent.query_with_rag(query.strip(), debug=debug_mode)
-        
-        st.success("✅ Done!")
-        
         # Display RAG response
         st.subheader("📄 RAG Response")
-        st.markdown(result["output"])
-        if not rag_only and result.get("memory_output"):
-            with st.expander("🧠 Memory Context Analysis"):
-                st.markdown(result["memory_output"])
-        
-        # Show context info
+        st.markdown(result["final_report"])
+
+        # Show context info (only reported by in-process runs)
         if result.get("context_used"):
             st.success(f"✅ Found relevant context ({result['context_length']} characters)")
-        else:
+        elif "context_used" in result:
             st.warning("⚠️ No relevant documents found - showing fallback response")
-        
+
         # Debug info
-        if debug_mode and result.get("debug"):
+        rag_debug = result.get("debug") or result.get("rag_debug") or result.get("debug_info", {}).get("rag_debug")
+        if debug_mode and rag_debug:
             with st.expander("🔍 RAG Debug Info"):
-                st.json(result["debug"])
-        if debug_mode and result.get("memory_debug"):
-            with st.expander("🧠 Memory Debug Info"):
-                st.json(result["memory_debug"])
-    
-    else:
-        # Full workflow mode
-        with st.spinner("Running agents and generating report..."):
-            result = research_workflow.invoke({"query": query.strip(), "debug": debug_mode})
-
-        st.success("✅ Done!")
-
-        # Store in memory
-        st.session_state.memory_agent.store(query, result["final_report"])
+                st.json(rag_debug)
 
+    else:
         # Display Final Report
         st.subheader("📄 Final Research Report")
         st.markdown(result["final_report"])
@@ -163,13 +255,13 @@ if submitted and query.strip():
 
         # Tool Agent Output
         with st.expander("🧰 Tool Agent Output"):
-            st.markdown(result.get("tool_output", "No tool data available."))
+            st.markdown(result.get("tool_output") or "No tool data available.")
 
         st.markdown("#### 📁 Export this report:")
         # Prepare exportable content
         report_text = result["final_report"]
         query_slug = query.strip().replace(" ", "_")[:50]
-        
+
         # Download buttons
         col1, col2 = st.columns(2)
         with col1:
@@ -187,31 +279,24 @@ if submitted and query.strip():
                 mime="text/plain"
             )
 
-        # Intermediate outputs
-        with st.expander("🔍 Search Agent Output"):
-            st.markdown(result["search_output"])
-
-        with st.expander("🧠 Analysis Agent Output"):
-            st.markdown(result["analysis_output"])
-
         # Debug Section
         if debug_mode:
             st.subheader("🪵 Debug Logs")
 
             with st.expander("📝 Search Agent Prompt"):
-                st.code(result.get("search_debug", {}).get("prompt", "No debug data"))
+                st.code((result.get("search_debug") or {}).get("prompt", "No debug data"))
 
             with st.expander("📝 Analysis Agent Prompt"):
-                st.code(result.get("analysis_debug", {}).get("prompt", "No debug data"))
+                st.code((result.get("analysis_debug") or {}).get("prompt", "No debug data"))
 
             with st.expander("📝 Generation Agent Prompt"):
-                st.code(result.get("generation_debug", {}).get("prompt", "No debug data"))
-                
+                st.code((result.get("generation_debug") or {}).get("prompt", "No debug data"))
+
             if result.get("rag_debug"):
                 with st.expander("🧠 RAG Debug Info"):
                     st.json(result["rag_debug"])
 
-else:
+elif not submitted or not query.strip():
     st.info("Enter a topic above and click 'Run Agents' to start.")
     if not st.session_state.ingested_files:
-        st.info("💡 Tip: Upload documents in the sidebar to enable RAG functionality!")
\ No newline at end of file
+        st.info("💡 Tip: Upload documents in the sidebar to enable RAG functionality!")
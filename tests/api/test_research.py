@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import json
 from httpx import AsyncClient
 from api.main import app
 
@@ -61,6 +62,67 @@ async def test_vector_store_stats():
         assert "total_documents" in data
         assert "collection_name" in data
 
+@pytest.mark.asyncio
+async def test_research_batch():
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        payload = {
+            "queries": ["renewable energy storage", "Renewable  energy storage", "quantum error correction"],
+            "mode": "rag_only"
+        }
+        response = await client.post("/api/v1/research/batch", json=payload)
+        assert response.status_code == 200
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results, summary = lines[:-1], lines[-1]
+        assert sorted(item["index"] for item in results) == [0, 1, 2]
+        assert all(item["success"] for item in results)
+        assert summary["done"] is True
+        assert summary["unique"] == 2
+
+@pytest.mark.asyncio
+async def test_research_stream():
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        payload = {"query": "artificial intelligence in education", "mode": "full", "debug": False}
+        response = await client.post("/api/v1/research/stream", json=payload)
+        assert response.status_code == 200
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        nodes = [event["node"] for event in events if event["event"] == "node"]
+        assert nodes[0] == "search" and nodes[-1] == "generate"
+        assert not any(key.endswith("_debug") for event in events[:-1] for key in event["output"])
+        assert events[-1]["event"] == "result"
+        assert events[-1]["final_report"]
+
+def test_research_websocket():
+    from fastapi.testclient import TestClient
+
+    with TestClient(app).websocket_connect("/api/v1/research/ws") as websocket:
+        websocket.send_json({"query": "artificial intelligence in education", "mode": "full"})
+        events = []
+        while not events or events[-1]["event"] not in ("result", "error"):
+            events.append(websocket.receive_json())
+
+    assert events[0] == {"event": "node_start", "node": "search", "elapsed": events[0]["elapsed"]}
+    finished = [event for event in events if event["event"] == "node"]
+    assert all(event["duration"] >= 0 for event in finished)
+    assert events[-1]["event"] == "result"
+
+@pytest.mark.asyncio
+async def test_debug_trace_is_stored_out_of_band():
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        payload = {"query": "test query", "mode": "rag_only", "debug": True}
+        response = await client.post("/api/v1/research/query", json=payload)
+        assert response.status_code == 200
+        trace_id = response.headers["X-Trace-Id"]
+        assert response.json()["debug_info"] is None
+
+        trace = await client.get(f"/api/v1/research/traces/{trace_id}")
+        assert trace.status_code == 200
+        assert "rag_debug" in trace.json()["debug_info"]
+
+        missing = await client.get("/api/v1/research/traces/0123456789abcdef0123456789abcdef")
+        assert missing.status_code == 404
+
 # Run tests
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,39 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.batch_scope import BatchScope, batch_memo
+
+def test_memo_without_scope_always_calls():
+    calls = []
+    for _ in range(2):
+        batch_memo("tool", "q", lambda: calls.append(1) or len(calls))
+    assert len(calls) == 2
+
+def test_scope_shares_results_across_threads():
+    calls = []
+    lock = threading.Lock()
+
+    def lookup(query):
+        with lock:
+            calls.append(query)
+        return query.upper()
+
+    scope = BatchScope()
+
+    def run(query):
+        with scope.activate():
+            return batch_memo("tool", query, lookup, query)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(run, ["a", "b", "a", "a", "b"] * 4))
+
+    assert results == ["A", "B", "A", "A", "B"] * 4
+    assert sorted(calls) == ["a", "b"]
+    assert len(scope) == 2
+
+def test_scopes_are_independent():
+    first, second = BatchScope(), BatchScope()
+    with first.activate():
+        batch_memo("tool", "q", lambda: "first")
+    with second.activate():
+        assert batch_memo("tool", "q", lambda: "second") == "second"
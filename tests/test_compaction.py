@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import struct
+
+from rag.compaction import (SQLITE_FILE, collection_pointer, fragmentation_stats, hnsw_element_count,
+                            load_retired, save_retired, vacuum_sqlite, write_collection_pointer)
+
+def _chroma_dir(tmp_path, segments):
+    """Chroma-like persist directory: a segments table and HNSW headers"""
+    connection = sqlite3.connect(tmp_path / SQLITE_FILE)
+    connection.execute("CREATE TABLE segments (id TEXT, type TEXT, scope TEXT, collection TEXT)")
+    connection.execute("CREATE TABLE filler (value BLOB)")
+    for segment_id, collection_id, elements in segments:
+        connection.execute("INSERT INTO segments VALUES (?, 'hnsw', 'VECTOR', ?)", (segment_id, collection_id))
+        connection.execute("INSERT INTO segments VALUES (?, 'sqlite', 'METADATA', ?)", (segment_id + "-meta", collection_id))
+        if elements is not None:
+            os.makedirs(tmp_path / segment_id)
+            with open(tmp_path / segment_id / "header.bin", "wb") as f:
+                f.write(struct.pack("<QQQ", 0, 1000, elements) + b"\0" * 64)
+    connection.commit()
+    connection.close()
+
+def test_hnsw_element_count(tmp_path):
+    _chroma_dir(tmp_path, [("seg", "col", 42)])
+    assert hnsw_element_count(str(tmp_path / "seg")) == 42
+    assert hnsw_element_count(str(tmp_path / "missing")) is None
+
+def test_dead_entries_and_bytes(tmp_path):
+    _chroma_dir(tmp_path, [("seg-a", "col-a", 100), ("seg-b", "col-b", 10), ("seg-c", "other", 500)])
+    stats = fragmentation_stats(str(tmp_path), [("col-a", 60), ("col-b", 10)], dead_ratio_threshold=0.25)
+
+    assert stats["live_entries"] == 70
+    assert stats["index_entries"] == 110
+    assert stats["dead_entries"] == 40
+    assert stats["dead_ratio"] == 40 / 110
+    assert stats["compaction_recommended"]
+    assert stats["index_bytes"] == 2 * os.path.getsize(tmp_path / "seg-a" / "header.bin")
+    assert stats["sqlite_bytes"] == os.path.getsize(tmp_path / SQLITE_FILE)
+
+def test_unflushed_index_counts_no_dead_entries(tmp_path):
+    _chroma_dir(tmp_path, [("seg", "col", None)])
+    stats = fragmentation_stats(str(tmp_path), [("col", 5)])
+    assert stats["dead_entries"] == 0
+    assert not stats["compaction_recommended"]
+
+def test_missing_store_reports_nothing(tmp_path):
+    assert fragmentation_stats(str(tmp_path), [("col", 0)])["sqlite_bytes"] == 0
+
+def test_vacuum_reclaims_free_pages(tmp_path):
+    _chroma_dir(tmp_path, [])
+    connection = sqlite3.connect(tmp_path / SQLITE_FILE)
+    connection.executemany("INSERT INTO filler VALUES (?)", [(b"x" * 4096,) for _ in range(200)])
+    connection.commit()
+    connection.execute("DELETE FROM filler")
+    connection.commit()
+    connection.close()
+
+    assert fragmentation_stats(str(tmp_path), [])["sqlite_free_bytes"] > 0
+    assert vacuum_sqlite(str(tmp_path)) > 0
+    assert fragmentation_stats(str(tmp_path), [])["sqlite_free_bytes"] == 0
+
+def test_collection_pointer_defaults_to_the_shard_name(tmp_path):
+    assert collection_pointer(str(tmp_path), "docs__shard0of2") == "docs__shard0of2"
+
+def test_collection_pointer_swap(tmp_path):
+    write_collection_pointer(str(tmp_path), "docs", "docs.gen1")
+    write_collection_pointer(str(tmp_path), "docs", "docs.gen2")
+
+    assert collection_pointer(str(tmp_path), "docs") == "docs.gen2"
+    assert sorted(os.listdir(tmp_path)) == ["docs.collection"]
+
+def test_retired_list_round_trip(tmp_path):
+    assert load_retired(str(tmp_path), "docs") == {}
+    save_retired(str(tmp_path), "docs", {"docs.gen1": 100.0})
+    assert load_retired(str(tmp_path), "docs") == {"docs.gen1": 100.0}
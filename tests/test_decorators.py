@@ -0,0 +1,19 @@
+from utils.decorators import bounded_resource
+
+def test_bounded_resource_evicts_least_recently_used():
+    built = []
+
+    @bounded_resource(2)
+    def resource(name):
+        built.append(name)
+        return object()
+
+    a = resource("a")
+    resource("b")
+    assert resource("a") is a
+    resource("c")  # evicts "b", the least recently used
+
+    assert resource.is_cached("a") and resource.is_cached("c")
+    assert not resource.is_cached("b")
+    resource("b")
+    assert built == ["a", "b", "c", "b"]
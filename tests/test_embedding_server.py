@@ -0,0 +1,87 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rag.embedding_server import EmbeddingClient, EmbeddingServer
+
+class CountingModel:
+    """Two-dimensional embeddings that record every forward pass"""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        time.sleep(self.latency)
+        return [[float(len(text)), 1.0] for text in texts]
+
+@pytest.fixture
+def server():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "embeddings.sock")
+    model = CountingModel()
+    server = EmbeddingServer(model, path, max_batch_size=64, max_wait=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, model, path
+    server.shutdown()
+    server.server_close()
+
+def test_client_round_trip(server):
+    _, _, path = server
+    client = EmbeddingClient(path)
+    assert client.embed_documents(["a", "abc"]) == [[1.0, 1.0], [3.0, 1.0]]
+    assert client.embed_query("ab") == [2.0, 1.0]
+    assert client.embed_documents([]) == []
+
+def test_concurrent_requests_are_batched(server):
+    _, model, path = server
+    client = EmbeddingClient(path)
+    queries = ["x" * i for i in range(1, 33)]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(client.embed_query, queries))
+
+    assert results == [[float(len(q)), 1.0] for q in queries]
+    assert sum(model.calls) == len(queries)
+    assert len(model.calls) < len(queries) / 2
+
+def test_timeouts_are_not_retried(server):
+    _, model, path = server
+    model.latency = 0.5
+    client = EmbeddingClient(path, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        client.embed_documents(["slow"])
+    time.sleep(0.6)
+    assert model.calls == [1]
+
+def test_reconnects_after_server_restart(server):
+    _, _, path = server
+    client = EmbeddingClient(path)
+    client.embed_query("a")
+    # The server drops the connection, as on a restart
+    client._local.sock.shutdown(2)
+    assert client.embed_query("ab") == [2.0, 1.0]
+
+def test_large_inputs_are_split_into_batches(server):
+    _, model, path = server
+    client = EmbeddingClient(path, timeout=0.5, max_batch_size=16)
+    texts = ["x" * (i % 7 + 1) for i in range(100)]
+
+    assert client.embed_documents(texts) == [[float(len(text)), 1.0] for text in texts]
+    assert max(model.calls) <= 16
+
+def test_socket_is_not_world_accessible(server):
+    _, _, path = server
+    assert os.stat(path).st_mode & 0o777 == 0o660
+
+def test_refuses_to_replace_a_regular_file(tmp_path):
+    path = tmp_path / "embeddings.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        EmbeddingServer(CountingModel(), str(path))
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+from rag.filters import build_where, filters_key
+
+def test_no_filters_means_no_where_clause():
+    assert build_where(None) is None
+    assert build_where({}) is None
+    assert build_where({"sources": []}) is None
+
+def test_single_filter_is_not_wrapped():
+    assert build_where({"sources": ["a.pdf"]}) == {"source": {"$in": ["a.pdf"]}}
+
+def test_file_types_are_normalized():
+    assert build_where({"file_types": [".PDF", "docx"]}) == {"file_type": {"$in": ["pdf", "docx"]}}
+
+def test_filters_are_combined_with_and():
+    after = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    where = build_where({"file_types": ["pdf"], "ingested_after": after, "ingested_before": 1800000000})
+    assert where == {"$and": [
+        {"file_type": {"$in": ["pdf"]}},
+        {"ingested_at": {"$gte": after.timestamp()}},
+        {"ingested_at": {"$lte": 1800000000.0}},
+    ]}
+
+def test_naive_datetimes_are_utc():
+    naive = build_where({"ingested_after": datetime(2024, 1, 1)})
+    aware = build_where({"ingested_after": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+    assert naive == aware == {"ingested_at": {"$gte": 1704067200.0}}
+
+def test_filters_key_ignores_order():
+    assert filters_key({"a": 1, "b": [2]}) == filters_key({"b": [2], "a": 1})
+    assert filters_key(None) == filters_key({})
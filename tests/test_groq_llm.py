@@ -0,0 +1,121 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain_core")
+
+import tools.groq_llm as groq_llm
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+class FakeLLM:
+    def __init__(self, latency=0.0, content="ok", failures=0):
+        self.latency = latency
+        self.content = content
+        self.failures = failures
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("temporary failure")
+        time.sleep(self.latency)
+        return Reply(self.content)
+
+def install(monkeypatch, models, hedging=True, **retry):
+    monkeypatch.setattr(groq_llm, "get_groq_llm", lambda model=groq_llm.MODEL_NAME: models[model])
+    monkeypatch.setitem(groq_llm.hedge_config, "enabled", hedging)
+    monkeypatch.setitem(groq_llm.rate_config, "enabled", False)
+    monkeypatch.setitem(groq_llm.hedge_config, "fallback_model", "fast")
+    monkeypatch.setattr(groq_llm, "hedging_policy", groq_llm.HedgingPolicy(initial_delay=0.05, min_delay=0.01))
+    for key, value in retry.items():
+        monkeypatch.setitem(groq_llm.retry_config, key, value)
+
+def test_slow_primary_is_hedged(monkeypatch):
+    install(monkeypatch, {groq_llm.MODEL_NAME: FakeLLM(latency=1.0, content="slow"), "fast": FakeLLM(content="fast")})
+
+    start = time.perf_counter()
+    assert groq_llm.run_llm_prompt("question") == "fast"
+    assert time.perf_counter() - start < 0.5
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    fast = FakeLLM(content="fast")
+    install(monkeypatch, {groq_llm.MODEL_NAME: FakeLLM(content="primary"), "fast": fast})
+
+    assert groq_llm.run_llm_prompt("question") == "primary"
+    assert fast.calls == 0
+
+def test_transient_failures_are_retried(monkeypatch):
+    primary = FakeLLM(failures=2)
+    install(monkeypatch, {groq_llm.MODEL_NAME: primary}, hedging=False, base_delay_seconds=0.01, max_attempts=4)
+
+    assert groq_llm.run_llm_prompt("question") == "ok"
+    assert primary.calls == 3
+
+def test_retries_stop_at_max_attempts(monkeypatch):
+    primary = FakeLLM(failures=10)
+    install(monkeypatch, {groq_llm.MODEL_NAME: primary}, hedging=False, base_delay_seconds=0.01, max_attempts=2)
+
+    with pytest.raises(RuntimeError):
+        groq_llm.run_llm_prompt("question")
+    assert primary.calls == 2
+
+def test_waiting_for_rate_budget_stops_at_the_deadline(monkeypatch):
+    from tools.rate_limiter import RateLimitScheduler
+    primary = FakeLLM()
+    install(monkeypatch, {groq_llm.MODEL_NAME: primary}, hedging=False, deadline_seconds=0.2, max_attempts=1)
+    monkeypatch.setitem(groq_llm.rate_config, "enabled", True)
+    scheduler = RateLimitScheduler(requests_per_minute=6, tokens_per_minute=10**6)
+    scheduler.requests.level = 0
+    monkeypatch.setattr(groq_llm, "get_rate_limiter", lambda model: scheduler)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        groq_llm.run_llm_prompt("question")
+    assert time.perf_counter() - start < 1.0
+    assert primary.calls == 0 and scheduler.waiting() == 0
+
+def test_waiting_for_a_slot_does_not_trigger_hedges(monkeypatch):
+    fast = FakeLLM(content="fast")
+    install(monkeypatch, {groq_llm.MODEL_NAME: FakeLLM(content="primary"), "fast": fast})
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(groq_llm, "_llm_slots", slots)
+    slots.acquire()
+    threading.Timer(0.2, slots.release).start()
+
+    assert groq_llm.run_llm_prompt("question") == "primary"
+    assert fast.calls == 0
+
+def test_no_hedge_while_slots_are_exhausted(monkeypatch):
+    fast = FakeLLM(content="fast")
+    install(monkeypatch, {groq_llm.MODEL_NAME: FakeLLM(latency=0.3, content="slow"), "fast": fast})
+    monkeypatch.setattr(groq_llm, "_llm_slots", threading.BoundedSemaphore(1))
+
+    assert groq_llm.run_llm_prompt("question") == "slow"
+    assert fast.calls == 0
+
+def test_deadline_applies_without_hedging(monkeypatch):
+    install(monkeypatch, {groq_llm.MODEL_NAME: FakeLLM(latency=1.0)}, hedging=False, deadline_seconds=0.2, max_attempts=1)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        groq_llm.run_llm_prompt("question")
+    assert time.perf_counter() - start < 0.8
+
+def test_abandoned_attempt_gives_back_its_slot(monkeypatch):
+    primary = FakeLLM()
+    install(monkeypatch, {groq_llm.MODEL_NAME: primary})
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(groq_llm, "_llm_slots", slots)
+    abandoned = threading.Event()
+    abandoned.set()
+
+    estimate = groq_llm._admit(groq_llm.MODEL_NAME, "question", groq_llm.Priority.INTERACTIVE, time.monotonic() + 1)
+    with pytest.raises(groq_llm.CancelledError):
+        groq_llm._invoke(groq_llm.MODEL_NAME, "question", estimate, abandoned)
+    assert primary.calls == 0
+    # The slot is free again
+    assert slots.acquire(blocking=False)
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Importing the workflow must not load models, open the vector store or build clients
+HEAVY_MODULES = ["langgraph", "langchain_groq", "langchain_huggingface", "langchain_chroma",
+                 "chromadb", "sentence_transformers", "torch", "tavily", "arxiv", "numpy"]
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET", "1.0"))
+
+def test_workflow_import_is_lazy_and_fast():
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import workflow.research_flow\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed)\n"
+        "print(','.join(heavy))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": SRC_DIR}
+    # Run from an unrelated directory to prove config loading is CWD-independent
+    with tempfile.TemporaryDirectory() as cwd:
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=cwd, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+
+    elapsed, heavy = float(output[0]), output[1]
+    assert heavy == ""
+    assert elapsed < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,93 @@
+import json
+import logging
+import threading
+
+from utils.logger import AsyncLogHandler, JsonFormatter, truncate
+
+class CaptureHandler(logging.Handler):
+    def __init__(self, block: threading.Event = None):
+        super().__init__()
+        self.records = []
+        self.block = block
+
+    def emit(self, record):
+        if self.block:
+            self.block.wait(5)
+        self.records.append(record)
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+def test_truncate():
+    assert truncate("short", 10) == "short"
+    assert truncate("x" * 30, 10) == "x" * 10 + "... [20 chars truncated]"
+    assert truncate("x" * 30, 0) == "x" * 30
+
+def test_records_are_written_off_thread_and_truncated():
+    capture = CaptureHandler()
+    handler = AsyncLogHandler([capture], max_message_chars=50)
+    logger = make_logger("test.truncate", handler)
+    logger.info("payload: %s", "y" * 500)
+    handler.close()
+    assert len(capture.records) == 1
+    message = capture.records[0].getMessage()
+    assert message.startswith("payload: yyy") and message.endswith("chars truncated]")
+
+def test_sampling_keeps_warnings():
+    capture = CaptureHandler()
+    handler = AsyncLogHandler([capture], sample_rates={"test.sampled": 0.0})
+    logger = make_logger("test.sampled", handler)
+    for _ in range(20):
+        logger.info("noisy")
+    logger.warning("important")
+    handler.close()
+    assert [r.getMessage() for r in capture.records] == ["important"]
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    capture = CaptureHandler(block=release)
+    handler = AsyncLogHandler([capture], queue_size=2)
+    logger = make_logger("test.full", handler)
+    for i in range(10):
+        logger.info("record %d", i)
+    assert handler.dropped > 0
+    release.set()
+    handler.close()
+    assert len(capture.records) + handler.dropped == 10
+
+def test_json_formatter():
+    record = logging.LogRecord("Agent", logging.INFO, __file__, 1, "took %.1fs", (1.25,), None)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["logger"] == "Agent"
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "took 1.2s"
+
+def test_debug_records_reach_the_log_file_when_enabled():
+    import os
+    import time
+    import uuid
+    from utils.logger import LOG_DIR, LOG_FILE, _shared_handler
+
+    # pytest's capture handler on the root logger would stop setup_logger from attaching
+    logger = make_logger("test.debug_file", _shared_handler())
+    marker = uuid.uuid4().hex
+    logger.debug("payload %s", marker)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with open(os.path.join(LOG_DIR, LOG_FILE), encoding="utf-8") as f:
+            if marker in f.read():
+                break
+        time.sleep(0.02)
+    else:
+        raise AssertionError("DEBUG record was not written")
+
+def test_log_directory_does_not_depend_on_the_working_directory():
+    import os
+    from config.config_loader import PROJECT_ROOT
+    from utils.logger import LOG_DIR
+
+    assert os.path.isabs(LOG_DIR) and LOG_DIR.startswith(PROJECT_ROOT)
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.compression import compress_text, decompress_text
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd", "none"])
+def test_compression_round_trip(codec):
+    text = "Findings: 🚀 renewable storage costs fell. " * 100
+    blob = compress_text(text, codec)
+    assert decompress_text(blob) == text
+    if codec != "none":
+        assert len(blob) < len(text.encode("utf-8")) / 5
+
+def test_memory_lists_summaries_and_loads_full_report():
+    pytest.importorskip("dotenv")
+    from agent.memory_agent import MemoryAgent
+
+    agent = MemoryAgent()
+    first = agent.store("first query", "a" * 1000)
+    second = agent.store("second query", "short report")
+
+    entries = agent.get_all()
+    assert [entry["id"] for entry in entries] == [second, first]
+    assert all("final_report" not in entry for entry in entries)
+    assert entries[0]["preview"] == "short report"
+    assert entries[1]["preview"] == "a" * agent.preview_chars + "..."
+
+    assert agent.get_by_id(first)["final_report"] == "a" * 1000
+    assert agent.get_by_id("missing") is None
+    assert [entry["query"] for entry in agent.get_recent(1)] == ["second query"]
+    assert agent.recent_queries(5) == ["second query", "first query"]
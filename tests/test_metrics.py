@@ -0,0 +1,30 @@
+import pytest
+from utils.metrics import MetricsRegistry
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("agent_seconds", "Agent latency", ["agent"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, agent="search")
+    histogram.observe(0.5, agent="search")
+    histogram.observe(5.0, agent="search")
+
+    text = registry.render()
+    assert '# TYPE agent_seconds histogram' in text
+    assert 'agent_seconds_bucket{agent="search",le="0.1"} 1' in text
+    assert 'agent_seconds_bucket{agent="search",le="1.0"} 2' in text
+    assert 'agent_seconds_bucket{agent="search",le="+Inf"} 3' in text
+    assert 'agent_seconds_count{agent="search"} 3' in text
+    assert 'agent_seconds_sum{agent="search"} 5.55' in text
+
+def test_counter_and_label_validation():
+    registry = MetricsRegistry()
+    counter = registry.counter("cache_hits_total", "Cache hits", ["cache"])
+    counter.inc(cache="report_cache")
+    counter.inc(2, cache="report_cache")
+
+    assert counter.value(cache="report_cache") == 3
+    assert 'cache_hits_total{cache="report_cache"} 3' in registry.render()
+    with pytest.raises(ValueError):
+        counter.inc(tool="wikipedia")
+    with pytest.raises(ValueError):
+        registry.counter("cache_hits_total", "Duplicate")
@@ -0,0 +1,17 @@
+import pytest
+
+from rag.namespaces import DEFAULT_NAMESPACE, validate_namespace
+
+@pytest.mark.parametrize("namespace", [DEFAULT_NAMESPACE, "team-a", "Team_42", "x", "a_b_c", "a" * 48])
+def test_valid_namespaces(namespace):
+    assert validate_namespace(namespace) == namespace
+
+@pytest.mark.parametrize("namespace", ["", "-team", "team a", "../etc", "a" * 49, None, "team__a"])
+def test_invalid_namespaces(namespace):
+    with pytest.raises(ValueError):
+        validate_namespace(namespace)
+
+def test_namespace_cannot_alias_another_namespaces_shard():
+    # Collection names join namespace and shard with "__"
+    with pytest.raises(ValueError):
+        validate_namespace("a__shard0of2")
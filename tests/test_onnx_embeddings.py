@@ -0,0 +1,25 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rag.onnx_embeddings import hub_model_id, mean_pool
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+    pooled = mean_pool(hidden, mask)
+    assert np.allclose(pooled, [[1.0, 0.0]])
+
+def test_mean_pool_matches_reference_direction():
+    rng = np.random.default_rng(0)
+    hidden = rng.normal(size=(4, 6, 8)).astype(np.float32)
+    mask = np.array([[1] * 6, [1] * 3 + [0] * 3, [1] * 5 + [0], [1] + [0] * 5])
+    pooled = mean_pool(hidden, mask)
+    for row, length in enumerate(mask.sum(axis=1)):
+        expected = hidden[row, :length].mean(axis=0)
+        assert np.allclose(pooled[row], expected / np.linalg.norm(expected), atol=1e-6)
+    assert np.allclose(np.linalg.norm(pooled, axis=1), 1.0)
+
+def test_hub_model_id():
+    assert hub_model_id("all-MiniLM-L6-v2") == "sentence-transformers/all-MiniLM-L6-v2"
+    assert hub_model_id("BAAI/bge-small-en") == "BAAI/bge-small-en"
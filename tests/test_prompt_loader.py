@@ -0,0 +1,32 @@
+import pytest
+from utils.prompt_loader import PromptTemplate, get_prompt_registry, get_prompt_template
+from utils.tokens import get_encoding
+
+def test_registry_parses_every_prompt_once():
+    registry = get_prompt_registry()
+    assert get_prompt_template("rag_prompt.txt") is registry["rag_prompt.txt"]
+    assert registry["rag_prompt.txt"].fields == ("context", "query")
+    assert registry["tool_agent_prompt.txt"].fields == ("input", "raw_data")
+    with pytest.raises(FileNotFoundError):
+        get_prompt_template("missing_prompt.txt")
+
+def test_render_is_single_pass():
+    template = PromptTemplate("t", "Context: {{context}}\nQuery: {{query}}")
+    rendered = template.render(context="a doc mentioning {{query}}", query="ai")
+    assert rendered == "Context: a doc mentioning {{query}}\nQuery: ai"
+
+def test_render_requires_every_field():
+    template = PromptTemplate("t", "{{input}} and {{input}} and {{other}}")
+    assert template.render(input="x", other="y") == "x and x and y"
+    with pytest.raises(ValueError):
+        template.render(input="x")
+
+def test_static_token_count_excludes_placeholders():
+    pytest.importorskip("tiktoken")
+    try:
+        get_encoding()
+    except Exception:
+        pytest.skip("cl100k_base encoding could not be loaded")
+    template = PromptTemplate("t", "Summarize: {{input}}")
+    assert template.static_token_count == PromptTemplate("u", "Summarize: ").static_token_count
+    assert template.static_token_count > 0
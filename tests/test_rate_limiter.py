@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from tools.rate_limiter import Priority, RateLimitScheduler, current_priority, llm_priority
+
+def test_admits_within_budget_without_waiting():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=6000)
+    waits = [scheduler.acquire(100) for _ in range(5)]
+    assert max(waits) < 0.05
+
+def test_waits_for_request_budget():
+    # Capacity of 2 requests, refilled at 10 per second
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=10**6)
+    scheduler.requests.capacity = scheduler.requests.level = 2
+    scheduler.acquire(1)
+    scheduler.acquire(1)
+    assert scheduler.acquire(1) >= 0.05
+
+def test_waits_for_token_budget_and_settles():
+    scheduler = RateLimitScheduler(requests_per_minute=6000, tokens_per_minute=600)
+    scheduler.acquire(600)
+    scheduler.settle(estimated=600, actual=100)
+    assert scheduler.acquire(400) < 0.05
+
+def test_oversized_call_is_admitted():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=100)
+    assert scheduler.acquire(10_000) < 0.05
+
+def test_interactive_calls_go_first():
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=10**6)
+    scheduler.requests.capacity = 1
+    scheduler.requests.level = 0
+    order = []
+
+    def call(name, priority):
+        scheduler.acquire(1, priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"batch{i}", Priority.BATCH)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=("interactive", Priority.INTERACTIVE))
+    interactive.start()
+    for thread in threads + [interactive]:
+        thread.join(timeout=5)
+
+    assert order.index("interactive") <= 1
+    assert len(order) == 4
+
+def test_priority_context():
+    assert current_priority() == Priority.INTERACTIVE
+    with llm_priority(Priority.BATCH):
+        assert current_priority() == Priority.BATCH
+    assert current_priority() == Priority.INTERACTIVE
+
+def test_deadline_leaves_the_queue_without_budget():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=10**6)
+    scheduler.requests.level = 0
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(1, deadline=time.monotonic() + 0.05)
+    assert scheduler.waiting() == 0
+    assert scheduler.requests.level < 1
+
+def test_passed_deadline_admits_only_immediately():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=10**6)
+    assert scheduler.acquire(1, deadline=time.monotonic()) < 0.05
+    scheduler.requests.level = 0
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(1, deadline=time.monotonic())
+
+def test_oversized_estimate_refunds_only_what_was_debited():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=1000)
+    scheduler.acquire(5000)
+    assert scheduler.tokens.level <= 0
+    scheduler.settle(5000, 900)
+    assert scheduler.tokens.level <= 100
+
+def test_ingestion_waits_behind_batch():
+    assert Priority.INTERACTIVE < Priority.BATCH < Priority.INGESTION
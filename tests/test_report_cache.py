@@ -0,0 +1,39 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from workflow.report_cache import SemanticReportCache
+
+VECTORS = {
+    "ai in education": [1.0, 0.0, 0.1],
+    "artificial intelligence for education": [0.98, 0.0, 0.15],
+    "ai in healthcare": [0.2, 1.0, 0.0],
+}
+
+def make_cache(**kwargs):
+    return SemanticReportCache(embed_query=lambda q: VECTORS[q], similarity_threshold=0.9, **kwargs)
+
+def test_paraphrase_hits_and_unrelated_misses():
+    cache = make_cache()
+    version = ("corpus-1", "prompts-1")
+    cache.store("ai in education", cache.embed("ai in education"), version, {"final_report": "edu"})
+
+    hit = cache.lookup(cache.embed("artificial intelligence for education"), version)
+    assert hit["result"]["final_report"] == "edu"
+    assert hit["matched_query"] == "ai in education"
+    assert cache.lookup(cache.embed("ai in healthcare"), version) is None
+
+def test_version_change_invalidates_entries():
+    cache = make_cache()
+    vector = cache.embed("ai in education")
+    cache.store("ai in education", vector, ("corpus-1", "prompts-1"), {"final_report": "edu"})
+
+    assert cache.lookup(vector, ("corpus-2", "prompts-1")) is None
+    assert len(cache) == 0
+
+def test_ttl_and_size_eviction():
+    cache = make_cache(ttl_seconds=-1, max_entries=1)
+    version = ("corpus-1", "prompts-1")
+    cache.store("ai in education", cache.embed("ai in education"), version, {"final_report": "edu"})
+    cache.store("ai in healthcare", cache.embed("ai in healthcare"), version, {"final_report": "health"})
+    assert len(cache) == 1
+    assert cache.lookup(cache.embed("ai in healthcare"), version) is None
@@ -0,0 +1,159 @@
+import pytest
+
+from workflow.routing import NodeTimings, classify_tools, history_relevance
+
+ALL_TOOLS = ["wikipedia", "tavily", "arxiv"]
+
+def test_classifier_picks_matching_tools():
+    assert classify_tools("latest news on interest rates", ALL_TOOLS) == ["tavily"]
+    assert classify_tools("What is photosynthesis", ALL_TOOLS) == ["wikipedia"]
+    assert classify_tools("recent papers on neural networks", ALL_TOOLS) == ["tavily", "arxiv"]
+
+def test_classifier_falls_back_to_enabled_tools():
+    assert classify_tools("coffee", ALL_TOOLS) == ALL_TOOLS
+    assert classify_tools("latest news", ["wikipedia", "arxiv"]) == ["wikipedia", "arxiv"]
+
+def test_history_relevance():
+    assert history_relevance("impact of AI on education", []) == 0.0
+    assert history_relevance("impact of AI on education", ["AI in education"]) > 0.3
+    assert history_relevance("impact of AI on education", ["football results"]) == 0.0
+
+def test_node_timings_ewma():
+    timings = NodeTimings(alpha=0.5)
+    timings.record("rag", 2.0)
+    timings.record("rag", 4.0)
+    assert timings.estimate("rag") == pytest.approx(3.0)
+    assert timings.estimate("memory") == 0.0
+
+class StubAgent:
+    def __init__(self, output):
+        self.output = output
+        self.calls = []
+        self.prompt_template = None
+
+    def run(self, query, debug=False, tools=None):
+        self.calls.append(tools)
+        return {"output": self.output, "debug": {}}
+
+class StubMemory(StubAgent):
+    def __init__(self, history):
+        super().__init__("memory")
+        self.history = history
+
+    def recent_queries(self, limit=5):
+        return self.history[:limit]
+
+    def analyze_context(self, query):
+        self.calls.append(query)
+        return {"output": "memory", "debug": {}}
+
+class StubStore:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def count(self):
+        return self.chunks
+
+class StubRAG(StubAgent):
+    def __init__(self, chunks):
+        super().__init__("rag")
+        self.vector_store = StubStore(chunks)
+
+    def query_with_rag(self, query, debug=False, filters=None):
+        self.calls.append(query)
+        return {"output": "rag", "debug": {}}
+
+@pytest.fixture
+def flow(monkeypatch):
+    pytest.importorskip("langgraph")
+    import workflow.research_flow as research_flow
+
+    def install(history, chunks):
+        agents = {
+            "search": StubAgent("search"), "tool_agent": StubAgent("tools"),
+            "memory": StubMemory(history), "rag": StubRAG(chunks),
+        }
+        monkeypatch.setattr(research_flow, "get_search_agent", lambda: agents["search"])
+        monkeypatch.setattr(research_flow, "get_tool_agent", lambda: agents["tool_agent"])
+        monkeypatch.setattr(research_flow, "get_memory_agent", lambda: agents["memory"])
+        monkeypatch.setattr(research_flow, "get_rag_agent", lambda namespace=None, create=True: agents["rag"])
+        monkeypatch.setattr(research_flow, "run_analysis_agent", lambda state: {"analysis_output": "analysis"})
+        monkeypatch.setattr(research_flow, "run_generation_agent", lambda state: {"final_report": "report"})
+        monkeypatch.setitem(research_flow.config["tools"], "enable_rag", True)
+        return research_flow, agents
+
+    return install
+
+def test_empty_history_and_corpus_are_skipped(flow):
+    research_flow, agents = flow(history=[], chunks=0)
+    result = research_flow.build_graph().invoke({"query": "latest AI news", "debug": False})
+
+    assert result["final_report"] == "report"
+    assert result["nodes_run"] == ["search", "tool_agent", "analyse", "generate"]
+    assert agents["memory"].calls == [] and agents["rag"].calls == []
+    assert agents["tool_agent"].calls == [["tavily"]]
+    summary = research_flow.routing_summary(result)
+    assert set(summary["skipped"]) == {"memory", "rag"}
+
+def test_relevant_history_and_corpus_run(flow):
+    research_flow, agents = flow(history=["AI in education"], chunks=10)
+    result = research_flow.build_graph().invoke({"query": "AI education outcomes", "debug": False})
+
+    assert result["nodes_run"] == ["search", "memory", "rag", "tool_agent", "analyse", "generate"]
+    assert research_flow.routing_summary(result)["skipped"] == {}
+
+def test_stream_yields_each_node_then_result(flow, monkeypatch):
+    research_flow, _ = flow(history=[], chunks=0)
+    monkeypatch.setattr(research_flow, "get_research_workflow", research_flow.build_graph)
+    events = list(research_flow.stream_research({"query": "latest AI news", "debug": True}))
+    finished = [e for e in events if e["event"] == "node"]
+
+    assert [e["node"] for e in finished] == ["search", "route", "tool_agent", "analyse", "generate"]
+    assert finished[0]["update"]["search_output"] == "search"
+    assert all(e["duration"] >= 0 for e in finished)
+    # Every node announces its start before its output arrives
+    progress = [(e["event"], e["node"]) for e in events if e["event"] in ("node_start", "node")]
+    assert progress[:4] == [("node_start", "search"), ("node", "search"), ("node_start", "route"), ("node", "route")]
+    assert [e["elapsed"] for e in events[:-1]] == sorted(e["elapsed"] for e in events[:-1])
+    assert events[-1]["event"] == "result"
+    assert events[-1]["result"]["final_report"] == "report"
+    assert research_flow.run_research({"query": "latest AI news", "debug": True})["final_report"] == "report"
+
+def test_stream_reports_failing_node(flow, monkeypatch):
+    research_flow, _ = flow(history=[], chunks=0)
+    monkeypatch.setattr(research_flow, "run_analysis_agent", lambda state: 1 / 0)
+    monkeypatch.setattr(research_flow, "get_research_workflow", research_flow.build_graph)
+    events = []
+    with pytest.raises(ZeroDivisionError):
+        for event in research_flow.stream_research({"query": "latest AI news", "debug": True}):
+            events.append(event)
+    assert events[-1]["event"] == "node_error" and events[-1]["node"] == "analyse"
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    def embed(self, query):
+        return [1.0]
+
+    def lookup(self, vector, version):
+        return None
+
+    def store(self, query, vector, version, result):
+        self.stored.append(result["final_report"])
+
+def test_reports_with_failed_stages_are_not_cached(flow, monkeypatch):
+    from agent.analysis_agent import FAILURE_OUTPUT
+    research_flow, agents = flow(history=[], chunks=0)
+    cache = RecordingCache()
+    agents["rag"].vector_store.get_corpus_version = lambda: 1
+    monkeypatch.setattr(research_flow, "get_research_workflow", research_flow.build_graph)
+    monkeypatch.setattr(research_flow, "get_report_cache", lambda namespace: cache)
+    monkeypatch.setitem(research_flow.cache_config, "enabled", True)
+
+    research_flow.run_research({"query": "latest AI news", "debug": False})
+    assert cache.stored == ["report"]
+
+    monkeypatch.setattr(research_flow, "run_analysis_agent", lambda state: {"analysis_output": FAILURE_OUTPUT})
+    research_flow.run_research({"query": "latest AI news", "debug": False})
+    assert cache.stored == ["report"]
@@ -0,0 +1,116 @@
+import threading
+import time
+from utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"final_report": "report"}
+
+    results = []
+    def worker():
+        results.append(flight.do("same-key", work))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert sum(1 for _, shared in results if not shared) == 1
+    assert all(result is results[0][0] for result, _ in results)
+    assert flight.in_flight() == 0
+
+def test_errors_propagate_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    errors = []
+    def worker():
+        try:
+            flight.do("key", work)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert errors == ["boom"] * 3
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    counter = iter(range(10))
+    first, _ = flight.do("key", lambda: next(counter))
+    second, shared = flight.do("key", lambda: next(counter))
+    assert (first, second, shared) == (0, 1, False)
+
+def test_streams_are_shared_and_replayed():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def events():
+        calls.append(1)
+        yield "first"
+        release.wait(timeout=5)
+        yield "second"
+
+    leader, shared = flight.stream("key", events)
+    assert not shared
+    assert next(leader) == "first"
+
+    followed = []
+    follower, shared = flight.stream("key", events)
+    thread = threading.Thread(target=lambda: followed.extend(follower))
+    thread.start()
+    release.set()
+    assert list(leader) == ["second"]
+    thread.join(timeout=5)
+
+    # The late joiner replays what it missed, then follows to the end
+    assert shared and followed == ["first", "second"]
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+def test_stream_errors_reach_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def events():
+        yield 1
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    leader, _ = flight.stream("key", events)
+    follower, _ = flight.stream("key", events)
+    assert next(leader) == 1
+    release.set()
+    try:
+        list(leader)
+    except RuntimeError:
+        pass
+    received = []
+    try:
+        for item in follower:
+            received.append(item)
+    except RuntimeError as e:
+        received.append(str(e))
+    assert received == [1, "boom"]
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from rag.snapshot import MANIFEST, METADATA, Snapshot, SnapshotWriter, embedding_signature, import_snapshot
+
+def _write(path, rows=5, dimension=4):
+    writer = SnapshotWriter(str(path))
+    embeddings = np.arange(rows * dimension, dtype=np.float32).reshape(rows, dimension)
+    ids = [f"id-{i}" for i in range(rows)]
+    texts = [f"chunk {i} — ünïcode" if i % 2 else "" for i in range(rows)]
+    metadatas = [{"source": f"s{i % 2}.pdf", **({"page": i} if i % 2 else {})} for i in range(rows)]
+    writer.append(ids[:2], embeddings[:2], texts[:2], metadatas[:2])
+    writer.append(ids[2:], embeddings[2:].tolist(), texts[2:], metadatas[2:])
+    manifest = writer.close(embedding_model="test-model")
+    return manifest, ids, embeddings, texts, metadatas
+
+def test_round_trip(tmp_path):
+    manifest, ids, embeddings, texts, metadatas = _write(tmp_path)
+    assert manifest["count"] == 5 and manifest["dimension"] == 4
+
+    snapshot = Snapshot(str(tmp_path))
+    assert snapshot.manifest["embedding_model"] == "test-model"
+    assert len(snapshot) == 5
+    loaded_ids, loaded_embeddings, loaded_texts, loaded_metadatas = [], [], [], []
+    for batch_ids, batch_embeddings, batch_texts, batch_metadatas in snapshot.batches(2):
+        loaded_ids += batch_ids
+        loaded_embeddings.append(batch_embeddings)
+        loaded_texts += batch_texts
+        loaded_metadatas += batch_metadatas
+    assert loaded_ids == ids
+    assert np.array_equal(np.concatenate(loaded_embeddings), embeddings)
+    assert loaded_texts == texts
+    # Keys missing from a row are not filled with None
+    assert loaded_metadatas == metadatas
+
+def test_embeddings_are_one_contiguous_array(tmp_path):
+    _, _, embeddings, _, _ = _write(tmp_path)
+    stored = np.load(os.path.join(tmp_path, "embeddings.npy"))
+    assert stored.dtype == np.float32 and stored.flags["C_CONTIGUOUS"]
+    assert np.array_equal(stored, embeddings)
+
+def test_incomplete_or_modified_snapshot_is_rejected(tmp_path):
+    _write(tmp_path)
+    with open(os.path.join(tmp_path, METADATA), "a") as f:
+        f.write(" ")
+    with pytest.raises(ValueError):
+        Snapshot(str(tmp_path))
+
+    os.unlink(os.path.join(tmp_path, MANIFEST))
+    with pytest.raises(ValueError):
+        Snapshot(str(tmp_path))
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    writer = SnapshotWriter(str(tmp_path))
+    writer.append(["a"], [[1.0, 2.0]], ["a"], [{}])
+    with pytest.raises(ValueError):
+        writer.append(["b"], [[1.0, 2.0, 3.0]], ["b"], [{}])
+
+class Store:
+    def __init__(self, **config):
+        self.config = config
+
+def test_import_refuses_other_embedding_backend(tmp_path):
+    writer = SnapshotWriter(str(tmp_path))
+    writer.close(**embedding_signature({"embedding_model": "m", "embedding_backend": "onnx"}))
+    with pytest.raises(ValueError, match="embedding_backend"):
+        import_snapshot(Store(embedding_model="m", embedding_backend="huggingface"), str(tmp_path))
+    with pytest.raises(ValueError, match="quantized"):
+        import_snapshot(Store(embedding_model="m", embedding_backend="onnx", onnx={"quantize": False}), str(tmp_path))
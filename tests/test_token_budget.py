@@ -0,0 +1,50 @@
+from utils.token_budget import TokenBudgetManager
+
+class WordEncoding:
+    """One token per whitespace-separated word, enough to check the allocation logic"""
+
+    def __init__(self):
+        self.vocab = []
+
+    def encode(self, text, disallowed_special=()):
+        ids = []
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab.append(word)
+            ids.append(self.vocab.index(word))
+        return ids
+
+    def decode(self, tokens):
+        return " ".join(self.vocab[t] for t in tokens)
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+def test_sections_within_budget_are_untouched():
+    manager = TokenBudgetManager(context_window=100, reserve_output_tokens=20, encoding=WordEncoding())
+    sections = {"search": words("s", 10), "rag": words("r", 10)}
+    fitted, report = manager.fit(sections, fixed_tokens=10)
+    assert fitted == sections
+    assert report["used"] == 20
+    assert all(s["action"] == "kept" for s in report["sections"].values())
+
+def test_largest_section_is_trimmed_and_surplus_redistributed():
+    manager = TokenBudgetManager(
+        context_window=120, reserve_output_tokens=10,
+        shares={"search": 0.5, "rag": 0.5}, encoding=WordEncoding()
+    )
+    sections = {"search": words("s", 10), "rag": words("r", 300)}
+    fitted, report = manager.fit(sections, fixed_tokens=10)
+
+    assert fitted["search"] == sections["search"]
+    assert report["sections"]["rag"]["allocated"] == 90
+    assert report["sections"]["rag"]["action"] == "truncated"
+    assert report["used"] <= report["available"]
+    assert fitted["rag"].startswith("r0 r1") and fitted["rag"].endswith("r299")
+
+def test_duplicate_lines_are_compressed_before_truncating():
+    manager = TokenBudgetManager(context_window=40, reserve_output_tokens=0, encoding=WordEncoding())
+    repeated = "\n".join(["same tool result line"] * 20)
+    fitted, report = manager.fit({"tools": repeated})
+    assert fitted["tools"] == "same tool result line"
+    assert report["sections"]["tools"]["action"] == "compressed"
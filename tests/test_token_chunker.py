@@ -0,0 +1,60 @@
+import re
+
+import pytest
+
+from rag.token_chunker import TokenChunker
+
+class WordEncoding:
+    """One token per word, each token carrying its leading space like BPE"""
+
+    def encode(self, text, disallowed_special=()):
+        self.pieces = re.findall(r"\s*\S+", text)
+        return list(range(len(self.pieces)))
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(self.pieces[token])
+        return "".join(self.pieces[t] for t in tokens), offsets
+
+def sentences(count, words=6):
+    return " ".join(" ".join(f"s{i}w{j}" for j in range(words - 1)) + f" s{i}end." for i in range(count))
+
+def test_chunks_are_offsets_with_token_counts():
+    text = " ".join(f"w{i}" for i in range(25))
+    chunks = TokenChunker(chunk_tokens=10, overlap_tokens=2, encoding=WordEncoding()).split(text)
+
+    assert [c.token_count for c in chunks] == [10, 10, 9]
+    assert text[chunks[0].start:chunks[0].end] == " ".join(f"w{i}" for i in range(10))
+    # Overlap repeats the last two tokens of the previous chunk
+    assert text[chunks[1].start:chunks[1].end].split()[:2] == ["w8", "w9"]
+    assert text[chunks[-1].start:chunks[-1].end].endswith("w24")
+
+def test_chunks_snap_to_sentence_boundaries():
+    text = sentences(10)
+    chunks = TokenChunker(chunk_tokens=16, overlap_tokens=6, encoding=WordEncoding()).split(text)
+
+    for chunk in chunks:
+        piece = text[chunk.start:chunk.end]
+        assert piece.endswith("end."), piece
+        assert re.match(r"s\d+w0 ", piece), piece
+        assert chunk.token_count == len(piece.split()) <= 16
+    assert text[chunks[-1].start:chunks[-1].end].endswith("s9end.")
+
+def test_long_sentence_is_cut_at_target_size():
+    text = " ".join(f"w{i}" for i in range(30)) + "."
+    chunks = TokenChunker(chunk_tokens=8, overlap_tokens=0, encoding=WordEncoding()).split(text)
+    assert all(c.token_count <= 8 for c in chunks)
+    assert " ".join(text[c.start:c.end] for c in chunks) == text
+
+def test_empty_text_and_invalid_overlap():
+    assert TokenChunker(encoding=WordEncoding()).split("") == []
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_tokens=10, overlap_tokens=10)
+
+def test_configured_chunks_fit_the_embedding_window():
+    from config.config_loader import config
+    vector_config = config["vector_store"]
+    # WordPiece yields up to ~1.4x the cl100k token count for the same text
+    assert vector_config["chunk_size"] * 1.4 <= vector_config["onnx"]["max_length"]
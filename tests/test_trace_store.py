@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+
+from utils.trace_store import TraceStore, new_trace_id
+
+def test_submit_then_get(tmp_path):
+    store = TraceStore(str(tmp_path))
+    trace_id = new_trace_id()
+    assert store.submit(trace_id, {"debug_info": {"search_debug": {"prompt": "p" * 10000}}})
+    # Readable right away, before and after the background write
+    assert store.get(trace_id)["debug_info"]["search_debug"]["prompt"] == "p" * 10000
+    store.flush()
+    assert os.path.exists(tmp_path / f"{trace_id}.trace")
+    assert os.path.getsize(tmp_path / f"{trace_id}.trace") < 1000
+    assert store.get(trace_id)["debug_info"]["search_debug"]["prompt"] == "p" * 10000
+
+def test_unknown_and_malformed_ids(tmp_path):
+    store = TraceStore(str(tmp_path))
+    assert store.get(new_trace_id()) is None
+    assert store.get("../../etc/passwd") is None
+
+def test_retention_keeps_newest(tmp_path):
+    store = TraceStore(str(tmp_path), max_traces=3)
+    ids = [new_trace_id() for _ in range(5)]
+    for trace_id in ids:
+        store.submit(trace_id, {"n": trace_id})
+    store.flush()
+    assert [store.get(trace_id) is not None for trace_id in ids] == [False, False, True, True, True]
+
+    # A restarted store picks up the traces already on disk
+    reopened = TraceStore(str(tmp_path), max_traces=2)
+    reopened.submit(new_trace_id(), {})
+    reopened.flush()
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_age_and_size_limits(tmp_path):
+    store = TraceStore(str(tmp_path), max_age_seconds=0.05, max_bytes=10 ** 6)
+    old = new_trace_id()
+    store.submit(old, {})
+    store.flush()
+    time.sleep(0.1)
+    store.submit(new_trace_id(), {})
+    store.flush()
+    assert store.get(old) is None
+
+    small = TraceStore(str(tmp_path / "small"), max_bytes=1)
+    trace_id = new_trace_id()
+    small.submit(trace_id, {"x": 1})
+    small.flush()
+    assert small.get(trace_id) is None
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = TraceStore(str(tmp_path), queue_size=1)
+    gate = threading.Event()
+    write = store._write
+    store._write = lambda trace_id, payload: (gate.wait(), write(trace_id, payload))
+
+    assert store.submit(new_trace_id(), {})
+    # The writer is now blocked on the first trace; one more fits in the queue
+    while not store._queue.empty():
+        time.sleep(0.01)
+    results = [store.submit(new_trace_id(), {}) for _ in range(3)]
+    gate.set()
+    store.flush()
+    assert results == [True, False, False]
+
+def test_expired_traces_are_not_served_on_a_quiet_server(tmp_path):
+    store = TraceStore(str(tmp_path), max_age_seconds=0.05, prune_interval=0.05)
+    trace_id = new_trace_id()
+    store.submit(trace_id, {})
+    store.flush()
+    time.sleep(0.1)
+    assert store.get(trace_id) is None
+    # The idle writer removes it from disk as well
+    deadline = time.monotonic() + 2
+    while os.listdir(tmp_path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert os.listdir(tmp_path) == []
+
+def test_limits_cover_stores_sharing_a_directory(tmp_path):
+    workers = [TraceStore(str(tmp_path), max_traces=3, prune_interval=0.05) for _ in range(2)]
+    for i in range(6):
+        workers[i % 2].submit(new_trace_id(), {})
+        workers[i % 2].flush()
+    # Each worker's next timed scan sees the other's traces
+    deadline = time.monotonic() + 2
+    while len(os.listdir(tmp_path)) > 3 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(os.listdir(tmp_path)) == 3
+
+def test_writes_do_not_rescan_the_directory(tmp_path):
+    store = TraceStore(str(tmp_path), max_traces=100)
+    # The first write follows the startup scan
+    store.submit(new_trace_id(), {})
+    store.flush()
+    scans = []
+    scan = store._scan
+    store._scan = lambda: (scans.append(1), scan())[1]
+    for _ in range(20):
+        store.submit(new_trace_id(), {})
+    store.flush()
+    assert scans == []
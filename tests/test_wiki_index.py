@@ -0,0 +1,57 @@
+import gzip
+import math
+
+import pytest
+
+from tools.wiki_index import WikiIndex, build_index, normalize_title, read_abstracts
+
+ARTICLES = [
+    {"title": "Albert Einstein", "aliases": ["Einstein"],
+     "abstract": "Albert Einstein was a German-born theoretical physicist who developed the theory of relativity."},
+    {"title": "Theory of relativity",
+     "abstract": "The theory of relativity encompasses special relativity and general relativity, proposed by Albert Einstein."},
+    {"title": "Mercury (planet)", "abstract": "Mercury is the smallest planet in the Solar System and the closest to the Sun."},
+    {"title": "Photosynthesis", "abstract": "Photosynthesis is a process used by plants to convert light energy into chemical energy."},
+    {"title": "No abstract", "abstract": ""},
+]
+
+@pytest.fixture
+def index(tmp_path):
+    manifest = build_index(ARTICLES, str(tmp_path))
+    assert manifest["count"] == 4
+    return WikiIndex(str(tmp_path))
+
+def test_normalize_title():
+    assert normalize_title("  Theory of  Relativity!") == "theory of relativity"
+
+def test_title_and_alias_matches(index):
+    assert index.title_match("einstein")["title"] == "Albert Einstein"
+    assert index.title_match("What is photosynthesis?")["title"] == "Photosynthesis"
+    # Disambiguated titles answer their base name
+    assert index.title_match("Mercury")["title"] == "Mercury (planet)"
+    assert index.title_match("Einstein's theories") is None
+
+def test_bm25_ranks_abstracts(index):
+    results = index.search("how do plants turn light into energy", k=2)
+    assert results[0]["title"] == "Photosynthesis"
+    assert results[0]["match"] == "bm25"
+    assert results[0]["score"] >= results[-1]["score"]
+
+def test_misspelt_terms_are_corrected(index):
+    assert index.search("smalest planet")[0]["title"] == "Mercury (planet)"
+
+def test_lookup_prefers_title_and_respects_min_score(index):
+    assert index.lookup("Theory of relativity")["score"] == math.inf
+    assert index.lookup("quantum chromodynamics") is None
+    assert index.lookup("closest planet sun", min_score=1e6) is None
+
+def test_read_xml_dump(tmp_path):
+    dump = tmp_path / "abstract.xml.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        f.write("<feed><doc><title>Wikipedia: Photosynthesis</title><url>u</url>"
+                "<abstract>Plants convert light.</abstract><links/></doc></feed>")
+    assert list(read_abstracts(str(dump))) == [{"title": "Photosynthesis", "abstract": "Plants convert light."}]
+
+def test_incomplete_index_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        WikiIndex(str(tmp_path))
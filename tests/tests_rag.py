@@ -23,6 +23,21 @@ class TestRAGAgent:
         finally:
             os.unlink(temp_file)
     
+    def test_uploaded_file_name_is_the_source(self):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            f.write("Quarterly revenue grew because of strong demand for solar panels.")
+            temp_file = f.name
+
+        try:
+            result = self.rag_agent.ingest_documents([temp_file], sources=["quarterly_report.txt"])
+            assert result["processed_files"] == ["quarterly_report.txt"]
+            docs = self.rag_agent.vector_store.similarity_search(
+                "solar panel demand", k=3, threshold=0.0, filters={"sources": ["quarterly_report.txt"]}
+            )
+            assert docs and all(d.metadata["source"] == "quarterly_report.txt" for d in docs)
+        finally:
+            os.unlink(temp_file)
+    
     def test_rag_query(self):
         # First ingest some content
         with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
@@ -40,4 +55,180 @@ class TestRAGAgent:
             assert result["context_used"] == True
             
         finally:
-            os.unlink(temp_file)
\ No newline at end of file
+            os.unlink(temp_file)
+
+class TestNamespaces:
+    def setup_method(self):
+        self.persist_directory = tempfile.mkdtemp()
+        self.config = {"persist_directory": self.persist_directory, "collection_name": "test_documents"}
+
+    def _documents(self, count, source="test.txt"):
+        from langchain_core.documents import Document
+        return [
+            Document(page_content=f"Document {i} about topic {i % 5}", metadata={"source": source})
+            for i in range(count)
+        ]
+
+    def test_namespaces_are_isolated(self):
+        team_a = VectorStoreManager(self.config, namespace="team-a")
+        team_b = VectorStoreManager(self.config, namespace="team-b")
+        team_a.add_documents(self._documents(10))
+
+        assert team_a.count() == 10
+        assert team_b.count() == 0
+        assert team_b.similarity_search("topic 1", threshold=0.0) == []
+
+        assert team_a.clear_all()
+        assert team_a.count() == 0
+
+    def test_sharded_search_merges_top_k(self):
+        config = {**self.config, "sharding": {"shards": 3}}
+        sharded = VectorStoreManager(config, namespace="sharded")
+        single = VectorStoreManager(self.config, namespace="single")
+        documents = self._documents(30)
+        sharded.add_documents(documents)
+        single.add_documents(self._documents(30))
+
+        assert sharded.count() == 30
+        assert all(shard._collection.count() > 0 for shard in sharded.shards)
+        results = sharded.similarity_search("Document 7 about topic 2", k=5, threshold=0.0)
+        expected = single.similarity_search("Document 7 about topic 2", k=5, threshold=0.0)
+        assert [d.page_content for d in results] == [d.page_content for d in expected]
+
+    def test_reingesting_a_chunk_replaces_it(self):
+        from rag.vector_store import chunk_id, shard_for
+
+        config = {**self.config, "sharding": {"shards": 3}}
+        store = VectorStoreManager(config, namespace="stable")
+        first = store.add_documents(self._documents(10))
+        second = VectorStoreManager(config, namespace="stable").add_documents(self._documents(10))
+
+        assert first == second
+        assert store.count() == 10
+        document = self._documents(1)[0]
+        row = store.shards[shard_for(chunk_id(document), 3)]._collection.get(ids=[chunk_id(document)])
+        assert row["ids"] == [chunk_id(document)]
+
+    def test_unknown_namespace_is_not_created_by_reads(self):
+        from rag.vector_store import namespace_exists
+
+        assert not namespace_exists(self.config, "nobody")
+        assert not namespace_exists(self.config, "nobody")
+        VectorStoreManager(self.config, namespace="somebody").add_documents(self._documents(3))
+        assert namespace_exists(self.config, "somebody")
+        assert not os.path.exists(os.path.join(self.persist_directory, "test_documents__nobody.corpus_version"))
+
+    def test_invalid_namespace(self):
+        with pytest.raises(ValueError):
+            VectorStoreManager(self.config, namespace="../escape")
+
+class TestSnapshots:
+    def setup_method(self):
+        self.persist_directory = tempfile.mkdtemp()
+        self.config = {"persist_directory": self.persist_directory, "collection_name": "test_documents"}
+
+    def test_export_import_round_trip_without_embedding(self):
+        from langchain_core.documents import Document
+        from rag.snapshot import export_snapshot, import_snapshot
+
+        source = VectorStoreManager(self.config, namespace="source")
+        source.add_documents([
+            Document(page_content=f"Document {i} about topic {i % 5}", metadata={"source": "test.txt"})
+            for i in range(20)
+        ])
+        snapshot_dir = tempfile.mkdtemp()
+        manifest = export_snapshot(source, snapshot_dir)
+        assert manifest["count"] == 20
+
+        replica = VectorStoreManager({**self.config, "sharding": {"shards": 3}}, namespace="replica")
+        calls = replica.embedding_model.embed_documents
+        replica.embedding_model.embed_documents = lambda texts: pytest.fail("import must not re-embed")
+        try:
+            result = import_snapshot(replica, snapshot_dir)
+        finally:
+            replica.embedding_model.embed_documents = calls
+        assert result["imported"] == 20
+        assert replica.count() == 20
+
+        # Ingesting the same chunks again lands on the imported rows
+        replica.add_documents([
+            Document(page_content=f"Document {i} about topic {i % 5}", metadata={"source": "test.txt"})
+            for i in range(20)
+        ])
+        assert replica.count() == 20
+
+        query = "Document 7 about topic 2"
+        expected = source.similarity_search(query, k=5, threshold=0.0)
+        results = replica.similarity_search(query, k=5, threshold=0.0)
+        assert [d.page_content for d in results] == [d.page_content for d in expected]
+
+class TestCompaction:
+    def setup_method(self):
+        self.persist_directory = tempfile.mkdtemp()
+        self.config = {"persist_directory": self.persist_directory, "collection_name": "test_documents"}
+
+    def test_compaction_keeps_live_chunks(self):
+        from langchain_core.documents import Document
+
+        store = VectorStoreManager({**self.config, "sharding": {"shards": 2}}, namespace="churn")
+        for source in ("keep.txt", "drop.txt"):
+            store.add_documents([
+                Document(page_content=f"{source} document {i}", metadata={"source": source})
+                for i in range(20)
+            ])
+        assert store.delete_documents("drop.txt")
+        before = store.similarity_search("keep.txt document 3", k=3, threshold=0.0)
+        # Opened before the compaction, like a RAG agent cached by another worker
+        stale = VectorStoreManager({**self.config, "sharding": {"shards": 2}}, namespace="churn")
+
+        result = store.compact()
+        assert store.count() == 20
+        assert result["after"]["live_entries"] == 20
+        assert result["after"]["dead_entries"] == 0
+        after = store.similarity_search("keep.txt document 3", k=3, threshold=0.0)
+        assert [d.page_content for d in after] == [d.page_content for d in before]
+        assert "storage" in store.get_stats()
+
+        # The shard names now point at the rebuilt collections
+        assert stale.count() == 20
+        assert [d.page_content for d in stale.similarity_search("keep.txt document 3", k=3, threshold=0.0)] == \
+            [d.page_content for d in before]
+        reopened = VectorStoreManager({**self.config, "sharding": {"shards": 2}}, namespace="churn")
+        assert reopened.count() == 20
+        assert all(".gen" in shard._collection.name for shard in reopened.shards)
+
+    def test_failed_copy_keeps_the_old_collection(self, monkeypatch):
+        from langchain_core.documents import Document
+        import rag.vector_store as vector_store
+
+        store = VectorStoreManager(self.config, namespace="broken")
+        store.add_documents([Document(page_content=f"document {i}", metadata={"source": "a.txt"}) for i in range(5)])
+        name = store.vector_store._collection.name
+
+        def fail(*args):
+            raise OSError("disk full")
+        monkeypatch.setattr(vector_store, "write_collection_pointer", fail)
+        with pytest.raises(OSError):
+            store.compact()
+
+        assert store.vector_store._collection.name == name
+        assert VectorStoreManager(self.config, namespace="broken").count() == 5
+        client = vector_store.get_chroma_client(self.persist_directory)
+        assert not [c for c in vector_store.list_collection_names(client) if c.startswith(f"{name}.gen")]
+
+    def test_retired_collections_are_dropped_after_the_grace_period(self):
+        from langchain_core.documents import Document
+        from rag.compaction import load_retired
+        import rag.vector_store as vector_store
+
+        config = {**self.config, "compaction": {"retire_grace_seconds": 0}}
+        store = VectorStoreManager(config, namespace="retire")
+        store.add_documents([Document(page_content=f"document {i}", metadata={"source": "a.txt"}) for i in range(5)])
+        store.compact()
+        first = list(load_retired(self.persist_directory, store.collection_name))
+        client = vector_store.get_chroma_client(self.persist_directory)
+        assert set(first) <= vector_store.list_collection_names(client)
+
+        store.compact()
+        assert not set(first) & vector_store.list_collection_names(client)
+        assert store.count() == 5